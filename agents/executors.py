@@ -0,0 +1,51 @@
+"""Bounded thread pools for running blocking store calls from async code."""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Pool sizes for the RAG stores (agents.rag_retrieval and mcp_codegen.rag.store)
+RAG_READ_CONCURRENCY = int(os.getenv("RAG_READ_CONCURRENCY", "4"))  # Parallel Chroma queries
+RAG_WRITE_CONCURRENCY = int(os.getenv("RAG_WRITE_CONCURRENCY", "1"))  # Parallel Chroma writes
+
+
+class ReadWriteExecutor:
+    """Offloads blocking calls (e.g. ChromaDB) onto dedicated thread pools.
+
+    Reads and writes get separate pools so a burst of ingestion cannot starve
+    queries, and each pool's size is its concurrency limit.
+    """
+
+    def __init__(self, name: str, read_workers: int = 4, write_workers: int = 1):
+        self.name = name
+        self.read_workers = read_workers
+        self.write_workers = write_workers
+        self._read_pool = ThreadPoolExecutor(
+            max_workers=read_workers, thread_name_prefix=f"{name}-read"
+        )
+        self._write_pool = ThreadPoolExecutor(
+            max_workers=write_workers, thread_name_prefix=f"{name}-write"
+        )
+
+    async def run_read(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking read on the read pool."""
+        return await self._run(self._read_pool, fn, *args, **kwargs)
+
+    async def run_write(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking write on the write pool."""
+        return await self._run(self._write_pool, fn, *args, **kwargs)
+
+    async def _run(
+        self, pool: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        # Carry context variables into the worker thread, like asyncio.to_thread
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(pool, call)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down both pools."""
+        self._read_pool.shutdown(wait=wait)
+        self._write_pool.shutdown(wait=wait)
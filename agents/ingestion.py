@@ -0,0 +1,528 @@
+"""Staged, streaming ingestion pipeline for the agent knowledge base.
+
+Stages::
+
+    reader pool -> chunker -> batched embedding (bounded in flight) -> single writer
+
+Files are read lazily by a small thread pool, split into heading-aligned
+chunks, embedded in batches on a separate pool with a cap on concurrent API
+requests, and written to the collection by one writer so ChromaDB never sees
+concurrent writes. Each stage keeps throughput counters.
+
+For incremental runs, an IngestManifest records each file's mtime, size,
+content hash and chunk hashes, so only changed chunks are re-embedded and the
+chunks of deleted files are tombstoned. ``watch`` keeps re-running the
+incremental ingest as files change.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_CHUNK_CHARS = 4000
+
+_HEADING_RE = re.compile(r"^(?=#{1,3} )", re.MULTILINE)
+
+
+@dataclass
+class SourceFile:
+    """A file queued for ingestion; ``stat`` is taken just before it is read."""
+    path: Path
+    rel_path: str
+    domain: str
+    stat: Optional[os.stat_result] = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class Chunk:
+    """One embeddable piece of a source file."""
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class StageCounter:
+    """Items and time spent in one pipeline stage."""
+    name: str
+    items: int = 0
+    bytes: int = 0
+    busy_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, items: int, seconds: float, nbytes: int = 0) -> None:
+        with self._lock:
+            self.items += items
+            self.bytes += nbytes
+            self.busy_seconds += seconds
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "bytes": self.bytes,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items / wall_seconds, 2) if wall_seconds else 0.0,
+        }
+
+
+@dataclass
+class PipelineStats:
+    """Per-stage counters and per-domain file counts for one pipeline run."""
+    read: StageCounter = field(default_factory=lambda: StageCounter("read"))
+    chunk: StageCounter = field(default_factory=lambda: StageCounter("chunk"))
+    embed: StageCounter = field(default_factory=lambda: StageCounter("embed"))
+    write: StageCounter = field(default_factory=lambda: StageCounter("write"))
+    files_by_domain: Dict[str, int] = field(default_factory=dict)
+    failed_files: List[str] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_seconds": round(self.wall_seconds, 3),
+            "stages": {
+                stage.name: stage.to_dict(self.wall_seconds)
+                for stage in (self.read, self.chunk, self.embed, self.write)
+            },
+            "files_by_domain": dict(self.files_by_domain),
+            "failed_files": list(self.failed_files),
+        }
+
+    def log_summary(self) -> None:
+        logger.info(f"Pipeline finished in {self.wall_seconds:.2f}s")
+        for name, stage in self.to_dict()["stages"].items():
+            logger.info(
+                f"  {name:6}: {stage['items']:6} items, {stage['busy_seconds']:8.2f}s busy, "
+                f"{stage['items_per_second']:8.2f} items/s"
+            )
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of document content, stored with every chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(rel_path: str, index: int) -> str:
+    """Deterministic chunk ID so re-ingesting a file overwrites its chunks."""
+    return f"{rel_path}#chunk{index}"
+
+
+def chunk_markdown(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """Split Markdown into chunks at headings, then paragraphs, of at most max_chars."""
+    chunks: List[str] = []
+    for section in _HEADING_RE.split(text):
+        if not section.strip():
+            continue
+        if len(section) <= max_chars:
+            chunks.append(section.strip())
+            continue
+        current = ""
+        for paragraph in section.split("\n\n"):
+            if current and len(current) + len(paragraph) + 2 > max_chars:
+                chunks.append(current.strip())
+                current = ""
+            # Hard-split paragraphs that are too long on their own
+            while len(paragraph) > max_chars:
+                chunks.append(paragraph[:max_chars])
+                paragraph = paragraph[max_chars:]
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current.strip():
+            chunks.append(current.strip())
+    return chunks
+
+
+def iter_source_files(domain_dirs: Dict[str, str], base_path: Path = Path(".")) -> Iterator[SourceFile]:
+    """Lazily yield Markdown files under each domain directory."""
+    for domain_name, rel_dir in domain_dirs.items():
+        domain_path = base_path / rel_dir
+        if not domain_path.exists():
+            logger.warning(f"Domain directory does not exist: {domain_path}")
+            continue
+        for md_file in domain_path.rglob("*.md"):
+            yield SourceFile(
+                path=md_file,
+                rel_path=md_file.relative_to(base_path).as_posix(),
+                domain=domain_name,
+            )
+
+
+def _read_file(source: SourceFile, stats: PipelineStats) -> str:
+    start = time.perf_counter()
+    # Stat first: if the file changes during the read, the recorded mtime is
+    # older than the file and the next incremental run picks it up again
+    source.stat = source.path.stat()
+    content = source.path.read_text(encoding="utf-8")
+    stats.read.record(1, time.perf_counter() - start, len(content))
+    return content
+
+
+def _read_ahead(
+    sources: Iterable[SourceFile], pool: ThreadPoolExecutor, lookahead: int, stats: PipelineStats
+) -> Iterator[tuple]:
+    """Read files on the pool, keeping at most ``lookahead`` reads queued."""
+    pending: deque = deque()
+    for source in sources:
+        pending.append((source, pool.submit(_read_file, source, stats)))
+        if len(pending) >= lookahead:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def build_chunks(source: SourceFile, content: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[Chunk]:
+    """Chunk a file and attach the metadata every chunk carries."""
+    file_hash = content_hash(content)
+    ingested_at = datetime.utcnow().isoformat()
+    texts = chunk_markdown(content, max_chars)
+    return [
+        Chunk(
+            id=chunk_id(source.rel_path, index),
+            text=text,
+            metadata={
+                "domain": source.domain,
+                "source": source.rel_path,
+                "chunk_index": index,
+                "chunk_count": len(texts),
+                "chunk_hash": content_hash(text),
+                "content_hash": file_hash,
+                "ingested_at": ingested_at,
+            },
+        )
+        for index, text in enumerate(texts)
+    ]
+
+
+def run_ingestion_pipeline(
+    rag_store: Any,
+    sources: Iterable[SourceFile],
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    max_chars: int = DEFAULT_CHUNK_CHARS,
+    dry_run: bool = False,
+    select_chunks: Optional[Callable[[SourceFile, List[Chunk]], List[Chunk]]] = None,
+) -> PipelineStats:
+    """Stream files through read -> chunk -> embed -> write.
+
+    Args:
+        rag_store: Initialized DomainScopedRAGStore (unused when dry_run)
+        sources: Files to ingest; consumed lazily
+        workers: Reader threads
+        batch_size: Chunks per embedding request
+        max_in_flight: Maximum concurrent embedding requests
+        max_chars: Maximum chunk size in characters
+        dry_run: Read and chunk only; nothing is embedded or written
+        select_chunks: Called with each file and its chunks; returns the
+            chunks that actually need embedding (e.g. only changed ones)
+
+    Returns:
+        PipelineStats with per-stage counters
+    """
+    stats = PipelineStats()
+    start = time.perf_counter()
+    batch: List[Chunk] = []
+    in_flight: Dict[Future, List[Chunk]] = {}
+
+    def embed(chunks: List[Chunk]) -> List[Any]:
+        embed_start = time.perf_counter()
+        embeddings = rag_store.embed_documents([c.text for c in chunks])
+        stats.embed.record(len(chunks), time.perf_counter() - embed_start)
+        return embeddings
+
+    def write(done: Iterable[Future]) -> None:
+        # Single writer: only this (calling) thread touches the collection
+        for future in done:
+            chunks = in_flight.pop(future)
+            try:
+                embeddings = future.result()
+                write_start = time.perf_counter()
+                rag_store.add_embedded_documents(
+                    ids=[c.id for c in chunks],
+                    documents=[c.text for c in chunks],
+                    metadatas=[c.metadata for c in chunks],
+                    embeddings=embeddings,
+                )
+                stats.write.record(len(chunks), time.perf_counter() - write_start)
+            except Exception as e:
+                failed = {c.metadata["source"]: c.metadata["domain"] for c in chunks}
+                logger.error(f"Failed to embed/write batch from {sorted(failed)}: {e}")
+                for source_path, domain in failed.items():
+                    if source_path not in stats.failed_files:
+                        stats.failed_files.append(source_path)
+                        stats.files_by_domain[domain] -= 1
+
+    def submit(chunks: List[Chunk]) -> None:
+        # Bound in-flight requests: drain completed batches before submitting more
+        while len(in_flight) >= max_in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            write(done)
+        in_flight[embed_pool.submit(embed, chunks)] = chunks
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-read") as read_pool, \
+            ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ingest-embed") as embed_pool:
+        for source, read_future in _read_ahead(sources, read_pool, workers * 2, stats):
+            try:
+                content = read_future.result()
+            except Exception as e:
+                logger.error(f"Error reading {source.path}: {e}")
+                stats.failed_files.append(source.rel_path)
+                continue
+
+            chunk_start = time.perf_counter()
+            chunks = build_chunks(source, content, max_chars)
+            stats.chunk.record(len(chunks), time.perf_counter() - chunk_start, len(content))
+
+            if select_chunks:
+                chunks = select_chunks(source, chunks)
+
+            if not chunks:
+                if not content.strip():
+                    logger.warning(f"Skipping empty file: {source.rel_path}")
+                continue
+            stats.files_by_domain[source.domain] = stats.files_by_domain.get(source.domain, 0) + 1
+
+            if dry_run:
+                logger.info(
+                    f"[DRY RUN] Would ingest: {source.rel_path} "
+                    f"(domain: {source.domain}, {len(content)} chars, {len(chunks)} chunks)"
+                )
+                continue
+
+            batch.extend(chunks)
+            while len(batch) >= batch_size:
+                submit(batch[:batch_size])
+                batch = batch[batch_size:]
+
+        if batch and not dry_run:
+            submit(batch)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            write(done)
+
+    stats.wall_seconds = time.perf_counter() - start
+    return stats
+
+
+class IngestManifest:
+    """Persistent record of what has been ingested from each source file.
+
+    Entries map a file's relative path to its mtime, size, content hash and
+    per-chunk hashes. Files that disappear are moved to ``tombstones`` along
+    with the chunk IDs that were deleted for them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.tombstones: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries = data.get("entries", {})
+            self.tombstones = data.get("tombstones", {})
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps({"entries": self.entries, "tombstones": self.tombstones}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
+
+    def is_unchanged(self, source: SourceFile) -> bool:
+        """Cheap check: same mtime and size as when last ingested."""
+        entry = self.entries.get(source.rel_path)
+        if not entry:
+            return False
+        stat = source.path.stat()
+        return entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size
+
+    def record(self, source: SourceFile, chunks: List[Chunk], stat: os.stat_result) -> None:
+        """Record a file's chunks, using the stat taken just before it was read."""
+        self.entries[source.rel_path] = {
+            "domain": source.domain,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "content_hash": chunks[0].metadata["content_hash"] if chunks else "",
+            "chunks": {c.id: c.metadata["chunk_hash"] for c in chunks},
+            "ingested_at": datetime.utcnow().isoformat(),
+        }
+        self.tombstones.pop(source.rel_path, None)
+
+    def tombstone(self, rel_path: str) -> List[str]:
+        """Move a deleted file's entry to tombstones; returns its chunk IDs."""
+        entry = self.entries.pop(rel_path)
+        chunk_ids = list(entry.get("chunks", {}))
+        self.tombstones[rel_path] = {
+            "domain": entry.get("domain"),
+            "chunk_ids": chunk_ids,
+            "deleted_at": datetime.utcnow().isoformat(),
+        }
+        return chunk_ids
+
+
+def default_manifest_path(rag_store: Any) -> Path:
+    """Manifest location next to the store's ChromaDB directory.
+
+    A store built without chromadb has no ``chroma_dir``; the default
+    directory and collection name are used instead.
+    """
+    from agents.rag_retrieval import DEFAULT_CHROMA_DIR, DEFAULT_COLLECTION
+
+    chroma_dir = getattr(rag_store, "chroma_dir", None) or DEFAULT_CHROMA_DIR
+    collection_name = getattr(rag_store, "collection_name", None) or DEFAULT_COLLECTION
+    return Path(chroma_dir) / f"{collection_name}.ingest_manifest.json"
+
+
+def incremental_ingest(
+    rag_store: Any,
+    domain_dirs: Dict[str, str],
+    manifest: IngestManifest,
+    base_path: Path = Path("."),
+    dry_run: bool = False,
+    full: bool = False,
+    **pipeline_kwargs: Any,
+) -> PipelineStats:
+    """Ingest only what changed since the manifest was last saved.
+
+    Files whose mtime and size match the manifest are skipped without being
+    read. Changed files are re-chunked, and only chunks whose hash differs
+    are re-embedded; chunk IDs that no longer exist are deleted. Unchanged
+    chunks of a file whose content changed get their metadata (chunk count,
+    content hash) updated without re-embedding. Files that were removed from
+    disk have all their chunks deleted and are tombstoned.
+
+    With ``full``, every file is read and every chunk re-embedded, but the
+    old manifest is still diffed against the run so chunks of deleted files
+    and chunk IDs a file no longer produces are removed.
+
+    Returns:
+        PipelineStats for the changed files; ``files_by_domain`` counts
+        files with at least one re-embedded chunk
+    """
+    sources = list(iter_source_files(domain_dirs, base_path))
+    present = {source.rel_path for source in sources}
+    changed = [source for source in sources if full or not manifest.is_unchanged(source)]
+    prefixes = tuple(f"{Path(rel_dir).as_posix().rstrip('/')}/" for rel_dir in domain_dirs.values())
+    deleted = [
+        rel_path for rel_path in manifest.entries
+        if rel_path not in present and rel_path.startswith(prefixes)
+    ]
+
+    stale_ids: List[str] = []
+    pending: Dict[str, tuple] = {}
+    refresh: Dict[str, List[Chunk]] = {}
+
+    def select_changed(source: SourceFile, chunks: List[Chunk]) -> List[Chunk]:
+        entry = manifest.entries.get(source.rel_path, {})
+        previous = entry.get("chunks", {})
+        current_ids = {c.id for c in chunks}
+        stale_ids.extend(chunk_id for chunk_id in previous if chunk_id not in current_ids)
+        pending[source.rel_path] = (source, chunks, source.stat)
+        if full:
+            return chunks
+        changed_chunks = [c for c in chunks if previous.get(c.id) != c.metadata["chunk_hash"]]
+        if chunks and entry.get("content_hash") not in (None, chunks[0].metadata["content_hash"]):
+            # Same text, but chunk_count/content_hash describe the old file
+            refresh[source.rel_path] = [c for c in chunks if previous.get(c.id) == c.metadata["chunk_hash"]]
+        return changed_chunks
+
+    stats = run_ingestion_pipeline(
+        rag_store, changed, dry_run=dry_run, select_chunks=select_changed, **pipeline_kwargs
+    )
+
+    if dry_run:
+        for rel_path in deleted:
+            logger.info(f"[DRY RUN] Would tombstone deleted file: {rel_path}")
+        return stats
+
+    for rel_path in deleted:
+        stale_ids.extend(manifest.tombstone(rel_path))
+        logger.info(f"Tombstoned deleted file: {rel_path}")
+    if stale_ids:
+        rag_store.delete_documents(stale_ids)
+
+    unchanged = [
+        chunk for rel_path, chunks in refresh.items()
+        if rel_path not in stats.failed_files for chunk in chunks
+    ]
+    if unchanged:
+        rag_store.update_metadatas([c.id for c in unchanged], [c.metadata for c in unchanged])
+
+    for rel_path, (source, chunks, stat) in pending.items():
+        if rel_path not in stats.failed_files:
+            manifest.record(source, chunks, stat)
+    manifest.save()
+
+    logger.info(
+        f"Incremental ingest: {len(sources)} files scanned, {len(changed)} changed, "
+        f"{stats.write.items} chunks written, {len(stale_ids)} chunks deleted"
+    )
+    return stats
+
+
+def _wait_for_changes(paths: List[Path], interval: float) -> Callable[[], None]:
+    """Return a function that blocks until files may have changed.
+
+    Uses inotify/FSEvents through the optional ``watchdog`` package when it is
+    installed, and falls back to sleeping for ``interval`` seconds.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return lambda: time.sleep(interval)
+
+    changed = threading.Event()
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            changed.set()
+
+    observer = Observer()
+    for path in paths:
+        if path.exists():
+            observer.schedule(_Handler(), str(path), recursive=True)
+    observer.daemon = True
+    observer.start()
+
+    def wait_for_event() -> None:
+        # Wake on the first event, then debounce bursts of editor writes
+        changed.wait(timeout=max(interval, 1.0) * 30)
+        time.sleep(interval)
+        changed.clear()
+
+    return wait_for_event
+
+
+def watch(
+    rag_store: Any,
+    domain_dirs: Dict[str, str],
+    manifest: IngestManifest,
+    base_path: Path = Path("."),
+    interval: float = 2.0,
+    **pipeline_kwargs: Any,
+) -> None:
+    """Keep the knowledge base in sync with ``domain_dirs`` until interrupted."""
+    wait_for_changes = _wait_for_changes([base_path / d for d in domain_dirs.values()], interval)
+    logger.info(f"Watching {', '.join(domain_dirs.values())} for changes (Ctrl+C to stop)")
+    while True:
+        try:
+            incremental_ingest(rag_store, domain_dirs, manifest, base_path, **pipeline_kwargs)
+        except Exception as e:
+            logger.error(f"Incremental ingest failed: {e}")
+        wait_for_changes()
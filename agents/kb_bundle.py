@@ -0,0 +1,252 @@
+"""Versioned, pre-embedded knowledge bundles for Context7 libraries.
+
+Populating a fresh knowledge base used to mean fetching every library from
+Context7 and re-embedding it in each environment. A bundle packs one
+library's chunks, metadata and embeddings into a single zip so other nodes
+can import it straight into ChromaDB without calling the embedding API::
+
+    manifest.json     format version, library, bundle version, embedding model,
+                      dim, count and a SHA-256 over chunks and embeddings
+    chunks.jsonl      one {"id", "document", "metadata"} object per line
+    embeddings.npy    count x dim float32 array, rows aligned with chunks.jsonl
+
+Bundles are only importable into a store that uses the same embedding model.
+"""
+import hashlib
+import io
+import json
+import logging
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".kbbundle.zip"
+DEFAULT_BATCH_SIZE = 500
+
+
+def bundle_filename(library_id: str, version: str) -> str:
+    """File name for a library bundle, e.g. ``fastapi_fastapi-2025.06.01.kbbundle.zip``."""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", library_id.strip("/"))
+    return f"{slug}-{version}{BUNDLE_SUFFIX}"
+
+
+def _checksum(chunks_data: bytes, embeddings_data: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(chunks_data)
+    digest.update(embeddings_data)
+    return digest.hexdigest()
+
+
+def list_context7_libraries(collection: Any, page_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Map each Context7 library_id in a collection to its document count."""
+    libraries: Dict[str, int] = {}
+    offset = 0
+    while True:
+        page = collection.get(
+            where={"source_type": "context7"},
+            limit=page_size,
+            offset=offset,
+            include=["metadatas"]
+        )
+        if not page["ids"]:
+            return libraries
+        for metadata in page["metadatas"]:
+            library_id = (metadata or {}).get("library_id")
+            if library_id:
+                libraries[library_id] = libraries.get(library_id, 0) + 1
+        offset += len(page["ids"])
+
+
+def _stale_library_ids(
+    collection: Any,
+    library_id: str,
+    version: str,
+    keep: set,
+    page_size: int = DEFAULT_BATCH_SIZE,
+) -> List[str]:
+    """IDs of a library's documents from another bundle version that are not in ``keep``."""
+    stale: List[str] = []
+    offset = 0
+    while True:
+        page = collection.get(
+            where={"library_id": library_id},
+            limit=page_size,
+            offset=offset,
+            include=["metadatas"]
+        )
+        if not page["ids"]:
+            return stale
+        for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+            if doc_id not in keep and (metadata or {}).get("bundle_version") != version:
+                stale.append(doc_id)
+        offset += len(page["ids"])
+
+
+def export_bundle(
+    collection: Any,
+    library_id: str,
+    out_dir: Union[str, Path],
+    embedding_model: str,
+    version: Optional[str] = None,
+    page_size: int = DEFAULT_BATCH_SIZE,
+) -> Path:
+    """Write every document of one Context7 library to a bundle.
+
+    Args:
+        collection: ChromaDB collection holding the library's documents
+        library_id: Context7 library ID, e.g. "/fastapi/fastapi"
+        out_dir: Directory to write the bundle into
+        embedding_model: Model the collection's embeddings were made with
+        version: Bundle version; defaults to the library's newest ingested_at date
+        page_size: Records fetched per page
+
+    Returns:
+        Path of the written bundle
+    """
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    vectors: List[np.ndarray] = []
+    offset = 0
+    while True:
+        page = collection.get(
+            where={"library_id": library_id},
+            limit=page_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(document or "" for document in page["documents"])
+        metadatas.extend(metadata or {} for metadata in page["metadatas"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+
+    if not ids:
+        raise ValueError(f"No documents found for library {library_id}")
+
+    embeddings = np.concatenate(vectors)
+    if version is None:
+        newest = max(str(metadata.get("ingested_at", "")) for metadata in metadatas)
+        version = newest[:10].replace("-", ".") or datetime.utcnow().strftime("%Y.%m.%d")
+
+    chunks_data = "".join(
+        json.dumps({"id": doc_id, "document": document, "metadata": metadata}) + "\n"
+        for doc_id, document, metadata in zip(ids, documents, metadatas)
+    ).encode("utf-8")
+    buffer = io.BytesIO()
+    np.save(buffer, embeddings, allow_pickle=False)
+    embeddings_data = buffer.getvalue()
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "library_id": library_id,
+        "library_name": metadatas[0].get("library_name"),
+        "domain": metadatas[0].get("domain"),
+        "version": version,
+        "embedding_model": embedding_model,
+        "dim": int(embeddings.shape[1]),
+        "count": len(ids),
+        "sha256": _checksum(chunks_data, embeddings_data),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+    out_path = Path(out_dir) / bundle_filename(library_id, version)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr("manifest.json", json.dumps(manifest, indent=2))
+        bundle.writestr("chunks.jsonl", chunks_data)
+        bundle.writestr("embeddings.npy", embeddings_data)
+    tmp_path.replace(out_path)
+    logger.info(f"Exported {len(ids)} documents for {library_id} to {out_path}")
+    return out_path
+
+
+def read_manifest(path: Union[str, Path]) -> Dict[str, Any]:
+    """Read a bundle's manifest without loading its chunks or embeddings."""
+    with zipfile.ZipFile(path) as bundle:
+        return json.loads(bundle.read("manifest.json"))
+
+
+def import_bundle(
+    rag_store: Any,
+    path: Union[str, Path],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Load a bundle into a RAG store using its precomputed embeddings.
+
+    Documents are upserted by ID, so importing the same bundle twice is a
+    no-op. Importing another version replaces the library: its documents
+    from other versions that the new bundle does not contain are deleted
+    first.
+
+    Args:
+        rag_store: DomainScopedRAGStore (anything with ``embedding_model``,
+            ``collection``, ``add_embedded_documents`` and ``delete_documents``)
+        path: Bundle file
+        batch_size: Documents per upsert
+
+    Returns:
+        The bundle manifest
+
+    Raises:
+        ValueError: If the bundle is corrupt, has an unsupported format or was
+            embedded with a different model than the store uses
+    """
+    with zipfile.ZipFile(path) as bundle:
+        manifest = json.loads(bundle.read("manifest.json"))
+        if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format version: {manifest.get('format_version')}")
+        if manifest["embedding_model"] != rag_store.embedding_model:
+            raise ValueError(
+                f"Bundle {path} was embedded with {manifest['embedding_model']}, "
+                f"but the store uses {rag_store.embedding_model}"
+            )
+        chunks_data = bundle.read("chunks.jsonl")
+        embeddings_data = bundle.read("embeddings.npy")
+
+    if _checksum(chunks_data, embeddings_data) != manifest["sha256"]:
+        raise ValueError(f"Bundle {path} failed its checksum")
+
+    chunks = [json.loads(line) for line in chunks_data.decode("utf-8").splitlines() if line]
+    embeddings = np.load(io.BytesIO(embeddings_data), allow_pickle=False)
+    if len(chunks) != manifest["count"] or embeddings.shape != (manifest["count"], manifest["dim"]):
+        raise ValueError(f"Bundle {path} does not match its manifest")
+
+    stale_ids = _stale_library_ids(
+        rag_store.collection,
+        manifest["library_id"],
+        manifest["version"],
+        keep={chunk["id"] for chunk in chunks},
+        page_size=batch_size
+    )
+    if stale_ids:
+        rag_store.delete_documents(stale_ids)
+        logger.info(
+            f"Deleted {len(stale_ids)} documents of {manifest['library_id']} "
+            f"not in bundle version {manifest['version']}"
+        )
+
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        rag_store.add_embedded_documents(
+            ids=[chunk["id"] for chunk in batch],
+            documents=[chunk["document"] for chunk in batch],
+            metadatas=[{**chunk["metadata"], "bundle_version": manifest["version"]} for chunk in batch],
+            embeddings=embeddings[start:start + batch_size].tolist()
+        )
+
+    logger.info(
+        f"Imported {manifest['count']} documents for {manifest['library_id']} "
+        f"(bundle version {manifest['version']})"
+    )
+    return manifest
@@ -0,0 +1,196 @@
+"""Garbage collection for the knowledge base collections.
+
+Nothing else ever deletes from ``agent_knowledge_base`` or ``code_patterns``,
+so repeated ingestion runs, re-fetched Context7 dumps and learned fixes pile
+up. ``collect_garbage`` scans a collection page by page and removes:
+
+- duplicates: identical document text from the same source and domain,
+  keeping the newest copy. Chunks written by manifest-driven ingestion
+  (``<file>#chunkN``) are never duplicates: their IDs are deterministic,
+  and the manifest would keep listing a deleted chunk as current.
+- superseded: older Context7 dumps of a library that has a newer dump, and
+  whole-file documents from before chunked ingestion once chunks exist
+- orphaned: documents whose local source file no longer exists
+"""
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_DELETE_BATCH_SIZE = 500
+
+CONTEXT7_PREFIX = "context7://"
+CHUNK_ID_MARKER = "#chunk"
+
+
+def iter_collection(
+    collection: Any,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    include: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, Optional[str], Dict[str, Any]]]:
+    """Yield (id, document, metadata) for every record, one page at a time."""
+    include = include or ["documents", "metadatas"]
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=include)
+        ids = page.get("ids") or []
+        if not ids:
+            return
+        documents = page.get("documents") or [None] * len(ids)
+        metadatas = page.get("metadatas") or [{}] * len(ids)
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            yield doc_id, document, metadata or {}
+        offset += len(ids)
+
+
+@dataclass
+class GCPlan:
+    """IDs selected for deletion, grouped by reason."""
+    duplicates: List[str] = field(default_factory=list)
+    superseded: List[str] = field(default_factory=list)
+    orphaned: List[str] = field(default_factory=list)
+
+    def all_ids(self) -> List[str]:
+        # An ID can qualify for several reasons; delete it once
+        return list(dict.fromkeys(self.duplicates + self.superseded + self.orphaned))
+
+
+def _is_local_source(source: str) -> bool:
+    return bool(source) and "://" not in source
+
+
+def plan_garbage_collection(
+    collection: Any,
+    base_path: Path = Path("."),
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> GCPlan:
+    """Scan a collection and decide what to delete, without deleting anything.
+
+    Args:
+        collection: ChromaDB collection
+        base_path: Directory that local ``source`` paths are relative to
+        page_size: Records fetched per page
+
+    Returns:
+        GCPlan with the IDs to delete per reason
+    """
+    plan = GCPlan()
+    # Newest record per (domain, source, content hash)
+    newest_by_hash: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+    # Context7 dumps per library: library_id -> [(ingested_at, id)]
+    context7_dumps: Dict[str, List[Tuple[str, str]]] = {}
+    whole_file_docs: Dict[str, List[str]] = {}
+    chunked_sources = set()
+    missing_sources: Dict[str, bool] = {}
+
+    for doc_id, document, metadata in iter_collection(collection, page_size):
+        ingested_at = str(metadata.get("ingested_at", ""))
+        source = str(metadata.get("source", ""))
+
+        manifest_chunk = CHUNK_ID_MARKER in doc_id and _is_local_source(source)
+        if not manifest_chunk:
+            key = (
+                str(metadata.get("domain", "")),
+                source,
+                hashlib.sha256((document or "").encode("utf-8")).hexdigest(),
+            )
+            previous = newest_by_hash.get(key)
+            if previous is None:
+                newest_by_hash[key] = (ingested_at, doc_id)
+            elif ingested_at > previous[0]:
+                plan.duplicates.append(previous[1])
+                newest_by_hash[key] = (ingested_at, doc_id)
+            else:
+                plan.duplicates.append(doc_id)
+
+        if source.startswith(CONTEXT7_PREFIX) or metadata.get("source_type") == "context7":
+            library = str(metadata.get("library_id") or source)
+            context7_dumps.setdefault(library, []).append((ingested_at, doc_id))
+        elif _is_local_source(source):
+            if CHUNK_ID_MARKER in doc_id:
+                chunked_sources.add(source)
+            else:
+                whole_file_docs.setdefault(source, []).append(doc_id)
+            if source not in missing_sources:
+                missing_sources[source] = not (base_path / source).exists()
+            if missing_sources[source]:
+                plan.orphaned.append(doc_id)
+
+    for dumps in context7_dumps.values():
+        # All records from the newest dump survive; a dump may span several chunks
+        newest = max(ingested_at for ingested_at, _ in dumps)
+        plan.superseded.extend(doc_id for ingested_at, doc_id in dumps if ingested_at < newest)
+
+    for source, doc_ids in whole_file_docs.items():
+        if source in chunked_sources:
+            plan.superseded.extend(doc_ids)
+
+    return plan
+
+
+def delete_in_batches(
+    collection: Any,
+    ids: List[str],
+    batch_size: int = DEFAULT_DELETE_BATCH_SIZE,
+    stats_index: Optional[Any] = None,
+) -> int:
+    """Delete IDs from a collection in batches; returns the number submitted.
+
+    With a stats index (agents.kb_stats.KBStatsIndex), each batch's records
+    are looked up before deletion so the index can be decremented.
+    """
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        existing = None
+        if stats_index is not None:
+            existing = collection.get(ids=batch, include=["documents", "metadatas"])
+        collection.delete(ids=batch)
+        if existing is not None and existing.get("ids"):
+            stats_index.record_removed(existing["metadatas"], existing["documents"])
+    return len(ids)
+
+
+def collect_garbage(
+    collection: Any,
+    base_path: Path = Path("."),
+    dry_run: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    batch_size: int = DEFAULT_DELETE_BATCH_SIZE,
+    stats_index: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Find and delete duplicate, superseded and orphaned documents.
+
+    Args:
+        collection: ChromaDB collection
+        base_path: Directory that local ``source`` paths are relative to
+        dry_run: Only report what would be deleted
+        page_size: Records fetched per page while scanning
+        batch_size: IDs per delete call
+        stats_index: KB stats side-index to keep in sync with deletions
+
+    Returns:
+        Report with collection size before and after and counts per reason
+    """
+    before = collection.count()
+    plan = plan_garbage_collection(collection, base_path, page_size)
+    to_delete = plan.all_ids()
+
+    if to_delete and not dry_run:
+        delete_in_batches(collection, to_delete, batch_size, stats_index)
+        logger.info(f"Deleted {len(to_delete)} stale documents")
+
+    return {
+        "collection": getattr(collection, "name", ""),
+        "dry_run": dry_run,
+        "count_before": before,
+        "count_after": before if dry_run else collection.count(),
+        "duplicates": len(plan.duplicates),
+        "superseded": len(plan.superseded),
+        "orphaned": len(plan.orphaned),
+        "deleted": 0 if dry_run else len(to_delete),
+        "would_delete": len(to_delete),
+    }
@@ -0,0 +1,127 @@
+"""Aggregated knowledge base statistics kept in a small side-index.
+
+Counting documents per domain or checking which Context7 libraries are
+present used to mean pulling every metadata record out of ChromaDB. The
+side-index is updated on every ingest, delete and garbage collection, so
+those questions become dictionary lookups. If it is missing or its total
+disagrees with ``collection.count()`` (e.g. another process wrote to the
+collection), it is rebuilt by paging through the collection once.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_FORMAT_VERSION = 1
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "format_version": STATS_FORMAT_VERSION,
+        "total_documents": 0,
+        "total_bytes": 0,
+        "domains": {},
+        "libraries": {},
+        "updated_at": None,
+    }
+
+
+class KBStatsIndex:
+    """Per-domain counts, per-library presence and total bytes for one collection."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.data = _empty_stats()
+        self.loaded = False
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("format_version") == STATS_FORMAT_VERSION:
+                    self.data = data
+                    self.loaded = True
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable KB stats index {self.path}: {e}")
+
+    @property
+    def total_documents(self) -> int:
+        return self.data["total_documents"]
+
+    @property
+    def domains(self) -> Dict[str, int]:
+        return dict(self.data["domains"])
+
+    @property
+    def libraries(self) -> Dict[str, int]:
+        return dict(self.data["libraries"])
+
+    def has_library(self, library_name: str) -> bool:
+        """Whether any document from a Context7 library is in the collection."""
+        return self.data["libraries"].get(library_name, 0) > 0
+
+    def _apply(
+        self,
+        metadatas: Iterable[Optional[Dict[str, Any]]],
+        documents: Iterable[Optional[str]],
+        sign: int,
+    ) -> None:
+        data = self.data
+        for metadata, document in zip(metadatas, documents):
+            metadata = metadata or {}
+            data["total_documents"] += sign
+            data["total_bytes"] += sign * len((document or "").encode("utf-8"))
+            for field, key in (("domains", metadata.get("domain", "unknown")),
+                               ("libraries", metadata.get("library_name"))):
+                if key is None:
+                    continue
+                count = data[field].get(key, 0) + sign
+                if count > 0:
+                    data[field][key] = count
+                else:
+                    data[field].pop(key, None)
+
+    def record_added(self, metadatas: Iterable[Dict[str, Any]], documents: Iterable[str]) -> None:
+        """Account for newly written documents and persist the index."""
+        with self._lock:
+            self._apply(metadatas, documents, +1)
+            self._save()
+
+    def record_removed(self, metadatas: Iterable[Dict[str, Any]], documents: Iterable[str]) -> None:
+        """Account for deleted (or overwritten) documents and persist the index."""
+        with self._lock:
+            self._apply(metadatas, documents, -1)
+            self._save()
+
+    def rebuild(self, collection: Any, page_size: int = 500) -> None:
+        """Recompute the index by paging through the whole collection."""
+        from agents.kb_maintenance import iter_collection
+
+        with self._lock:
+            self.data = _empty_stats()
+            for _, document, metadata in iter_collection(collection, page_size):
+                self._apply([metadata], [document], +1)
+            self._save()
+        logger.info(f"Rebuilt KB stats index: {self.total_documents} documents")
+
+    def ensure_fresh(self, collection: Any) -> "KBStatsIndex":
+        """Rebuild if the index is missing or out of sync with the collection."""
+        if not self.loaded or self.total_documents != collection.count():
+            self.rebuild(collection)
+            self.loaded = True
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self.data)
+
+    def _save(self) -> None:
+        self.data["updated_at"] = datetime.utcnow().isoformat()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -1,18 +1,40 @@
 """Learning and memory system for persistent agent knowledge."""
+import importlib.util
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 import json
 
-try:
-    from langgraph.store.memory import InMemoryStore
-    from langchain.embeddings import init_embeddings
-    from langgraph.checkpoint.memory import InMemorySaver
-except ImportError:
-    # Graceful fallback
-    InMemoryStore = object
-    InMemorySaver = object
-    init_embeddings = lambda x: None
+from agents.llm import get_openai_base_url
+
+# Packages the memory backend needs; checked without importing them
+LEARNING_DEPENDENCIES = ("langgraph", "langchain")
+
+
+def learning_dependencies_available() -> bool:
+    """Whether langgraph and langchain are installed, without importing them."""
+    return all(importlib.util.find_spec(name) is not None for name in LEARNING_DEPENDENCIES)
+
+
+LEARNING_AVAILABLE = learning_dependencies_available()
+
+
+def _load_in_memory_backend():
+    """Import the LangGraph in-memory store on first use.
+
+    langgraph/langchain are slow to import, so they are only loaded when a
+    LearningMemory is actually constructed.
+
+    Returns:
+        (InMemoryStore, InMemorySaver, init_embeddings), or None if unavailable
+    """
+    try:
+        from langgraph.store.memory import InMemoryStore
+        from langchain.embeddings import init_embeddings
+        from langgraph.checkpoint.memory import InMemorySaver
+    except ImportError:
+        return None
+    return InMemoryStore, InMemorySaver, init_embeddings
 
 
 class LearningMemory:
@@ -35,13 +57,19 @@ class LearningMemory:
                 raise ImportError("Install langgraph-checkpoint-postgres for persistent storage")
         else:
             # Development: Use in-memory
-            if InMemoryStore is object:
+            backend = _load_in_memory_backend()
+            if backend is None:
                 self.store = None
                 self.checkpointer = None
             else:
+                InMemoryStore, InMemorySaver, init_embeddings = backend
                 try:
                     # Configure with semantic search if API key available
-                    embedding_fn = init_embeddings("openai:text-embedding-3-small")
+                    base_url = get_openai_base_url()
+                    embedding_fn = init_embeddings(
+                        "openai:text-embedding-3-small",
+                        **({"base_url": base_url} if base_url else {})
+                    )
                     self.store = InMemoryStore(
                         index={
                             "embed": embedding_fn,
@@ -0,0 +1,206 @@
+"""Shared chat completion helper for the orchestrator agents.
+
+All agents that send chat completions go through ``chat_completion`` so
+they share one lazily constructed OpenAI client, the disk-backed response
+cache (see agents.llm_cache) and the retry/hedging layer (see
+agents.llm_resilience). Each call is recorded for token and latency
+accounting (see agents.llm_usage), including retried attempts and losing
+hedge duplicates.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from agents.llm_cache import cache_key, get_llm_cache
+from agents.llm_resilience import get_resilient_caller
+from agents.llm_usage import CallTimer
+from agents.stream_writer import AtomicStreamWriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+_client = None
+
+
+def get_openai_base_url() -> Optional[str]:
+    """OpenAI-compatible API base URL (OPENAI_BASE_URL), e.g. the local stub in agents.llm_stub."""
+    return os.getenv("OPENAI_BASE_URL") or None
+
+
+def get_openai_client():
+    """Get or create the shared OpenAI client (reads OPENAI_API_KEY and OPENAI_BASE_URL on first use)."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        # Retries are handled by agents.llm_resilience, not stacked on top
+        _client = OpenAI(max_retries=0, base_url=get_openai_base_url())
+    return _client
+
+
+def chat_completion(
+    messages: List[Dict[str, Any]],
+    model: str = DEFAULT_MODEL,
+    response_format: Optional[Dict[str, Any]] = None,
+    temperature: Optional[float] = None,
+    bypass_cache: Optional[bool] = None,
+    agent: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_attempts: Optional[int] = None,
+    validate: Optional[Callable[[str], Any]] = None,
+) -> str:
+    """Return the assistant message content for a chat completion.
+
+    Args:
+        messages: Chat messages
+        model: Model name
+        response_format: e.g. {"type": "json_object"} for JSON mode
+        temperature: Sampling temperature (None for the API default)
+        bypass_cache: Skip the cache lookup (the fresh response is still
+            stored); None uses LLM_CACHE_BYPASS
+        agent: Agent name for usage accounting (defaults to llm_context)
+        timeout: Per-request timeout in seconds (None for the client default)
+        max_attempts: Override the retry policy's attempts
+        validate: Called with the content before it is cached, e.g.
+            ``json.loads``. If it raises, the response is not cached and the
+            error propagates; a cached entry that fails it is ignored.
+
+    Returns:
+        The response content
+    """
+    timer = CallTimer(agent, model)
+    cache = get_llm_cache()
+    key = cache_key(model, messages, response_format, temperature)
+    cached = cache.get(key, bypass=bypass_cache)
+    if cached is not None and validate is not None:
+        try:
+            validate(cached)
+        except Exception as e:
+            logger.warning(f"Ignoring cached {model} response that fails validation: {e}")
+            cached = None
+    if cached is not None:
+        logger.debug(f"LLM cache hit for {model}")
+        timer.record(cache_hit=True)
+        return cached
+
+    kwargs: Dict[str, Any] = {"model": model, "messages": messages}
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    client = get_openai_client()
+    timer.sent()
+    try:
+        response = get_resilient_caller().call(
+            lambda: client.chat.completions.create(**kwargs), key=model, max_attempts=max_attempts,
+            on_discarded=timer.discard
+        )
+    except Exception as e:
+        timer.record(error=e)
+        raise
+    timer.record(usage=getattr(response, "usage", None))
+    content = response.choices[0].message.content
+    if validate is not None:
+        validate(content)
+    cache.put(key, model, content)
+    return content
+
+
+def stream_chat_completion_to_file(
+    messages: List[Dict[str, Any]],
+    path: Union[str, Path],
+    model: str = DEFAULT_MODEL,
+    temperature: Optional[float] = None,
+    bypass_cache: Optional[bool] = None,
+    on_line: Optional[Callable[[str], None]] = None,
+    agent: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_attempts: Optional[int] = None,
+) -> Path:
+    """Stream a chat completion into ``path``.
+
+    Tokens are appended to a ``.partial`` file next to ``path`` as they
+    arrive and the file is renamed over ``path`` once the stream ends, so an existing file is
+    only replaced by a complete response. The response is not accumulated
+    in memory; it is read back from disk once to store it in the cache.
+
+    Args:
+        messages: Chat messages
+        path: Destination file
+        model: Model name
+        temperature: Sampling temperature (None for the API default)
+        bypass_cache: As for ``chat_completion``
+        on_line: Called with each completed line, for progress reporting
+        agent: Agent name for usage accounting (defaults to llm_context)
+        timeout: Per-request timeout in seconds (None for the client default)
+        max_attempts: Override the retry policy's attempts for opening the stream
+
+    Returns:
+        The destination path
+    """
+    timer = CallTimer(agent, model, streamed=True)
+    cache = get_llm_cache()
+    key = cache_key(model, messages, None, temperature)
+    cached = cache.get(key, bypass=bypass_cache)
+    usage = None
+
+    def deltas(stream):
+        nonlocal usage
+        for chunk in stream:
+            # The final chunk carries the token usage (and no choices)
+            usage = getattr(chunk, "usage", None) or usage
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                timer.first_token()
+                yield text
+
+    try:
+        with AtomicStreamWriter(path) as writer:
+            if cached is not None:
+                logger.debug(f"LLM cache hit for {model}")
+                chunks = iter([cached])
+            else:
+                kwargs: Dict[str, Any] = {
+                    "model": model,
+                    "messages": messages,
+                    "stream": True,
+                    "stream_options": {"include_usage": True},
+                }
+                if temperature is not None:
+                    kwargs["temperature"] = temperature
+                if timeout is not None:
+                    kwargs["timeout"] = timeout
+                client = get_openai_client()
+                timer.sent()
+                # Retried until the stream opens; a stream that breaks off mid-way fails the call
+                stream = get_resilient_caller().call(
+                    lambda: client.chat.completions.create(**kwargs), key=f"{model}:stream", hedge=False,
+                    max_attempts=max_attempts, on_discarded=timer.discard
+                )
+                chunks = deltas(stream)
+            for text in chunks:
+                for line in writer.write(text):
+                    if on_line:
+                        on_line(line)
+            tail = writer.finish()
+            if tail is not None and on_line:
+                on_line(tail)
+    except Exception as e:
+        timer.record(error=e)
+        raise
+
+    timer.record(usage=usage, cache_hit=cached is not None)
+    if cached is None:
+        cache.put(key, model, writer.path.read_text(encoding="utf-8"))
+    return writer.path
+
+
+def embed_texts(texts: List[str], model: str = DEFAULT_EMBEDDING_MODEL) -> List[List[float]]:
+    """Embed a batch of texts with the shared client (one API request)."""
+    client = get_openai_client()
+    response = get_resilient_caller().call(lambda: client.embeddings.create(model=model, input=texts), key=model)
+    return [item.embedding for item in response.data]
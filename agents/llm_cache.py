@@ -0,0 +1,182 @@
+"""Disk-backed cache of LLM chat completion responses.
+
+The intent parser, rules generator and PRD agent send deterministic,
+schema-driven prompts, and test and regression runs repeat the same inputs
+constantly. Responses are stored in a small SQLite file keyed by a hash of
+model, messages, response_format and temperature, so a replayed request
+costs no API time. When the file grows past its size budget, the least
+recently used entries are evicted.
+
+Environment:
+    LLM_CACHE_PATH      SQLite file (default: .cache/llm_responses.sqlite)
+    LLM_CACHE_MAX_MB    Size budget in MB (default: 256)
+    LLM_CACHE_BYPASS    "1" to skip lookups (fresh responses are still stored)
+    LLM_CACHE_DISABLED  "1" to neither read nor write the cache
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(".cache") / "llm_responses.sqlite"
+DEFAULT_MAX_MB = 256
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    response_format: Optional[Dict[str, Any]] = None,
+    temperature: Optional[float] = None,
+) -> str:
+    """Stable hash of everything that determines a completion."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "response_format": response_format,
+            "temperature": temperature,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with LRU eviction by total size."""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+        bypass: bool = False,
+        enabled: bool = True,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH,
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            bypass=_env_flag("LLM_CACHE_BYPASS"),
+            enabled=not _env_flag("LLM_CACHE_DISABLED"),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, content TEXT,"
+                " size INTEGER, created_at REAL, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str, bypass: Optional[bool] = None) -> Optional[str]:
+        """Cached content for ``key``, or None on a miss (or when bypassed)."""
+        if not self.enabled or (self.bypass if bypass is None else bypass):
+            return None
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def put(self, key: str, model: str, content: str) -> None:
+        """Store a response, then evict least recently used entries over budget."""
+        if not self.enabled or content is None:
+            return
+        size = len(content.encode("utf-8"))
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, content, size, now, now),
+                )
+                self.writes += 1
+                self._evict(conn)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the cache's current size."""
+        lookups = self.hits + self.misses
+        entries, size = 0, 0
+        if self.enabled and self.path.exists():
+            try:
+                with self._lock:
+                    entries, size = self._connection().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+            except sqlite3.Error:
+                pass
+        return {
+            "enabled": self.enabled,
+            "bypass": self.bypass,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get or create the process-wide LLM response cache."""
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache.from_env()
+    return _cache
@@ -0,0 +1,321 @@
+"""Retries and request hedging for LLM API calls.
+
+Retryable failures (rate limits, timeouts, connection errors, 5xx) are
+retried with full-jitter exponential backoff. When the server sends
+``Retry-After`` (or ``retry-after-ms``), that delay is used instead.
+
+Hedging is optional. If a call is still running after the recent p95
+latency for its model, one duplicate request is sent and whichever answers
+first wins. The hedge budget caps duplicates at a fraction of all calls, so
+tail latency drops without unbounded extra cost.
+
+Requests whose outcome is not returned (failed attempts that are retried,
+losing hedge duplicates) still cost tokens; callers that account for usage
+pass ``on_discarded`` to hear about them.
+
+Environment:
+    LLM_RETRY_ATTEMPTS      Attempts per call, including the first (default: 4)
+    LLM_RETRY_BASE_DELAY    Backoff base in seconds (default: 0.5)
+    LLM_RETRY_MAX_DELAY     Cap for a single backoff in seconds (default: 30)
+    LLM_HEDGE               "1" to enable hedging
+    LLM_HEDGE_PERCENTILE    Latency percentile that triggers a hedge (default: 95)
+    LLM_HEDGE_MIN_DELAY     Never hedge earlier than this, in seconds (default: 1)
+    LLM_HEDGE_MAX_RATIO     Max share of calls that may be hedged (default: 0.1)
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Called with (result, error) for a request whose outcome the caller never sees
+DiscardCallback = Callable[[Any, Optional[BaseException]], None]
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an API error is transient (checked without importing openai)."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    return type(exc).__name__ in RETRYABLE_ERROR_NAMES or isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Server-requested delay from the error's response headers, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=int(os.getenv("LLM_RETRY_ATTEMPTS", "4")),
+            base_delay=_env_float("LLM_RETRY_BASE_DELAY", 0.5),
+            max_delay=_env_float("LLM_RETRY_MAX_DELAY", 30.0),
+        )
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+@dataclass
+class HedgePolicy:
+    """When to send a duplicate request for a slow call."""
+    enabled: bool = False
+    percentile: float = 95.0
+    min_delay: float = 1.0
+    max_ratio: float = 0.1
+    min_samples: int = 20
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        return cls(
+            enabled=os.getenv("LLM_HEDGE", "").lower() in ("1", "true", "yes"),
+            percentile=_env_float("LLM_HEDGE_PERCENTILE", 95.0),
+            min_delay=_env_float("LLM_HEDGE_MIN_DELAY", 1.0),
+            max_ratio=_env_float("LLM_HEDGE_MAX_RATIO", 0.1),
+        )
+
+
+class LatencyWindow:
+    """Recent successful call latencies for one key (e.g. a model)."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class ResilientCaller:
+    """Runs API calls with retries and, optionally, hedging."""
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        hedge: Optional[HedgePolicy] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        max_workers: int = 16,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.hedge = hedge or HedgePolicy()
+        self.sleep = sleep
+        self.max_workers = max_workers
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "ResilientCaller":
+        return cls(retry=RetryPolicy.from_env(), hedge=HedgePolicy.from_env())
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        key: str = "default",
+        hedge: bool = True,
+        max_attempts: Optional[int] = None,
+        on_discarded: Optional[DiscardCallback] = None,
+    ) -> T:
+        """Call ``fn`` until it succeeds, a non-retryable error occurs, or attempts run out.
+
+        Args:
+            fn: The API call
+            key: Latency bucket, usually the model name
+            hedge: Allow a duplicate request when hedging is enabled (pass
+                False for calls whose losing duplicate cannot be discarded,
+                such as opened streams)
+            max_attempts: Override the policy's attempts, e.g. 1 when the
+                caller has a fallback of its own
+            on_discarded: Called for each failed attempt that is retried and
+                each losing hedge duplicate (once it finishes)
+        """
+        max_attempts = max(1, max_attempts or self.retry.max_attempts)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return self._attempt(fn, key, hedge, on_discarded)
+            except Exception as e:
+                if attempt >= max_attempts or not is_retryable(e):
+                    raise
+                self._discard(on_discarded, None, e)
+                delay = self.retry.delay(attempt, e)
+                with self._lock:
+                    self.retries += 1
+                logger.warning(
+                    f"LLM call for {key} failed ({type(e).__name__}: {e}); "
+                    f"retry {attempt}/{max_attempts - 1} in {delay:.2f}s"
+                )
+                self.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def _window(self, key: str) -> LatencyWindow:
+        # Callers hold self._lock
+        return self._latency.setdefault(key, LatencyWindow())
+
+    def _timed(self, fn: Callable[[], T], key: str) -> T:
+        start = time.perf_counter()
+        result = fn()
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._window(key).record(latency)
+        return result
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Seconds after which a hedge is sent, or None while it may not be."""
+        if not self.hedge.enabled:
+            return None
+        with self._lock:
+            window = self._window(key)
+            if len(window) < self.hedge.min_samples or self.hedges >= self.calls * self.hedge.max_ratio:
+                return None
+            return max(self.hedge.min_delay, window.percentile(self.hedge.percentile))
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    @staticmethod
+    def _discard(on_discarded: Optional[DiscardCallback], result: Any, error: Optional[BaseException]) -> None:
+        if on_discarded is None:
+            return
+        try:
+            on_discarded(result, error)
+        except Exception as e:
+            logger.warning(f"Discarded LLM call callback failed: {e}")
+
+    def _discard_when_done(self, future: Any, on_discarded: Optional[DiscardCallback]) -> None:
+        def report(done: Any) -> None:
+            error = done.exception()
+            self._discard(on_discarded, None if error else done.result(), error)
+        future.add_done_callback(report)
+
+    def _attempt(
+        self,
+        fn: Callable[[], T],
+        key: str,
+        hedge: bool,
+        on_discarded: Optional[DiscardCallback] = None,
+    ) -> T:
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay(key) if hedge else None
+        if delay is None:
+            return self._timed(fn, key)
+
+        pool = self._executor()
+        primary = pool.submit(self._timed, fn, key)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            # The budget may have been used up by concurrent calls meanwhile
+            if self.hedges >= self.calls * self.hedge.max_ratio:
+                duplicate = None
+            else:
+                self.hedges += 1
+                duplicate = pool.submit(self._timed, fn, key)
+        if duplicate is None:
+            return primary.result()
+        logger.info(f"Hedging LLM call for {key} after {delay:.2f}s")
+
+        pending = {primary, duplicate}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is duplicate:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    # The slower duplicate finishes in the background; its result is dropped
+                    self._discard_when_done(primary if future is duplicate else duplicate, on_discarded)
+                    return future.result()
+        self._discard_when_done(duplicate, on_discarded)
+        return primary.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process plus per-key hedge thresholds."""
+        with self._lock:
+            latency = {
+                key: {"samples": len(window), f"p{self.hedge.percentile:g}_s": window.percentile(self.hedge.percentile)}
+                for key, window in self._latency.items()
+            }
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedging_enabled": self.hedge.enabled,
+                "latency": latency,
+            }
+
+
+_caller: Optional[ResilientCaller] = None
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """Get or create the process-wide resilient caller."""
+    global _caller
+    if _caller is None:
+        _caller = ResilientCaller.from_env()
+    return _caller
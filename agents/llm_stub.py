@@ -0,0 +1,361 @@
+"""Local OpenAI-compatible stub server for load tests and benchmarks.
+
+Serves ``/v1/chat/completions`` (plain, streamed and JSON mode),
+``/v1/embeddings`` and ``/v1/models`` with deterministic content. The same
+request always gets the same response, whatever the seed or timing.
+
+Latency (time to first token, for streams) and failures are simulated from
+a random generator per request, seeded by the config seed, the request body
+and how many times that body was seen before. A request's simulated latency
+and errors therefore do not depend on the order in which concurrent requests
+arrive, so a benchmark replays the same way on every run. Repeats of a
+request (e.g. retries) each get their own draw.
+
+Point the agents at it with ``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``
+(any ``OPENAI_API_KEY`` value is accepted). See scripts/run_llm_stub.py.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "system user data service request response model agent cache queue token "
+    "latency schema feature module endpoint storage index query update deploy "
+    "monitor test review release config client server stream batch retry"
+).split()
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+
+
+@dataclass
+class StubConfig:
+    """How the stub behaves; all times in milliseconds."""
+    latency_ms: float = 200.0
+    latency_distribution: str = "lognormal"
+    latency_sigma: float = 0.5
+    ttft_ms: float = 100.0
+    token_ms: float = 5.0
+    completion_tokens: int = 200
+    embedding_dim: int = 1536
+    error_rate: float = 0.0
+    error_status: int = 429
+    retry_after_s: float = 1.0
+    seed: int = 0
+    models: List[str] = field(default_factory=lambda: [
+        "gpt-4o-mini", "gpt-4o", "gpt-4-turbo", "text-embedding-3-small",
+    ])
+
+
+def _digest(*parts: Any) -> bytes:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).digest()
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content") or "")
+    return ""
+
+
+def completion_text(model: str, messages: List[Dict[str, Any]], json_mode: bool, tokens: int) -> str:
+    """Deterministic response content for a chat request."""
+    digest = _digest(model, messages)
+    if json_mode:
+        return json.dumps({
+            "project_name": f"stub-{digest.hex()[:8]}",
+            "project_description": _last_user_text(messages)[:200],
+            "required_features": [],
+            "stub": True,
+        })
+    rng = random.Random(digest)
+    lines = ["# Stub response", ""]
+    words = 0
+    section = 0
+    while words < tokens:
+        section += 1
+        sentence = " ".join(rng.choice(WORDS) for _ in range(12))
+        lines += [f"## Section {section}", sentence.capitalize() + ".", ""]
+        words += 16
+    return "\n".join(lines)
+
+
+def embedding_vector(model: str, text: str, dim: int) -> np.ndarray:
+    """Deterministic unit vector for ``text``."""
+    seed = int.from_bytes(_digest(model, text)[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class StubLLM:
+    """Request handling, independent of the web framework (easy to test)."""
+
+    def __init__(self, config: Optional[StubConfig] = None):
+        self.config = config or StubConfig()
+        if self.config.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {LATENCY_DISTRIBUTIONS}")
+        self._lock = threading.Lock()
+        # Times each request digest was seen, so repeats get their own draw
+        self._occurrences: Dict[str, int] = {}
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+
+    def request_rng(self, endpoint: str, body: Dict[str, Any]) -> random.Random:
+        """Random generator for one request, independent of arrival order."""
+        key = _digest(endpoint, body).hex()
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+        return random.Random(_digest(self.config.seed, key, occurrence))
+
+    def sample_latency_s(self, rng: random.Random, median_ms: Optional[float] = None) -> float:
+        """Simulated latency from the configured distribution.
+
+        Args:
+            rng: The request's generator (see ``request_rng``)
+            median_ms: Median to sample around (default: ``latency_ms``;
+                streams pass ``ttft_ms``)
+        """
+        c = self.config
+        median = c.latency_ms if median_ms is None else median_ms
+        if c.latency_distribution == "constant":
+            ms = median
+        elif c.latency_distribution == "uniform":
+            ms = rng.uniform(median * (1 - c.latency_sigma), median * (1 + c.latency_sigma))
+        else:
+            # The median is the lognormal's scale
+            ms = median * rng.lognormvariate(0, c.latency_sigma)
+        return max(ms, 0.0) / 1000
+
+    def injected_error(self, rng: random.Random) -> Optional[Tuple[int, Dict[str, Any], Dict[str, str]]]:
+        """(status, body, headers) for a simulated failure of the request behind ``rng``, or None."""
+        if rng.random() >= self.config.error_rate:
+            return None
+        with self._lock:
+            self.errors += 1
+        status = self.config.error_status
+        headers = {"retry-after": f"{self.config.retry_after_s:g}"} if status == 429 else {}
+        body = {"error": {"message": f"Simulated error {status}", "type": "stub_error", "code": status}}
+        return status, body, headers
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": dict(self.requests), "errors": self.errors}
+
+    def chat(self, body: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Non-streamed chat completion response and its content."""
+        self._count("chat")
+        model = body.get("model", "gpt-4o-mini")
+        messages = body.get("messages", [])
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        content = completion_text(model, messages, json_mode, self.config.completion_tokens)
+        response = {
+            "id": f"chatcmpl-{_digest(model, messages).hex()[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": self._usage(messages, content),
+        }
+        return response, content
+
+    def _usage(self, messages: List[Dict[str, Any]], content: str) -> Dict[str, Any]:
+        prompt = sum(_estimate_tokens(str(m.get("content") or "")) for m in messages)
+        completion = _estimate_tokens(content)
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+    async def chat_stream(self, body: Dict[str, Any], ttft_s: Optional[float] = None) -> AsyncIterator[bytes]:
+        """Server-sent events for a streamed chat completion.
+
+        Args:
+            body: The request body
+            ttft_s: Time to first token (default: ``ttft_ms``, unsampled)
+        """
+        response, content = self.chat(body)
+        base = {k: response[k] for k in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+
+        def event(payload: Dict[str, Any]) -> bytes:
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        await asyncio.sleep(self.config.ttft_ms / 1000 if ttft_s is None else ttft_s)
+        yield event({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+        pieces = content.split(" ")
+        for i, piece in enumerate(pieces):
+            text = piece if i == 0 else " " + piece
+            yield event({**base, "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]})
+            if self.config.token_ms:
+                await asyncio.sleep(self.config.token_ms / 1000)
+        yield event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield event({**base, "choices": [], "usage": response["usage"]})
+        yield b"data: [DONE]\n\n"
+
+    def embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Embeddings response (float lists or base64, as requested)."""
+        self._count("embeddings")
+        model = body.get("model", "text-embedding-3-small")
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dim = int(body.get("dimensions") or self.config.embedding_dim)
+        data = []
+        for i, text in enumerate(inputs):
+            vector = embedding_vector(model, str(text), dim)
+            if body.get("encoding_format") == "base64":
+                embedding: Any = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(_estimate_tokens(str(text)) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def models(self) -> Dict[str, Any]:
+        return {
+            "object": "list",
+            "data": [{"id": m, "object": "model", "created": 0, "owned_by": "stub"} for m in self.config.models],
+        }
+
+
+def create_app(stub: StubLLM):
+    """Starlette app serving the OpenAI-compatible routes of ``stub``."""
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    async def simulate(request: Request, endpoint: str):
+        """Parse the body and wait the simulated latency; returns (body, error response, ttft_s).
+
+        Streams start right away and wait their sampled time to first
+        token (``ttft_s``) before the first chunk instead.
+        """
+        body = await request.json()
+        rng = stub.request_rng(endpoint, body)
+        error = stub.injected_error(rng)
+        if error is not None:
+            await asyncio.sleep(stub.sample_latency_s(rng))
+            status, payload, headers = error
+            return body, JSONResponse(payload, status_code=status, headers=headers), None
+        if body.get("stream"):
+            return body, None, stub.sample_latency_s(rng, stub.config.ttft_ms)
+        await asyncio.sleep(stub.sample_latency_s(rng))
+        return body, None, None
+
+    async def chat_completions(request: Request):
+        body, error, ttft_s = await simulate(request, "chat")
+        if error is not None:
+            return error
+        if body.get("stream"):
+            return StreamingResponse(stub.chat_stream(body, ttft_s), media_type="text/event-stream")
+        return JSONResponse(stub.chat(body)[0])
+
+    async def embeddings(request: Request):
+        body, error, _ = await simulate(request, "embeddings")
+        if error is not None:
+            return error
+        return JSONResponse(stub.embeddings(body))
+
+    async def models(request: Request):
+        return JSONResponse(stub.models())
+
+    async def stats(request: Request):
+        return JSONResponse(stub.stats())
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/embeddings", embeddings, methods=["POST"]),
+        Route("/v1/models", models, methods=["GET"]),
+        Route("/stats", stats, methods=["GET"]),
+    ])
+
+
+class StubServer:
+    """Serve the stub from a background thread, e.g. inside a benchmark or test.
+
+    ``port=0`` picks a free port; ``base_url`` is set once started::
+
+        with StubServer(StubConfig(latency_ms=50)) as server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.stub = StubLLM(config)
+        self.host = host
+        self.port = port
+        self.base_url = ""
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StubServer":
+        import socket
+        import uvicorn
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        self.base_url = f"http://{self.host}:{self.port}/v1"
+        config = uvicorn.Config(create_app(self.stub), log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [sock]}, name="llm-stub", daemon=True
+        )
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("LLM stub server failed to start")
+            time.sleep(0.01)
+        logger.info(f"LLM stub listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def run(host: str = "127.0.0.1", port: int = 8900, config: Optional[StubConfig] = None) -> None:
+    """Serve the stub until interrupted."""
+    import uvicorn
+    logger.info(f"LLM stub listening on http://{host}:{port}/v1")
+    uvicorn.run(create_app(StubLLM(config)), host=host, port=port, log_level="warning")
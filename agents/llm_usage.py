@@ -0,0 +1,242 @@
+"""Token and latency accounting for LLM calls.
+
+Every completion sent through agents.llm (and the MCP PRD agent) produces an
+``LLMCallRecord`` with prompt, completion and provider-cached tokens, queue
+time, time to first token and total latency. Records are tagged with the
+calling agent, the model and the current run id. Failed attempts that were
+retried and losing hedge duplicates get their own record marked
+``discarded``, so the tokens they cost are counted too. Records are kept in a
+bounded in-memory window for aggregation and passed to listeners such as
+``RunLogger``, which writes them to the run log.
+
+The agent and run id come from explicit arguments or from context
+variables (``llm_context``), so nested helpers do not need to thread them
+through. Worker threads must copy the context (``contextvars.copy_context``)
+for the tags to follow them.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_current_agent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_agent", default=None)
+_current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_run_id", default=None)
+
+
+@contextmanager
+def llm_context(agent: Optional[str] = None, run_id: Optional[str] = None) -> Iterator[None]:
+    """Tag LLM calls made inside the block with an agent and/or run id."""
+    tokens = []
+    if agent is not None:
+        tokens.append((_current_agent, _current_agent.set(agent)))
+    if run_id is not None:
+        tokens.append((_current_run_id, _current_run_id.set(run_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def set_run_id(run_id: Optional[str]) -> None:
+    """Tag subsequent calls in this context with ``run_id`` (None clears it)."""
+    _current_run_id.set(run_id)
+
+
+def current_agent() -> Optional[str]:
+    return _current_agent.get()
+
+
+def current_run_id() -> Optional[str]:
+    return _current_run_id.get()
+
+
+def usage_counts(usage: Any) -> Tuple[int, int, int]:
+    """(prompt, completion, cached) tokens from an API usage object or dict."""
+    if usage is None:
+        return 0, 0, 0
+
+    def read(obj: Any, name: str) -> Any:
+        return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+    details = read(usage, "prompt_tokens_details")
+    cached = read(details, "cached_tokens") if details is not None else None
+    return int(read(usage, "prompt_tokens") or 0), int(read(usage, "completion_tokens") or 0), int(cached or 0)
+
+
+@dataclass
+class LLMCallRecord:
+    """One LLM call (or response cache hit)."""
+    agent: str
+    model: str
+    run_id: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    queue_ms: float = 0.0
+    ttft_ms: Optional[float] = None
+    latency_ms: float = 0.0
+    streamed: bool = False
+    cache_hit: bool = False
+    error: Optional[str] = None
+    # A retried failure or losing hedge duplicate; its response was not used
+    discarded: bool = False
+    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class CallTimer:
+    """Measures one call: ``sent()`` when the request goes out, ``first_token()`` on the first content."""
+
+    def __init__(self, agent: Optional[str], model: str, streamed: bool = False):
+        self.agent = agent or current_agent() or "unknown"
+        self.run_id = current_run_id()
+        self.model = model
+        self.streamed = streamed
+        self._start = time.perf_counter()
+        self._sent: Optional[float] = None
+        self._first: Optional[float] = None
+
+    def sent(self) -> None:
+        self._sent = time.perf_counter()
+
+    def first_token(self) -> None:
+        if self._first is None:
+            self._first = time.perf_counter()
+
+    def record(
+        self,
+        usage: Any = None,
+        cache_hit: bool = False,
+        error: Optional[BaseException] = None,
+        discarded: bool = False,
+    ) -> LLMCallRecord:
+        """Build the record and hand it to the process-wide tracker.
+
+        May be called more than once per timer: once per discarded request
+        (see ``discard``) and once for the call's outcome.
+        """
+        end = time.perf_counter()
+        sent = self._sent if self._sent is not None else end
+        prompt, completion, cached = usage_counts(usage)
+        first = self._first if self.streamed else (None if error else end)
+        record = LLMCallRecord(
+            agent=self.agent,
+            model=self.model,
+            run_id=self.run_id,
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            cached_tokens=cached,
+            queue_ms=round((sent - self._start) * 1000, 2),
+            ttft_ms=round((first - sent) * 1000, 2) if first is not None and not cache_hit else None,
+            latency_ms=round((end - sent) * 1000, 2),
+            streamed=self.streamed,
+            cache_hit=cache_hit,
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+            discarded=discarded,
+        )
+        get_usage_tracker().add(record)
+        return record
+
+    def discard(self, response: Any, error: Optional[BaseException]) -> None:
+        """Record a request whose outcome was not used (an ``on_discarded`` callback)."""
+        self.record(usage=getattr(response, "usage", None), error=error, discarded=True)
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 2)
+
+
+class UsageTracker:
+    """Keeps recent call records, aggregates them and notifies listeners."""
+
+    def __init__(self, max_records: int = 10000):
+        self._records: Deque[LLMCallRecord] = deque(maxlen=max_records)
+        self._listeners: List[Callable[[LLMCallRecord], None]] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: LLMCallRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                logger.warning(f"LLM usage listener failed: {e}")
+
+    def add_listener(self, listener: Callable[[LLMCallRecord], None]) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[LLMCallRecord], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def records(self, run_id: Optional[str] = None) -> List[LLMCallRecord]:
+        with self._lock:
+            return [r for r in self._records if run_id is None or r.run_id == run_id]
+
+    def summary(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Totals plus per agent/model groups, most tokens first.
+
+        Args:
+            run_id: Only aggregate calls from this run
+        """
+        groups: Dict[Tuple[str, str], List[LLMCallRecord]] = {}
+        records = self.records(run_id)
+        for record in records:
+            groups.setdefault((record.agent, record.model), []).append(record)
+
+        def aggregate(items: List[LLMCallRecord]) -> Dict[str, Any]:
+            api_calls = [r for r in items if not r.cache_hit]
+            return {
+                "calls": len(items),
+                "cache_hits": len(items) - len(api_calls),
+                "errors": sum(1 for r in items if r.error),
+                "discarded": sum(1 for r in items if r.discarded),
+                "prompt_tokens": sum(r.prompt_tokens for r in items),
+                "completion_tokens": sum(r.completion_tokens for r in items),
+                "cached_tokens": sum(r.cached_tokens for r in items),
+                "total_tokens": sum(r.total_tokens for r in items),
+                "queue_ms_p50": _percentile([r.queue_ms for r in api_calls], 50),
+                "ttft_ms_p50": _percentile([r.ttft_ms for r in api_calls if r.ttft_ms is not None], 50),
+                "latency_ms_p50": _percentile([r.latency_ms for r in api_calls], 50),
+                "latency_ms_p95": _percentile([r.latency_ms for r in api_calls], 95),
+                "latency_ms_total": round(sum(r.latency_ms for r in api_calls), 2),
+            }
+
+        by_group = [
+            {"agent": agent, "model": model, **aggregate(items)}
+            for (agent, model), items in groups.items()
+        ]
+        by_group.sort(key=lambda g: (g["total_tokens"], g["latency_ms_total"]), reverse=True)
+        return {"totals": aggregate(records), "by_agent_model": by_group}
+
+
+_tracker: Optional[UsageTracker] = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get or create the process-wide usage tracker."""
+    global _tracker
+    if _tracker is None:
+        _tracker = UsageTracker()
+    return _tracker
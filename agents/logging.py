@@ -5,6 +5,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from agents.llm_usage import LLMCallRecord, get_usage_tracker, set_run_id
+
 
 _logger = logging.getLogger(__name__)
 
@@ -18,9 +20,18 @@ class RunLogger:
         self.current_run: Optional[str] = None
 
     def start_run(self, run_id: str, metadata: Dict[str, Any]) -> None:
-        """Begin a new orchestrator run."""
+        """Begin a new orchestrator run.
+
+        LLM calls made from this context afterwards are tagged with
+        ``run_id`` and written to the run log as ``llm_call`` events.
+        """
         self.current_run = run_id
         self._write_event("run_start", {"run_id": run_id, "metadata": metadata})
+        set_run_id(run_id)
+        tracker = get_usage_tracker()
+        # A run started without ending the previous one must not log each call twice
+        tracker.remove_listener(self.log_llm_call)
+        tracker.add_listener(self.log_llm_call)
 
     def log_task(
         self,
@@ -41,10 +52,24 @@ class RunLogger:
             },
         )
 
+    def log_llm_call(self, record: LLMCallRecord) -> None:
+        """Log an LLM call's tokens and latency if it belongs to the current run."""
+        if self.current_run and record.run_id == self.current_run:
+            self._write_event("llm_call", record.to_dict())
+
+    def llm_usage(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Token and latency aggregates per agent and model for a run (default: current)."""
+        return get_usage_tracker().summary(run_id=run_id or self.current_run)
+
     def end_run(self, summary: Dict[str, Any]) -> None:
-        """End the current run."""
+        """End the current run; the summary gains the run's LLM usage aggregates."""
+        tracker = get_usage_tracker()
+        tracker.remove_listener(self.log_llm_call)
+        if self.current_run:
+            summary = {**summary, "llm_usage": tracker.summary(run_id=self.current_run)}
         self._write_event("run_end", {"summary": summary})
         self.current_run = None
+        set_run_id(None)
 
     def _write_event(self, event_type: str, data: Dict[str, Any]) -> None:
         """Write a structured event to the log."""
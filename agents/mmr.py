@@ -0,0 +1,80 @@
+"""Maximal marginal relevance (MMR) re-ranking for retrieval results.
+
+Near-duplicate documents (e.g. the same library docs ingested twice) tend to
+crowd the top of a pure similarity ranking. MMR greedily picks the candidate
+that is most similar to the query while being least similar to what has
+already been selected, so each returned slot carries new information.
+
+The defaults here are shared by both RAG stores (agents.rag_retrieval and
+mcp_codegen.rag.store). numpy is imported on first use, so importing the
+defaults stays cheap.
+"""
+from typing import TYPE_CHECKING, List, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_MMR_LAMBDA = 0.5
+DEFAULT_FETCH_K_MULTIPLIER = 4
+
+
+def _normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    """Return a copy of ``matrix`` with each row scaled to unit length."""
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def default_fetch_k(k: int) -> int:
+    """Number of candidates to over-fetch before MMR selects ``k``."""
+    return k * DEFAULT_FETCH_K_MULTIPLIER
+
+
+def maximal_marginal_relevance(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+) -> List[int]:
+    """Select a diverse subset of candidates using MMR.
+
+    Query/candidate and candidate/candidate cosine similarities are computed
+    once as batched matrix products; the greedy loop then only does vector
+    max/argmax updates.
+
+    Args:
+        query_embedding: Embedding of the query
+        embeddings: Candidate embeddings, one row per candidate
+        k: Number of candidates to select
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Indices into ``embeddings`` in selection order
+    """
+    if k <= 0 or len(embeddings) == 0:
+        return []
+    import numpy as np
+
+    candidates = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+    k = min(k, candidates.shape[0])
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything already selected
+    max_sim_to_selected = similarity[selected[0]].copy()
+    available = np.ones(candidates.shape[0], dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_sim_to_selected
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_sim_to_selected, similarity[best], out=max_sim_to_selected)
+
+    return selected
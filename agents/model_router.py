@@ -0,0 +1,325 @@
+"""Cost- and size-aware model routing for agent LLM calls.
+
+Call sites name a task type instead of hardcoding a model. The router
+picks a model tier from three inputs:
+
+- the task's profile: a preferred tier (today's model) and the smallest
+  tier that is good enough for it
+- the input size: small inputs drop to the task's minimum tier (unless the
+  task writes long outputs, which a short prompt says nothing about), and
+  inputs too large for a tier's context move up
+- an optional latency budget: tiers expected to be slower than the budget
+  are skipped, down to the task's minimum tier
+
+Expected latency is the observed p50 over a rolling window of the model's
+recent API calls (fed by the agents.llm_usage tracker) once there are
+enough samples, else the tier's configured default. If the
+chosen model times out or fails with a transient error (see
+agents.llm_resilience.is_retryable), the call falls back to the next tier;
+other errors, such as a rejected request or a bad API key, are raised.
+Every decision is logged with the preferred model and the expected latency
+saved. ``stats()`` sums those estimates for comparison with the recorded
+per-model latencies.
+
+Environment:
+    LLM_ROUTING           "0" to always use each task's preferred tier
+    LLM_MODEL_FAST        Model for the fast tier (default: gpt-4o-mini)
+    LLM_MODEL_STANDARD    Model for the standard tier (default: gpt-4o)
+    LLM_MODEL_PREMIUM     Model for the premium tier (default: gpt-4-turbo)
+"""
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar, Union
+
+from agents.llm_resilience import LatencyWindow, is_retryable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Inputs up to this many (estimated) tokens are routed to the task's minimum tier
+SMALL_INPUT_TOKENS = 1500
+# Observed latencies replace the configured default after this many calls
+MIN_LATENCY_SAMPLES = 5
+
+
+@dataclass
+class ModelTier:
+    """A model and what to expect from it."""
+    name: str
+    model: str
+    max_input_tokens: int
+    expected_latency_s: float
+    timeout_s: float
+
+
+@dataclass
+class TaskProfile:
+    """Preferred and minimum acceptable tier for a task type."""
+    preferred: str
+    minimum: str
+    # Output is long however short the prompt (a one-line idea becomes a
+    # multi-page PRD), so a small input does not lower the tier
+    long_output: bool = False
+
+
+DEFAULT_TIERS = [
+    ModelTier("fast", os.getenv("LLM_MODEL_FAST", "gpt-4o-mini"), 128000, 4.0, 30.0),
+    ModelTier("standard", os.getenv("LLM_MODEL_STANDARD", "gpt-4o"), 128000, 10.0, 60.0),
+    ModelTier("premium", os.getenv("LLM_MODEL_PREMIUM", "gpt-4-turbo"), 128000, 25.0, 120.0),
+]
+
+# Preferred tiers match the models these call sites used before routing
+TASK_PROFILES: Dict[str, TaskProfile] = {
+    "intent": TaskProfile(preferred="fast", minimum="fast"),
+    "rules": TaskProfile(preferred="fast", minimum="fast"),
+    "task_list": TaskProfile(preferred="fast", minimum="fast"),
+    "prd": TaskProfile(preferred="premium", minimum="standard", long_output=True),
+    "parse": TaskProfile(preferred="premium", minimum="fast"),
+    "code": TaskProfile(preferred="premium", minimum="standard", long_output=True),
+    "debug": TaskProfile(preferred="premium", minimum="standard"),
+}
+DEFAULT_PROFILE = TaskProfile(preferred="standard", minimum="fast")
+
+
+def estimate_tokens(content: Union[str, Sequence[Dict[str, Any]]]) -> int:
+    """Rough token count (about 4 characters per token) of a text or chat messages."""
+    if isinstance(content, str):
+        chars = len(content)
+    else:
+        chars = sum(len(str(message.get("content") or "")) for message in content)
+    return chars // 4 + 1
+
+
+@dataclass
+class RoutingDecision:
+    """The chosen model plus the fallback order."""
+    task: str
+    model: str
+    tier: str
+    preferred_model: str
+    chain: List[str]
+    reason: str
+    input_tokens: int
+    expected_latency_s: float
+    preferred_latency_s: float
+    latency_budget_s: Optional[float] = None
+    timeouts: Dict[str, float] = field(default_factory=dict)
+    fallbacks: List[str] = field(default_factory=list)
+
+    def call_options(self, model: str) -> Dict[str, Any]:
+        """``timeout`` and ``max_attempts`` for a call on ``model``.
+
+        Models with a fallback get one attempt and their tier's timeout, so
+        a slow or failing model hands over quickly. The last model in the
+        chain keeps the client defaults and full retries.
+        """
+        if model == self.chain[-1]:
+            return {"timeout": None, "max_attempts": None}
+        return {"timeout": self.timeouts.get(model), "max_attempts": 1}
+
+
+class ModelRouter:
+    """Chooses models per call and runs calls with tier fallback."""
+
+    def __init__(
+        self,
+        tiers: Optional[List[ModelTier]] = None,
+        profiles: Optional[Dict[str, TaskProfile]] = None,
+        enabled: bool = True,
+        observed_latency: Optional[Callable[[str], Optional[float]]] = None,
+    ):
+        self.tiers = tiers or DEFAULT_TIERS
+        self.profiles = profiles or TASK_PROFILES
+        self.enabled = enabled
+        self._observed_latency = observed_latency or ObservedLatency()
+        self._lock = threading.Lock()
+        self._decisions: Dict[str, Dict[str, int]] = {}
+        self._fallbacks = 0
+        self._latency_saved_s = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        return cls(enabled=os.getenv("LLM_ROUTING", "1").lower() not in ("0", "false", "no"))
+
+    def _index(self, tier_name: str) -> int:
+        for i, tier in enumerate(self.tiers):
+            if tier.name == tier_name:
+                return i
+        raise ValueError(f"Unknown model tier: {tier_name}")
+
+    def expected_latency(self, tier: ModelTier) -> float:
+        observed = self._observed_latency(tier.model)
+        return observed if observed is not None else tier.expected_latency_s
+
+    def route(
+        self,
+        task: str,
+        content: Union[str, Sequence[Dict[str, Any]]],
+        latency_budget_s: Optional[float] = None,
+        record: bool = True,
+    ) -> RoutingDecision:
+        """Choose a model for ``task`` given its input (text or chat messages).
+
+        Args:
+            task: Task type, e.g. "intent", "rules", "prd"
+            content: Prompt text or messages, used to estimate input size
+            latency_budget_s: Prefer tiers expected to answer within this time
+            record: Count the decision in ``stats()`` and log it at info level;
+                False for bulk planning such as batch jobs
+        """
+        profile = self.profiles.get(task, DEFAULT_PROFILE)
+        preferred, minimum = self._index(profile.preferred), self._index(profile.minimum)
+        input_tokens = estimate_tokens(content)
+        index, reasons = preferred, []
+
+        if self.enabled:
+            if input_tokens <= SMALL_INPUT_TOKENS and minimum < index and not profile.long_output:
+                index = minimum
+                reasons.append(f"small input (~{input_tokens} tokens)")
+            if latency_budget_s is not None:
+                while index > minimum and self.expected_latency(self.tiers[index]) > latency_budget_s:
+                    index -= 1
+                    reasons.append(f"latency budget {latency_budget_s:g}s")
+            while index < len(self.tiers) - 1 and input_tokens > self.tiers[index].max_input_tokens:
+                index += 1
+                reasons.append(f"input too large (~{input_tokens} tokens)")
+
+        chosen = self.tiers[index]
+        chain = [chosen.model] + [t.model for t in self.tiers[index + 1:]]
+        chain += [t.model for t in reversed(self.tiers[minimum:index])]
+        if not self.enabled:
+            chain = [chosen.model]
+        decision = RoutingDecision(
+            task=task,
+            model=chosen.model,
+            tier=chosen.name,
+            preferred_model=self.tiers[preferred].model,
+            chain=list(dict.fromkeys(chain)),
+            reason=", ".join(dict.fromkeys(reasons)) or "task default",
+            input_tokens=input_tokens,
+            expected_latency_s=self.expected_latency(chosen),
+            preferred_latency_s=self.expected_latency(self.tiers[preferred]),
+            latency_budget_s=latency_budget_s,
+            timeouts={t.model: t.timeout_s for t in self.tiers},
+        )
+
+        if record:
+            with self._lock:
+                per_task = self._decisions.setdefault(task, {})
+                per_task[decision.model] = per_task.get(decision.model, 0) + 1
+                self._latency_saved_s += decision.preferred_latency_s - decision.expected_latency_s
+        logger.log(
+            logging.INFO if record else logging.DEBUG,
+            f"Routing {task} to {decision.model} ({decision.tier}; {decision.reason}); "
+            f"preferred {decision.preferred_model}, expected {decision.expected_latency_s:.1f}s "
+            f"vs {decision.preferred_latency_s:.1f}s"
+        )
+        return decision
+
+    def _fell_back(self, decision: RoutingDecision, model: str, next_model: str, error: Exception) -> None:
+        decision.fallbacks.append(model)
+        with self._lock:
+            self._fallbacks += 1
+        logger.warning(
+            f"{decision.task} call on {model} failed ({type(error).__name__}: {error}); "
+            f"falling back to {next_model}"
+        )
+
+    def call_with_fallback(self, decision: RoutingDecision, call: Callable[[str], T]) -> T:
+        """Run ``call(model)`` down the decision's chain until one succeeds.
+
+        Only transient errors fall back; anything else (a 400, 401, or a
+        local error) would fail on every model and is raised at once.
+        """
+        for i, model in enumerate(decision.chain):
+            try:
+                return call(model)
+            except Exception as e:
+                if i == len(decision.chain) - 1 or not is_retryable(e):
+                    raise
+                self._fell_back(decision, model, decision.chain[i + 1], e)
+        raise AssertionError("unreachable")
+
+    async def acall_with_fallback(self, decision: RoutingDecision, call: Callable[[str], Awaitable[T]]) -> T:
+        """Async variant of ``call_with_fallback``."""
+        for i, model in enumerate(decision.chain):
+            try:
+                return await call(model)
+            except Exception as e:
+                if i == len(decision.chain) - 1 or not is_retryable(e):
+                    raise
+                self._fell_back(decision, model, decision.chain[i + 1], e)
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, Any]:
+        """Decisions per task and model, fallbacks and estimated latency saved."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "decisions": {task: dict(models) for task, models in self._decisions.items()},
+                "fallbacks": self._fallbacks,
+                "estimated_latency_saved_s": round(self._latency_saved_s, 2),
+            }
+
+
+class ObservedLatency:
+    """p50 latency per model over its recent API calls.
+
+    Subscribes to the usage tracker on first use and keeps a LatencyWindow
+    per model, so routing never scans the tracker's full record history.
+    Cache hits and failed calls are not counted.
+    """
+
+    def __init__(self, window_size: int = 200):
+        self.window_size = window_size
+        self._windows: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._subscribe_lock = threading.Lock()
+        self._tracker = None
+
+    def record(self, record: Any) -> None:
+        if record.cache_hit or record.error:
+            return
+        with self._lock:
+            window = self._windows.get(record.model)
+            if window is None:
+                window = self._windows[record.model] = LatencyWindow(self.window_size)
+            window.record(record.latency_ms / 1000)
+
+    def _subscribe(self) -> None:
+        from agents.llm_usage import get_usage_tracker
+        tracker = get_usage_tracker()
+        if tracker is self._tracker:
+            return
+        with self._subscribe_lock:
+            if tracker is self._tracker:
+                return
+            with self._lock:
+                self._windows = {}
+            # Calls made before the first route still count
+            for record in tracker.records()[-self.window_size:]:
+                self.record(record)
+            tracker.add_listener(self.record)
+            self._tracker = tracker
+
+    def __call__(self, model: str) -> Optional[float]:
+        self._subscribe()
+        with self._lock:
+            window = self._windows.get(model)
+            if window is None or len(window) < MIN_LATENCY_SAMPLES:
+                return None
+            return window.percentile(50)
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get or create the process-wide model router."""
+    global _router
+    if _router is None:
+        _router = ModelRouter.from_env()
+    return _router
@@ -0,0 +1,88 @@
+"""Registry of the Markdown prompt templates under ``agents/prompts/``.
+
+Each template is read once and each rendering is cached, so repeated calls
+return the identical string instead of rebuilding it. Keeping system
+prompts byte-for-byte stable between requests lets the provider's prompt
+cache reuse the shared prefix. Templates use ``$name`` placeholders
+(``string.Template``), which leaves the ``{...}`` of JSON examples alone.
+
+Edited templates are picked up automatically: every lookup compares the
+file's modification time and size with the loaded copy (one ``stat``).
+Set PROMPT_AUTO_RELOAD=0 to load each template only once.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_DIR = Path(__file__).parent / "prompts"
+
+
+class PromptRegistry:
+    """Loads, renders and caches prompt templates by name (file stem)."""
+
+    def __init__(self, prompt_dir: Union[str, Path] = DEFAULT_PROMPT_DIR, auto_reload: bool = True):
+        self.prompt_dir = Path(prompt_dir)
+        self.auto_reload = auto_reload
+        self.reloads = 0
+        self._lock = threading.Lock()
+        # name -> ((mtime_ns, size), text)
+        self._templates: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        # (name, sorted values) -> rendered text
+        self._rendered: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], str] = {}
+
+    def names(self) -> List[str]:
+        """Names of all templates in the prompt directory."""
+        return sorted(path.stem for path in self.prompt_dir.glob("*.md"))
+
+    def _template(self, name: str) -> str:
+        loaded = self._templates.get(name)
+        if loaded is not None and not self.auto_reload:
+            return loaded[1]
+        path = self.prompt_dir / f"{name}.md"
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+
+        # Normalised line endings keep the bytes identical across checkouts
+        text = path.read_text(encoding="utf-8").replace("\r\n", "\n").strip() + "\n"
+        self._templates[name] = (version, text)
+        self._rendered = {key: value for key, value in self._rendered.items() if key[0] != name}
+        if loaded is not None:
+            self.reloads += 1
+            logger.info(f"Reloaded prompt template {path}")
+        return text
+
+    def get(self, name: str) -> str:
+        """Raw text of a template."""
+        with self._lock:
+            return self._template(name)
+
+    def render(self, name: str, **values: str) -> str:
+        """Template with ``$placeholders`` substituted; unknown placeholders are kept."""
+        key = (name, tuple(sorted(values.items())))
+        with self._lock:
+            template = self._template(name)
+            rendered = self._rendered.get(key)
+            if rendered is None:
+                rendered = Template(template).safe_substitute(values)
+                self._rendered[key] = rendered
+            return rendered
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get or create the process-wide prompt registry."""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry(
+            auto_reload=os.getenv("PROMPT_AUTO_RELOAD", "1").lower() not in ("0", "false", "no")
+        )
+    return _registry
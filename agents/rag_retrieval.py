@@ -1,9 +1,18 @@
 """RAG retrieval utility for domain-specific knowledge base access."""
+import importlib.util
 import os
 import logging
+import threading
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from agents.executors import RAG_READ_CONCURRENCY, RAG_WRITE_CONCURRENCY, ReadWriteExecutor
+from agents.kb_maintenance import DEFAULT_DELETE_BATCH_SIZE
+from agents.kb_stats import KBStatsIndex
+from agents.llm import get_openai_base_url
+from agents.mmr import DEFAULT_MMR_LAMBDA
+
 # Load environment variables from .env file if available
 try:
     from dotenv import load_dotenv
@@ -12,14 +21,9 @@ except ImportError:
     # python-dotenv not installed, skip .env loading
     pass
 
-try:
-    import chromadb
-    from chromadb.utils import embedding_functions
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
-    chromadb = None
-    embedding_functions = None
+# chromadb is imported on first initialize(); checking for it here keeps
+# importing this module (and every subagent that uses it) cheap.
+CHROMADB_AVAILABLE = importlib.util.find_spec("chromadb") is not None
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +49,8 @@ class DomainScopedRAGStore:
         self,
         chroma_dir: Optional[Path] = None,
         collection_name: str = DEFAULT_COLLECTION,
-        embedding_model: str = DEFAULT_EMBEDDING_MODEL
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+        snapshot_path: Optional[Path] = None
     ):
         """Initialize domain-scoped RAG store.
         
@@ -53,11 +58,24 @@ class DomainScopedRAGStore:
             chroma_dir: Directory for ChromaDB persistence
             collection_name: Name of the ChromaDB collection
             embedding_model: OpenAI embedding model name
+            snapshot_path: Serve retrieval from a read-only memory-mapped
+                snapshot (see agents.vector_snapshot) instead of opening
+                ChromaDB. Defaults to the RAG_SNAPSHOT_PATH env var.
         """
+        self._init_lock = threading.Lock()
+        self.executor = ReadWriteExecutor(
+            "domain-rag",
+            read_workers=RAG_READ_CONCURRENCY,
+            write_workers=RAG_WRITE_CONCURRENCY
+        )
+        
         if not CHROMADB_AVAILABLE:
             logger.warning("ChromaDB not available. RAG retrieval will be disabled.")
             self.client = None
             self.collection = None
+            self.embedding_fn = None
+            self.snapshot = None
+            self.stats = None
             self.initialized = False
             return
         
@@ -66,10 +84,20 @@ class DomainScopedRAGStore:
         self.embedding_model = embedding_model
         self.client = None
         self.collection = None
+        self.embedding_fn = None
+        self.snapshot_path = snapshot_path or os.getenv("RAG_SNAPSHOT_PATH") or None
+        self.snapshot = None
+        self.stats = None
         self.initialized = False
     
     def initialize(self):
         """Initialize ChromaDB client and collection."""
+        # Async callers may race to initialize from several pool threads
+        with self._init_lock:
+            self._initialize()
+    
+    def _initialize(self):
+        """Create the ChromaDB client and collection (caller holds the init lock)."""
         if not CHROMADB_AVAILABLE:
             logger.warning("ChromaDB not available. Skipping initialization.")
             return
@@ -84,16 +112,33 @@ class DomainScopedRAGStore:
                 self.initialized = False
                 return
             
-            self.client = chromadb.PersistentClient(path=str(self.chroma_dir))
+            import chromadb
+            from chromadb.utils import embedding_functions
             
-            embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
+            self.embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
                 api_key=api_key,
-                model_name=self.embedding_model
+                model_name=self.embedding_model,
+                api_base=get_openai_base_url()
             )
             
+            if self.snapshot_path:
+                # Snapshot mode: mmap the exported vectors, skip the Chroma index load
+                from agents.vector_snapshot import VectorSnapshot
+                self.snapshot = VectorSnapshot.open(self.snapshot_path)
+                self.initialized = True
+                logger.info(
+                    f"RAG store serving {len(self.snapshot)} documents from snapshot: {self.snapshot_path}"
+                )
+                return
+            
+            self.client = chromadb.PersistentClient(path=str(self.chroma_dir))
+            
             self.collection = self.client.get_or_create_collection(
                 name=self.collection_name,
-                embedding_function=embedding_fn
+                embedding_function=self.embedding_fn
+            )
+            self.stats = KBStatsIndex(
+                Path(self.chroma_dir) / f"{self.collection_name}.stats.json"
             )
             
             self.initialized = True
@@ -141,6 +186,7 @@ class DomainScopedRAGStore:
         doc_metadata = {
             'domain': domain,
             'source': file_path,
+            'ingested_at': datetime.utcnow().isoformat(),
             **(metadata or {})
         }
         
@@ -155,11 +201,151 @@ class DomainScopedRAGStore:
                 metadatas=[doc_metadata],
                 ids=[doc_id]
             )
-            logger.info(f"Ingested document from {file_path} with domain '{domain}'")
-            return doc_id
         except Exception as e:
             logger.error(f"Failed to ingest document: {e}")
             return ""
+        
+        try:
+            self.stats.record_added([doc_metadata], [content])
+        except Exception as e:
+            # The document is stored; get_stats rebuilds an index that drifted
+            logger.warning(f"Failed to update KB stats index: {e}")
+        logger.info(f"Ingested document from {file_path} with domain '{domain}'")
+        return doc_id
+    
+    def embed_documents(self, texts: List[str]) -> List[Any]:
+        """Embed a batch of texts with the store's embedding function (one API request)."""
+        if not self.initialized:
+            self.initialize()
+        if not self.embedding_fn:
+            raise RuntimeError("RAG store not initialized; cannot embed documents")
+        return list(self.embedding_fn(texts))
+    
+    def add_embedded_documents(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[Any]
+    ) -> int:
+        """Upsert pre-embedded documents, skipping the embedding API.
+        
+        Metadata must already carry a valid 'domain'; IDs are upserted so
+        re-ingesting the same chunk IDs replaces them instead of duplicating.
+        
+        Returns:
+            Number of documents written
+        """
+        if not self.initialized:
+            self.initialize()
+        if not self.collection:
+            raise RuntimeError("RAG store not initialized; cannot write documents")
+        
+        for metadata in metadatas:
+            if metadata.get('domain') not in VALID_DOMAINS:
+                metadata['domain'] = 'shared'
+        
+        # Upserts may overwrite existing chunks; un-count them before re-counting
+        existing = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        self.collection.upsert(
+            ids=ids,
+            documents=documents,
+            metadatas=metadatas,
+            embeddings=embeddings
+        )
+        if existing.get("ids"):
+            self.stats.record_removed(existing["metadatas"], existing["documents"])
+        self.stats.record_added(metadatas, documents)
+        return len(ids)
+    
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        """Replace the metadata of existing documents without re-embedding them.
+        
+        Returns:
+            Number of documents updated
+        """
+        if not self.initialized:
+            self.initialize()
+        if not self.collection:
+            raise RuntimeError("RAG store not initialized; cannot update documents")
+        
+        for metadata in metadatas:
+            if metadata.get('domain') not in VALID_DOMAINS:
+                metadata['domain'] = 'shared'
+        
+        existing = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        self.collection.update(ids=ids, metadatas=metadatas)
+        if existing.get("ids"):
+            updated = dict(zip(ids, metadatas))
+            self.stats.record_removed(existing["metadatas"], existing["documents"])
+            self.stats.record_added([updated[doc_id] for doc_id in existing["ids"]], existing["documents"])
+        return len(ids)
+    
+    def delete_documents(self, ids: List[str], batch_size: int = DEFAULT_DELETE_BATCH_SIZE) -> int:
+        """Delete documents by ID in batches.
+        
+        Returns:
+            Number of IDs submitted for deletion
+        """
+        if not self.initialized:
+            self.initialize()
+        if not self.collection:
+            raise RuntimeError("RAG store not initialized; cannot delete documents")
+        
+        from agents.kb_maintenance import delete_in_batches
+        return delete_in_batches(self.collection, ids, batch_size, self.stats)
+    
+    def collect_garbage(
+        self,
+        dry_run: bool = False,
+        base_path: Path = Path("."),
+        batch_size: int = DEFAULT_DELETE_BATCH_SIZE
+    ) -> Dict[str, Any]:
+        """Delete duplicate, superseded and orphaned documents (see agents.kb_maintenance).
+        
+        The stats side-index is updated for every deleted batch.
+        """
+        from agents.kb_maintenance import collect_garbage
+        
+        if not self.initialized:
+            self.initialize()
+        if not self.collection:
+            raise RuntimeError("RAG store not initialized; cannot collect garbage")
+        return collect_garbage(
+            self.collection,
+            base_path=base_path,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            stats_index=self.stats
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-domain counts, per-library counts and total bytes without a full scan.
+        
+        Served from the stats side-index (agents.kb_stats); the index is
+        rebuilt with one paged scan only if it is missing or out of sync.
+        """
+        if not self.initialized:
+            self.initialize()
+        if not self.collection:
+            raise RuntimeError("RAG store not initialized; cannot read stats")
+        return self.stats.ensure_fresh(self.collection).to_dict()
+    
+    async def aingest_document(
+        self,
+        content: str,
+        file_path: str,
+        domain: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Async variant of ingest_document; the write runs on the write pool."""
+        return await self.executor.run_write(
+            self.ingest_document, content, file_path, domain, metadata
+        )
+    
+    def close(self) -> None:
+        """Shut down the store's read and write thread pools."""
+        self.executor.shutdown()
     
     def _infer_domain_from_path(self, file_path: str) -> str:
         """Infer domain from file path."""
@@ -177,7 +363,10 @@ class DomainScopedRAGStore:
         self,
         query: str,
         agent_domain: str,
-        top_k: int = DEFAULT_TOP_K
+        top_k: int = DEFAULT_TOP_K,
+        use_mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        mmr_lambda: float = DEFAULT_MMR_LAMBDA
     ) -> str:
         """Retrieve relevant knowledge filtered by agent domain.
         
@@ -188,6 +377,10 @@ class DomainScopedRAGStore:
             query: Search query/question
             agent_domain: The domain of the requesting agent (e.g., 'backend', 'prd')
             top_k: Number of top documents to retrieve
+            use_mmr: Re-rank an over-fetched candidate set with maximal marginal
+                relevance so near-duplicate documents don't fill the context
+            fetch_k: Number of candidates to over-fetch for MMR (default: 4 * top_k)
+            mmr_lambda: MMR relevance/diversity trade-off (1.0 = pure relevance)
             
         Returns:
             Concatenated context string from retrieved documents
@@ -195,7 +388,7 @@ class DomainScopedRAGStore:
         if not self.initialized:
             self.initialize()
         
-        if not self.initialized or not self.collection:
+        if not self.initialized or not (self.collection or self.snapshot):
             logger.warning("RAG store not initialized. Returning empty context.")
             return ""
         
@@ -216,15 +409,22 @@ class DomainScopedRAGStore:
                 ]
             }
             
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=top_k,
-                where=where_filter
-            )
+            if self.snapshot is not None:
+                documents = self._query_snapshot(
+                    query, agent_domain, top_k, use_mmr, fetch_k, mmr_lambda
+                )
+            elif use_mmr:
+                documents = self._query_mmr(query, top_k, where_filter, fetch_k, mmr_lambda)
+            else:
+                results = self.collection.query(
+                    query_texts=[query],
+                    n_results=top_k,
+                    where=where_filter
+                )
+                documents = results['documents'][0] if results and results.get('documents') else []
             
             # Extract documents
-            if results and results.get('documents') and len(results['documents'][0]) > 0:
-                documents = results['documents'][0]
+            if documents:
                 # Concatenate into context string
                 context = "\n\n".join(documents)
                 
@@ -240,6 +440,85 @@ class DomainScopedRAGStore:
         except Exception as e:
             logger.error(f"Failed to retrieve knowledge: {e}")
             return ""
+    
+    async def aretrieve_knowledge(
+        self,
+        query: str,
+        agent_domain: str,
+        top_k: int = DEFAULT_TOP_K,
+        use_mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        mmr_lambda: float = DEFAULT_MMR_LAMBDA
+    ) -> str:
+        """Async variant of retrieve_knowledge; the query runs on the read pool."""
+        return await self.executor.run_read(
+            self.retrieve_knowledge, query, agent_domain, top_k, use_mmr, fetch_k, mmr_lambda
+        )
+    
+    def _query_snapshot(
+        self,
+        query: str,
+        agent_domain: str,
+        top_k: int,
+        use_mmr: bool,
+        fetch_k: Optional[int],
+        mmr_lambda: float
+    ) -> List[str]:
+        """Search the memory-mapped snapshot, optionally MMR re-ranked."""
+        query_embedding = self.embedding_fn([query])[0]
+        domains = [agent_domain, "shared"]
+        
+        if not use_mmr:
+            hits = self.snapshot.search(query_embedding, k=top_k, domains=domains)
+            return [hit["document"] for hit in hits]
+        
+        from agents.mmr import default_fetch_k, maximal_marginal_relevance
+        
+        hits = self.snapshot.search(
+            query_embedding,
+            k=max(fetch_k or default_fetch_k(top_k), top_k),
+            domains=domains,
+            include_embeddings=True
+        )
+        if not hits:
+            return []
+        selected = maximal_marginal_relevance(
+            query_embedding,
+            [hit["embedding"] for hit in hits],
+            k=top_k,
+            lambda_mult=mmr_lambda
+        )
+        return [hits[i]["document"] for i in selected]
+    
+    def _query_mmr(
+        self,
+        query: str,
+        top_k: int,
+        where_filter: Dict[str, Any],
+        fetch_k: Optional[int],
+        mmr_lambda: float
+    ) -> List[str]:
+        """Over-fetch candidates with embeddings and select a diverse top_k via MMR."""
+        from agents.mmr import default_fetch_k, maximal_marginal_relevance
+        
+        query_embedding = self.embedding_fn([query])[0]
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=max(fetch_k or default_fetch_k(top_k), top_k),
+            where=where_filter,
+            include=["documents", "embeddings"]
+        )
+        documents = results['documents'][0] if results.get('documents') else []
+        if not documents:
+            return []
+        
+        selected = maximal_marginal_relevance(
+            query_embedding,
+            results['embeddings'][0],
+            k=top_k,
+            lambda_mult=mmr_lambda
+        )
+        return [documents[i] for i in selected]
 
 
 # Global RAG store instance
@@ -258,7 +537,8 @@ def get_rag_store() -> DomainScopedRAGStore:
 def retrieve_knowledge(
     query: str,
     agent_domain: str,
-    top_k: int = DEFAULT_TOP_K
+    top_k: int = DEFAULT_TOP_K,
+    use_mmr: bool = False
 ) -> str:
     """Convenience function for retrieving domain-scoped knowledge.
     
@@ -266,10 +546,11 @@ def retrieve_knowledge(
         query: The search query/question
         agent_domain: The domain of the requesting agent (e.g., 'backend', 'prd')
         top_k: Number of top documents to retrieve (default: 5)
+        use_mmr: Diversify results with MMR re-ranking (default: False)
     
     Returns:
         Concatenated context string from retrieved documents
     """
     rag_store = get_rag_store()
-    return rag_store.retrieve_knowledge(query, agent_domain, top_k)
+    return rag_store.retrieve_knowledge(query, agent_domain, top_k, use_mmr=use_mmr)
 
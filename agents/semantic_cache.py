@@ -0,0 +1,135 @@
+"""Opt-in semantic cache for near-duplicate requests.
+
+Exact-match caching (agents.llm_cache) misses paraphrases such as "todo app
+with auth" vs "task manager with login". This cache embeds the request text
+and serves a stored result when a previous request is similar enough; the
+cosine similarity is returned as the hit's confidence so callers can log or
+re-check low-confidence hits.
+
+Entries are appended to a JSONL file and loaded into memory on first use.
+numpy is imported on first lookup, so importing the cache stays cheap.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 5000
+
+
+@dataclass
+class SemanticCacheResult:
+    """Outcome of a lookup; ``embedding`` can be passed to ``add`` on a miss."""
+    hit: bool
+    value: Any = None
+    confidence: float = 0.0
+    matched_text: Optional[str] = None
+    embedding: Optional[List[float]] = None
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over request embeddings."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        embed_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """Create a cache.
+
+        Args:
+            path: JSONL file holding the entries
+            embed_fn: Embeds a batch of texts
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Oldest entries are dropped beyond this count
+        """
+        self.path = Path(path)
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Optional[List[dict]] = None
+        self._matrix: Optional["np.ndarray"] = None
+
+    def _load(self) -> List[dict]:
+        if self._entries is None:
+            entries = []
+            if self.path.exists():
+                for line in self.path.read_text(encoding="utf-8").splitlines():
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping corrupt semantic cache entry in {self.path}")
+            self._entries = entries[-self.max_entries:]
+            self._matrix = None
+        return self._entries
+
+    def _vectors(self) -> "np.ndarray":
+        import numpy as np
+        if self._matrix is None:
+            vectors = np.asarray([entry["embedding"] for entry in self._entries], dtype=np.float32)
+            if len(vectors):
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            self._matrix = vectors
+        return self._matrix
+
+    def lookup(self, text: str) -> SemanticCacheResult:
+        """Find the most similar cached request; a hit if it clears the threshold."""
+        import numpy as np
+        embedding = [float(x) for x in self.embed_fn([text])[0]]
+        with self._lock:
+            entries = self._load()
+            if not entries:
+                return SemanticCacheResult(hit=False, embedding=embedding)
+            query = np.asarray(embedding, dtype=np.float32)
+            query /= max(float(np.linalg.norm(query)), 1e-12)
+            scores = self._vectors() @ query
+            best = int(np.argmax(scores))
+            confidence = float(scores[best])
+            if confidence < self.threshold:
+                return SemanticCacheResult(hit=False, confidence=confidence, embedding=embedding)
+            entry = entries[best]
+            return SemanticCacheResult(
+                hit=True,
+                value=copy.deepcopy(entry["value"]),
+                confidence=confidence,
+                matched_text=entry["text"],
+                embedding=embedding,
+            )
+
+    def add(self, text: str, value: Any, embedding: Optional[Sequence[float]] = None) -> None:
+        """Store a result for ``text`` (embedding it unless an embedding is given)."""
+        if embedding is None:
+            embedding = self.embed_fn([text])[0]
+        entry = {
+            "text": text,
+            "embedding": [float(x) for x in embedding],
+            "value": value,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            entries = self._load()
+            entries.append(entry)
+            self._matrix = None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if len(entries) > self.max_entries:
+                del entries[:len(entries) - self.max_entries]
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text("".join(json.dumps(e) + "\n" for e in entries), encoding="utf-8")
+                os.replace(tmp_path, self.path)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
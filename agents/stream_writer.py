@@ -0,0 +1,117 @@
+"""Write streamed text to a file and atomically replace the target when done.
+
+Streamed LLM output is appended to a ``<target>.<id>.partial`` file next to
+the target as it arrives, so readers see content within seconds and the
+response is never held in memory as a whole. Each writer gets its own
+``<id>``, so concurrent writers of the same target never share a partial
+file. On success the partial file is renamed over the target in one step.
+On failure the partial file is removed and the existing target is left
+untouched.
+
+Async callers use ``async with`` and ``awrite``: opening, writing and
+renaming then run on a worker thread instead of the event loop.
+"""
+import asyncio
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import List, Optional, Union
+
+
+class AtomicStreamWriter:
+    """Context manager that appends text chunks to a partial file, then renames it."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex[:8]}.partial")
+        self.chars_written = 0
+        self.lines_completed = 0
+        self._pending_line = ""
+        # Text accepted by awrite but not yet handed to the file
+        self._unwritten: List[str] = []
+        self._file = None
+        # A cancelled awrite's thread may still be writing when the writer closes
+        self._io_lock = threading.Lock()
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+
+    def _write_and_flush(self, text: str) -> None:
+        with self._io_lock:
+            if self._file.closed:
+                return
+            self._file.write(text)
+            self._file.flush()
+
+    def _close(self, success: bool) -> None:
+        with self._io_lock:
+            try:
+                if success and self._unwritten:
+                    self._file.write("".join(self._unwritten))
+            finally:
+                self._file.close()
+        if success:
+            os.replace(self.partial_path, self.path)
+        else:
+            try:
+                self.partial_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _split(self, text: str) -> List[str]:
+        self.chars_written += len(text)
+        *lines, self._pending_line = (self._pending_line + text).split("\n")
+        self.lines_completed += len(lines)
+        return lines
+
+    def __enter__(self) -> "AtomicStreamWriter":
+        self._open()
+        return self
+
+    def write(self, text: str) -> List[str]:
+        """Append a chunk; returns the lines it completed (without newlines).
+
+        The file is flushed whenever a line completes, so the partial file
+        is readable line by line while the stream is still running.
+        """
+        if not text:
+            return []
+        self._file.write(text)
+        lines = self._split(text)
+        if lines:
+            self._file.flush()
+        return lines
+
+    def finish(self) -> Optional[str]:
+        """The trailing line that had no newline, if any."""
+        return self._pending_line or None
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._close(exc_type is None)
+        return False
+
+    async def __aenter__(self) -> "AtomicStreamWriter":
+        await asyncio.to_thread(self._open)
+        return self
+
+    async def awrite(self, text: str) -> List[str]:
+        """Like ``write``, without blocking the event loop.
+
+        Text is held in memory until a line completes; the completed lines
+        are then written and flushed on a worker thread.
+        """
+        if not text:
+            return []
+        self._unwritten.append(text)
+        lines = self._split(text)
+        if lines:
+            chunk = "".join(self._unwritten)
+            self._unwritten.clear()
+            await asyncio.to_thread(self._write_and_flush, chunk)
+        return lines
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        await asyncio.to_thread(self._close, exc_type is None)
+        return False
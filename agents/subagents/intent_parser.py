@@ -1,10 +1,19 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import hashlib
 import json
+import logging
+import os
 from pathlib import Path
-from typing import Dict, Any
-from openai import OpenAI  # Assuming you use an OpenAI-compatible API
+from typing import Dict, Any, List, Optional
+
+from agents.llm import chat_completion, embed_texts
+from agents.model_router import get_model_router
+from agents.prompt_registry import get_prompt_registry
+from agents.semantic_cache import DEFAULT_THRESHOLD, SemanticCache
+
+logger = logging.getLogger(__name__)
 
 # Load the schema from the file system
 # Handle different working directories by searching for the project root
@@ -25,7 +34,53 @@ except (FileNotFoundError, json.JSONDecodeError):
     # Fallback or error handling if schema file is missing
     PROJECT_INTENT_SCHEMA = {}
 
-# LLM client will be initialized lazily in run_task if available
+# Serialized once for the system prompt
+PROJECT_INTENT_SCHEMA_JSON = json.dumps(PROJECT_INTENT_SCHEMA, indent=2) if PROJECT_INTENT_SCHEMA else "No schema available"
+
+# The shared LLM client is initialized lazily on the first uncached request
+
+# Opt-in semantic cache: paraphrased requests reuse a previously parsed intent
+SEMANTIC_CACHE_ENABLED = os.getenv("INTENT_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("INTENT_SEMANTIC_CACHE_THRESHOLD", str(DEFAULT_THRESHOLD)))
+SEMANTIC_CACHE_DIR = Path(os.getenv("INTENT_SEMANTIC_CACHE_DIR", ".cache"))
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the intent semantic cache.
+
+    Entries live in a file named after the schema's hash, so changing the
+    schema starts a fresh cache instead of serving intents in the old shape.
+    """
+    global _semantic_cache
+    if _semantic_cache is None:
+        schema_hash = hashlib.sha256(
+            json.dumps(PROJECT_INTENT_SCHEMA, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        _semantic_cache = SemanticCache(
+            SEMANTIC_CACHE_DIR / f"intent_semantic_cache.{schema_hash}.jsonl",
+            embed_fn=embed_texts,
+            threshold=SEMANTIC_CACHE_THRESHOLD
+        )
+    return _semantic_cache
+
+
+INTENT_RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def build_messages(raw_user_request: str) -> List[Dict[str, Any]]:
+    """Chat messages that ask the LLM to translate a request into the intent schema.
+
+    The system prompt is rendered from ``agents/prompts/intent_parser.md``
+    once and reused, so it is byte-identical across requests; only the user
+    message varies.
+    """
+    system_prompt = get_prompt_registry().render("intent_parser", schema=PROJECT_INTENT_SCHEMA_JSON)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Translate this project request into JSON: '{raw_user_request}'"}
+    ]
 
 
 def run_task(inputs: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,37 +93,54 @@ def run_task(inputs: Dict[str, Any]) -> Dict[str, Any]:
     if not raw_user_request:
         return {"parsed_intent": None, "error": "No raw user request provided."}
 
-    # Build system prompt with schema information
-    schema_str = json.dumps(PROJECT_INTENT_SCHEMA, indent=2) if PROJECT_INTENT_SCHEMA else "No schema available"
-    
-    system_prompt = (
-        "You are the Intent Parser Agent. Your task is to analyze the user's request "
-        "for a new software project and translate it into a structured JSON object. "
-        "You MUST strictly adhere to the following JSON schema:\n\n"
-        f"{schema_str}\n\n"
-        "Infer missing details logically (e.g., project_name from description) but do not invent features. "
-        "If a technology is not specified, leave the field blank or infer a common default. "
-        "Return ONLY valid JSON that matches the schema structure."
-    )
+    use_semantic_cache = inputs.get("semantic_cache", SEMANTIC_CACHE_ENABLED)
+    cache_lookup = None
+    if use_semantic_cache:
+        try:
+            cache_lookup = get_semantic_cache().lookup(raw_user_request)
+        except Exception as e:
+            logger.warning(f"Intent semantic cache lookup failed, parsing with the LLM: {e}")
+        if cache_lookup and cache_lookup.hit:
+            logger.info(
+                f"Intent semantic cache hit (confidence {cache_lookup.confidence:.3f}) "
+                f"for request similar to: {cache_lookup.matched_text!r}"
+            )
+            return {
+                "parsed_intent": cache_lookup.value,
+                "raw_user_request": raw_user_request,
+                "intent_cache": {
+                    "hit": True,
+                    "confidence": round(cache_lookup.confidence, 4),
+                    "matched_request": cache_lookup.matched_text
+                }
+            }
 
     try:
-        # Initialize LLM client lazily (only when needed)
-        client = OpenAI()
-        
         # Use the LLM's JSON mode feature for reliable structured output
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use a reliable model for this critical step
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Translate this project request into JSON: '{raw_user_request}'"}
-            ]
-        )
+        # (identical requests are served from the response cache)
+        messages = build_messages(raw_user_request)
+        router = get_model_router()
+        decision = router.route("intent", messages, latency_budget_s=inputs.get("latency_budget_s"))
+        json_string = router.call_with_fallback(decision, lambda model: chat_completion(
+            model=model,
+            response_format=INTENT_RESPONSE_FORMAT,
+            messages=messages,
+            bypass_cache=inputs.get("bypass_llm_cache"),
+            agent="intent_parser",
+            # Invalid JSON is never cached, so the next run asks again
+            validate=json.loads,
+            **decision.call_options(model)
+        ))
 
         # The response content is a JSON string
-        json_string = response.choices[0].message.content
         parsed_intent = json.loads(json_string)
 
+        if cache_lookup is not None:
+            try:
+                get_semantic_cache().add(raw_user_request, parsed_intent, cache_lookup.embedding)
+            except Exception as e:
+                logger.warning(f"Could not store parsed intent in the semantic cache: {e}")
+
         # The output state will now contain the structured intent
         return {"parsed_intent": parsed_intent, "raw_user_request": raw_user_request}
 
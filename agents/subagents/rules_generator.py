@@ -1,13 +1,17 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import contextvars
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 from pathlib import Path
-from openai import OpenAI
 
-# Initialize the LLM client (assuming environment variables are set)
-client = OpenAI()
+from agents.llm import stream_chat_completion_to_file
+from agents.model_router import get_model_router
+
+logger = logging.getLogger(__name__)
 
 # System prompt for generating the rules file
 RULES_SYSTEM_PROMPT = """
@@ -42,23 +46,46 @@ Guidelines for generating the task list:
 - Include estimated complexity if relevant
 """
 
-def generate_document(system_prompt: str, user_prompt: str) -> str:
-    """Helper function to call the OpenAI API with a specific prompt."""
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use a reliable model for content generation
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating document: {e}"
+def _messages(system_prompt: str, user_prompt: str):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def stream_document(path: Path, system_prompt: str, user_prompt: str, task: str = "rules") -> Path:
+    """Stream a document into ``path``, replacing it atomically once complete; raises on failure.
+
+    The model is chosen by the model router for ``task``. If a model fails,
+    the document is streamed again from the start with the next one (the
+    failed attempt's partial file is discarded).
+    """
+    def report(line: str) -> None:
+        # Each Markdown heading marks a new section on its way to disk
+        if line.startswith("#"):
+            logger.info(f"{path}: {line.lstrip('#').strip()}")
+
+    logger.info(f"Streaming {path} (partial output in {path}.<id>.partial)")
+    messages = _messages(system_prompt, user_prompt)
+    router = get_model_router()
+    decision = router.route(task, messages)
+    return router.call_with_fallback(decision, lambda model: stream_chat_completion_to_file(
+        messages,
+        path,
+        model=model,
+        on_line=report,
+        agent="rules_generator",
+        **decision.call_options(model)
+    ))
 
 def run_task(inputs: Dict[str, Any]) -> Dict[str, Any]:
     """
     Generates the project rules and master task list files based on parsed intent.
+    
+    Both documents depend only on the intent, so the two LLM requests run
+    concurrently. Each response is streamed to a ``.partial`` file next to
+    its destination and renamed into place when complete. Each is handled
+    independently: if one fails, the other is still written, and the failed
+    document's existing file is left untouched.
     """
     parsed_intent = inputs.get("parsed_intent")
     
@@ -68,38 +95,49 @@ def run_task(inputs: Dict[str, Any]) -> Dict[str, Any]:
     # Convert the structured intent back to a string for the LLM prompt
     intent_str = json.dumps(parsed_intent, indent=2)
     
-    # --- 1. Generate Project Rules ---
-    rules_content = generate_document(
-        RULES_SYSTEM_PROMPT,
-        f"Generate project rules for the following intent:\n\n{intent_str}"
-    )
-    
-    # Write the rules file to the designated location
     rules_path = Path(".cursor/rules.md")
-    rules_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(rules_path, "w", encoding="utf-8") as f:
-        f.write(rules_content)
-    
-    # --- 2. Generate Master Task List ---
-    task_list_content = generate_document(
-        TASK_LIST_SYSTEM_PROMPT,
-        f"Generate a sequential master task list (Markdown checklist) for the following project intent:\n\n{intent_str}"
-    )
-    
-    # Write the task list file to the designated location
     task_list_path = Path("docs/tasks.md")
-    task_list_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(task_list_path, "w", encoding="utf-8") as f:
-        f.write(task_list_content)
+    documents = {
+        # --- 1. Project Rules ---
+        "rules": (
+            rules_path,
+            RULES_SYSTEM_PROMPT,
+            f"Generate project rules for the following intent:\n\n{intent_str}"
+        ),
+        # --- 2. Master Task List ---
+        "task_list": (
+            task_list_path,
+            TASK_LIST_SYSTEM_PROMPT,
+            f"Generate a sequential master task list (Markdown checklist) for the following project intent:\n\n{intent_str}"
+        ),
+    }
+    
+    errors = {}
+    with ThreadPoolExecutor(max_workers=len(documents), thread_name_prefix="rules-generator") as pool:
+        futures = {
+            # Each document streams to its designated location
+            # (copying the context keeps the run id on the workers' LLM usage records)
+            name: pool.submit(contextvars.copy_context().run, stream_document, path, system_prompt, user_prompt, name)
+            for name, (path, system_prompt, user_prompt) in documents.items()
+        }
+        for name, future in futures.items():
+            path = documents[name][0]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Failed to generate {path}: {e}")
+                errors[name] = f"Error generating document: {e}"
 
     # Return the paths of the generated files to the LangGraph state
-    return {
-        "rules_generated": True,
+    result = {
+        "rules_generated": not errors,
         "rules_path": str(rules_path),
         "task_list_path": str(task_list_path),
         "parsed_intent": parsed_intent,  # Pass through for next agent
         "raw_user_request": inputs.get("raw_user_request", "")  # Pass through
     }
+    if errors:
+        result["errors"] = errors
+    return result
 
 # Note: The existing 'docs/tasks.md' file will be overwritten with the new, dynamic list.
-
@@ -0,0 +1,252 @@
+"""Compact, memory-mapped vector snapshots of a knowledge base collection.
+
+A snapshot is a directory that many processes can open read-only and share
+through the OS page cache; opening one costs a few ``mmap`` calls instead of
+loading a ChromaDB index. Layout::
+
+    manifest.json   format version, dtype, dim, count, domain names
+    vectors.bin     count x dim unit-normalized embeddings (float32 or int8)
+    scales.bin      per-row float32 dequantization scales (int8 only)
+    table.bin       fixed-width side table: domain code and offsets into strings.bin
+    strings.bin     UTF-8 ids, documents and JSON metadata, back to back
+
+Nothing is parsed at open time; strings and metadata are decoded only for
+the rows a search actually returns.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+SUPPORTED_DTYPES = ("float32", "int8")
+
+TABLE_DTYPE = np.dtype([
+    ("domain", "<u2"),
+    ("id_offset", "<u8"),
+    ("id_length", "<u4"),
+    ("doc_offset", "<u8"),
+    ("doc_length", "<u4"),
+    ("meta_offset", "<u8"),
+    ("meta_length", "<u4"),
+])
+
+# Rows scored per block when dequantizing int8 vectors
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def export_snapshot(
+    collection: Any,
+    path: Union[str, Path],
+    dtype: str = "float32",
+    batch_size: int = 500,
+    embedding_model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Export a ChromaDB collection into a snapshot directory.
+
+    The collection is read page by page, so exporting never holds more than
+    ``batch_size`` records in memory. The snapshot covers the records counted
+    when the export starts; documents added while it runs are left out.
+
+    Args:
+        collection: ChromaDB collection (anything with ``count`` and paged ``get``)
+        path: Output directory (created if needed)
+        dtype: "float32", or "int8" for 4x smaller vectors with per-row scales
+        batch_size: Records fetched per page
+        embedding_model: Recorded in the manifest so readers can check compatibility
+
+    Returns:
+        The written manifest
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}. Must be one of: {SUPPORTED_DTYPES}")
+
+    out_dir = Path(path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    total = collection.count()
+    domains: List[str] = []
+    domain_codes: Dict[str, int] = {}
+    table = np.zeros(total, dtype=TABLE_DTYPE)
+    dim = 0
+    row = 0
+    string_offset = 0
+
+    with open(out_dir / "vectors.bin", "wb") as vectors_file, \
+            open(out_dir / "scales.bin", "wb") as scales_file, \
+            open(out_dir / "strings.bin", "wb") as strings_file:
+        while row < total:
+            page = collection.get(
+                limit=min(batch_size, total - row),
+                offset=row,
+                include=["embeddings", "documents", "metadatas"],
+            )
+            # Never write past the table sized from the initial count
+            take = min(len(page["ids"]), total - row)
+            if not take:
+                break
+
+            vectors = _normalize(np.asarray(page["embeddings"][:take], dtype=np.float32))
+            dim = vectors.shape[1]
+            if dtype == "int8":
+                scales = np.abs(vectors).max(axis=1) / 127.0
+                scales[scales == 0] = 1.0
+                np.round(vectors / scales[:, None]).astype(np.int8).tofile(vectors_file)
+                scales.astype(np.float32).tofile(scales_file)
+            else:
+                vectors.tofile(vectors_file)
+
+            for doc_id, document, metadata in zip(
+                page["ids"][:take], page["documents"][:take], page["metadatas"][:take]
+            ):
+                metadata = metadata or {}
+                domain = metadata.get("domain", "shared")
+                if domain not in domain_codes:
+                    domain_codes[domain] = len(domains)
+                    domains.append(domain)
+
+                entry = table[row]
+                entry["domain"] = domain_codes[domain]
+                for field, text in (("id", doc_id), ("doc", document or ""), ("meta", json.dumps(metadata))):
+                    data = text.encode("utf-8")
+                    strings_file.write(data)
+                    entry[f"{field}_offset"] = string_offset
+                    entry[f"{field}_length"] = len(data)
+                    string_offset += len(data)
+                row += 1
+
+    table[:row].tofile(out_dir / "table.bin")
+    if dtype == "float32":
+        (out_dir / "scales.bin").unlink()
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "dtype": dtype,
+        "dim": dim,
+        "count": row,
+        "domains": domains,
+        "embedding_model": embedding_model,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+class VectorSnapshot:
+    """Read-only, memory-mapped view of an exported snapshot."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot format version: {self.manifest.get('format_version')}"
+            )
+
+        self.count = self.manifest["count"]
+        self.dim = self.manifest["dim"]
+        self.dtype = self.manifest["dtype"]
+        self.domains: List[str] = self.manifest["domains"]
+        self.embedding_model = self.manifest.get("embedding_model")
+
+        if self.count == 0:
+            self.vectors = np.zeros((0, self.dim), dtype=self.dtype)
+            self.scales = None
+            self.table = np.zeros(0, dtype=TABLE_DTYPE)
+            self.strings = b""
+            return
+
+        self.vectors = np.memmap(
+            self.path / "vectors.bin", dtype=self.dtype, mode="r", shape=(self.count, self.dim)
+        )
+        self.scales = (
+            np.memmap(self.path / "scales.bin", dtype=np.float32, mode="r", shape=(self.count,))
+            if self.dtype == "int8" else None
+        )
+        self.table = np.memmap(self.path / "table.bin", dtype=TABLE_DTYPE, mode="r", shape=(self.count,))
+        self.strings = np.memmap(self.path / "strings.bin", dtype=np.uint8, mode="r")
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "VectorSnapshot":
+        """Open a snapshot directory."""
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _string(self, offset: int, length: int) -> str:
+        return bytes(self.strings[offset:offset + length]).decode("utf-8")
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row."""
+        if self.dtype == "float32":
+            return np.asarray(self.vectors @ query)
+        scores = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, SEARCH_BLOCK_ROWS):
+            block = slice(start, start + SEARCH_BLOCK_ROWS)
+            scores[block] = (self.vectors[block].astype(np.float32) @ query) * self.scales[block]
+        return scores
+
+    def vector(self, index: int) -> np.ndarray:
+        """Dequantized embedding of one row."""
+        vector = np.asarray(self.vectors[index], dtype=np.float32)
+        return vector * self.scales[index] if self.scales is not None else vector
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int = 5,
+        domains: Optional[Sequence[str]] = None,
+        include_embeddings: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Return the ``k`` rows most similar to ``query_embedding``.
+
+        Args:
+            query_embedding: Query vector (need not be normalized)
+            k: Number of results
+            domains: Restrict results to these domains (None for all)
+            include_embeddings: Also return each hit's dequantized embedding
+
+        Returns:
+            Hits ordered by descending score, each with id, document,
+            metadata, domain and score
+        """
+        if self.count == 0 or k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self._scores(query)
+
+        if domains is not None:
+            codes = [self.domains.index(d) for d in domains if d in self.domains]
+            scores = np.where(np.isin(self.table["domain"], codes), scores, -np.inf)
+
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        hits = []
+        for index in top:
+            if not np.isfinite(scores[index]):
+                break
+            entry = self.table[index]
+            hit = {
+                "id": self._string(int(entry["id_offset"]), int(entry["id_length"])),
+                "document": self._string(int(entry["doc_offset"]), int(entry["doc_length"])),
+                "metadata": json.loads(self._string(int(entry["meta_offset"]), int(entry["meta_length"]))),
+                "domain": self.domains[int(entry["domain"])],
+                "score": float(scores[index]),
+            }
+            if include_embeddings:
+                hit["embedding"] = self.vector(int(index))
+            hits.append(hit)
+        return hits
@@ -39,22 +39,18 @@ def check_kb_status():
                 else:
                     print(f"\n[OK] Knowledge base has {count_result} documents")
                     
-                    # Show domain breakdown
+                    # Show domain breakdown from the stats side-index (no full scan)
                     print("\n[INFO] Checking domain distribution...")
                     try:
-                        # Get all documents to check metadata
-                        all_docs = rag_store.collection.get()
-                        if all_docs and all_docs.get('metadatas'):
-                            domains = {}
-                            for metadata in all_docs['metadatas']:
-                                domain = metadata.get('domain', 'unknown')
-                                domains[domain] = domains.get(domain, 0) + 1
-                            
-                            print("\n   Documents by domain:")
-                            for domain, count in sorted(domains.items()):
-                                print(f"     {domain}: {count}")
-                        else:
-                            print("   [WARN] Could not retrieve metadata")
+                        stats = rag_store.get_stats()
+                        print("\n   Documents by domain:")
+                        for domain, count in sorted(stats['domains'].items()):
+                            print(f"     {domain}: {count}")
+                        if stats['libraries']:
+                            print("\n   Context7 libraries:")
+                            for library, count in sorted(stats['libraries'].items()):
+                                print(f"     {library}: {count}")
+                        print(f"\n   Total size: {stats['total_bytes']:,} bytes")
                     except Exception as e:
                         print(f"   [WARN] Could not check domain distribution: {e}")
                 
@@ -21,16 +21,11 @@ print("="*60)
 initial = store.collection.count() if store.collection else 0
 print(f"Initial count: {initial}\n")
 
-# Check what's already ingested
+# Check what's already ingested (served from the KB stats side-index)
 existing = set()
 if store.collection:
     try:
-        # Get all documents to check what's already there
-        results = store.collection.get()
-        if results and results.get('metadatas'):
-            for meta in results['metadatas']:
-                if meta.get('library_name'):
-                    existing.add(meta['library_name'])
+        existing = set(store.get_stats()['libraries'])
     except:
         pass
 
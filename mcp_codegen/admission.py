@@ -0,0 +1,154 @@
+"""Admission control for MCP tool calls: cost classes and a priority queue.
+
+Each tool belongs to a cost class (interactive, standard, batch). A class
+has its own concurrency cap and queue depth, and all classes share a pool
+of execution slots. When a slot frees up, the highest-priority waiting call
+whose class is under its cap gets it. Interactive calls therefore keep
+their latency while batch work fills whatever capacity remains. A call that
+would overflow its class's queue is rejected immediately with a retry hint
+instead of waiting indefinitely.
+"""
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CostClass:
+    """Scheduling parameters shared by a group of tools."""
+    name: str
+    priority: int  # lower runs first
+    max_concurrent: int
+    max_queue: int
+
+
+class AdmissionRejected(Exception):
+    """Raised when a cost class's queue is full."""
+
+    def __init__(self, cost_class: str, retry_after: float):
+        super().__init__(
+            f"Server busy ({cost_class} queue full); retry after {retry_after:.0f}s"
+        )
+        self.cost_class = cost_class
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Grant execution slots to tool calls by cost class and priority."""
+
+    def __init__(
+        self,
+        classes: List[CostClass],
+        tool_classes: Dict[str, str],
+        total_slots: int,
+        default_class: str = "standard",
+    ):
+        """Create a controller.
+
+        Args:
+            classes: Cost classes to schedule
+            tool_classes: Tool name -> cost class name
+            total_slots: Calls that may run at once across all classes
+            default_class: Class for tools missing from ``tool_classes``
+        """
+        self.classes = {cost_class.name: cost_class for cost_class in classes}
+        self.tool_classes = tool_classes
+        self.total_slots = total_slots
+        self.default_class = default_class
+        self.running = {name: 0 for name in self.classes}
+        self.queued = {name: 0 for name in self.classes}
+        self.rejected = {name: 0 for name in self.classes}
+        # Smoothed service time per class, used for retry hints
+        self._service_time = {name: 1.0 for name in self.classes}
+        # Waiting calls sorted by (priority, arrival)
+        self._waiting: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+
+    def class_for(self, tool: str) -> CostClass:
+        return self.classes[self.tool_classes.get(tool, self.default_class)]
+
+    def _can_start(self, name: str) -> bool:
+        return (
+            sum(self.running.values()) < self.total_slots
+            and self.running[name] < self.classes[name].max_concurrent
+        )
+
+    def _retry_after(self, cost_class: CostClass) -> float:
+        backlog = self.queued[cost_class.name] + self.running[cost_class.name]
+        return max(1.0, round(self._service_time[cost_class.name] * backlog / cost_class.max_concurrent))
+
+    def _grant_waiting(self) -> None:
+        """Hand free slots to the highest-priority waiters that fit their class cap."""
+        still_waiting = []
+        for entry in self._waiting:
+            _, _, name, future = entry
+            if future.cancelled():
+                continue
+            if self._can_start(name):
+                self.queued[name] -= 1
+                self.running[name] += 1
+                future.set_result(None)
+            else:
+                still_waiting.append(entry)
+        self._waiting = still_waiting
+
+    def _release(self, name: str, elapsed: float) -> None:
+        self.running[name] -= 1
+        self._service_time[name] = 0.8 * self._service_time[name] + 0.2 * elapsed
+        self._grant_waiting()
+
+    @asynccontextmanager
+    async def admit(self, tool: str) -> AsyncIterator[None]:
+        """Hold an execution slot for ``tool`` for the duration of the block.
+
+        Raises:
+            AdmissionRejected: If the tool's class already has a full queue
+        """
+        cost_class = self.class_for(tool)
+        name = cost_class.name
+        # Same-class calls stay FIFO: don't overtake anyone already waiting
+        if self._can_start(name) and self.queued[name] == 0:
+            self.running[name] += 1
+        else:
+            if self.queued[name] >= cost_class.max_queue:
+                self.rejected[name] += 1
+                raise AdmissionRejected(name, self._retry_after(cost_class))
+            future = asyncio.get_running_loop().create_future()
+            bisect.insort(self._waiting, (cost_class.priority, next(self._arrivals), name, future))
+            self.queued[name] += 1
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted just as we were cancelled: give the slot back
+                    self._release(name, 0.0)
+                else:
+                    future.cancel()
+                    self.queued[name] -= 1
+                raise
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Running, queued and rejected counts per class."""
+        return {
+            name: {
+                "running": self.running[name],
+                "queued": self.queued[name],
+                "rejected": self.rejected[name],
+                "max_concurrent": cost_class.max_concurrent,
+                "max_queue": cost_class.max_queue,
+            }
+            for name, cost_class in self.classes.items()
+        }
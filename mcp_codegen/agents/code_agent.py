@@ -1,7 +1,7 @@
 """Code generation agent with RAG context."""
 from typing import List, Dict, Any
-from openai import OpenAI
-from mcp_codegen.config import OPENAI_API_KEY, CODE_MODEL
+from mcp_codegen.config import CODE_MODEL
+from mcp_codegen.llm import get_async_openai_client
 from mcp_codegen.rag.store import RAGStore
 
 
@@ -9,9 +9,13 @@ class CodeAgent:
     """Generate code using LLM with RAG context."""
     
     def __init__(self, rag_store: RAGStore):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
         self.rag = rag_store
     
+    @property
+    def client(self):
+        """Shared AsyncOpenAI client, constructed on first use."""
+        return get_async_openai_client()
+    
     async def generate_project(self, requirements: Dict[str, Any], output_dir: str) -> List[str]:
         """Generate complete project from requirements."""
         # TODO: Implement actual code generation
@@ -1,23 +1,30 @@
 """Debugger agent for fixing code errors with learning."""
 from typing import Dict, Any, Optional
-from openai import OpenAI
-from mcp_codegen.config import OPENAI_API_KEY, CODE_MODEL
+from agents.learning_memory import LEARNING_AVAILABLE
+from mcp_codegen.config import CODE_MODEL
+from mcp_codegen.llm import get_async_openai_client
 from mcp_codegen.rag.store import RAGStore
 
-try:
-    from agents.learning_memory import get_learning_memory
-    LEARNING_AVAILABLE = True
-except ImportError:
-    LEARNING_AVAILABLE = False
-
 
 class DebugAgent:
     """Debug and fix code errors using LLM with RAG and learning."""
     
     def __init__(self, rag_store: RAGStore):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
         self.rag = rag_store
-        self.learning_memory = get_learning_memory() if LEARNING_AVAILABLE else None
+        self._learning_memory = None
+    
+    @property
+    def client(self):
+        """Shared AsyncOpenAI client, constructed on first use."""
+        return get_async_openai_client()
+    
+    @property
+    def learning_memory(self):
+        """Shared learning memory, loaded on first use (None if unavailable)."""
+        if self._learning_memory is None and LEARNING_AVAILABLE:
+            from agents.learning_memory import get_learning_memory
+            self._learning_memory = get_learning_memory()
+        return self._learning_memory
     
     async def fix_error(
         self,
@@ -49,7 +56,7 @@ class DebugAgent:
             )
         
         # 2. Search RAG store for code patterns
-        rag_results = self.rag.retrieve_similar(f"Error: {error}", n_results=3)
+        rag_results = await self.rag.aretrieve_similar(f"Error: {error}", n_results=3)
         
         # 3. Combine search results for context
         all_context = {
@@ -125,7 +132,7 @@ class DebugAgent:
         )
         
         # Also add to RAG store for deep semantic search
-        self.rag.add_code_example(
+        await self.rag.aadd_code_example(
             code=fix_result.get("fixed_code", ""),
             metadata={
                 "type": "error_fix",
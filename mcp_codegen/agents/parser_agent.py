@@ -1,21 +1,23 @@
 """Parser agent for extracting requirements from documents."""
 import json
 from typing import Dict, Any
-from openai import OpenAI
-from mcp_codegen.config import OPENAI_API_KEY, CODE_MODEL
+from mcp_codegen.config import CODE_MODEL
+from mcp_codegen.files import read_text
+from mcp_codegen.llm import get_async_openai_client
 
 
 class ParserAgent:
     """Parse PRD/README documents using LLM."""
     
-    def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+    @property
+    def client(self):
+        """Shared AsyncOpenAI client, constructed on first use."""
+        return get_async_openai_client()
     
     async def parse_prd(self, doc_path: str) -> Dict[str, Any]:
         """Parse document into structured requirements."""
         # Read document
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = await read_text(doc_path)
         
         # Use LLM to extract requirements
         # TODO: Implement actual LLM call
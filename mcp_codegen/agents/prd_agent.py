@@ -1,25 +1,18 @@
 """PRD agent for creating product requirements documents from ideas."""
+import asyncio
 import json
-from typing import Dict, Any
-from openai import OpenAI
-from mcp_codegen.config import OPENAI_API_KEY, CODE_MODEL
+from typing import Dict, Any, List, Optional
 
+from agents.llm_cache import cache_key, get_llm_cache
+from agents.llm_usage import CallTimer
+from agents.model_router import get_model_router
+from agents.stream_writer import AtomicStreamWriter
+from mcp_codegen.files import read_text
+from mcp_codegen.llm import get_async_openai_client
+from mcp_codegen.metrics import metrics
+from mcp_codegen.progress import ProgressReporter
 
-class PRDAgent:
-    """Create PRD documents from user ideas."""
-    
-    def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-    
-    async def create_prd(self, idea: str, output_path: str) -> Dict[str, Any]:
-        """Create a PRD document from an idea."""
-        # Use LLM to generate structured PRD
-        response = self.client.chat.completions.create(
-            model=CODE_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert product manager who creates detailed Product Requirements Documents (PRDs).
+PRD_SYSTEM_PROMPT = """You are an expert product manager who creates detailed Product Requirements Documents (PRDs).
 Write a comprehensive PRD with the following structure:
 - Summary: Brief overview
 - Goals & Non-Goals: Clear objectives and what's out of scope
@@ -28,20 +21,134 @@ Write a comprehensive PRD with the following structure:
 - Milestones: M1 (MVP) and M2 (Polish) with specific deliverables
 - Tech Stack: Recommended technologies with rationale
 - Success Metrics: Measurable outcomes"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Create a PRD for: {idea}"
-                }
-            ]
-        )
+
+# Sections the system prompt asks for; used as the progress total
+PRD_SECTIONS = 7
+
+
+def build_prd_messages(idea: str) -> List[Dict[str, Any]]:
+    """Chat messages that ask the LLM for a PRD for ``idea``."""
+    return [
+        {"role": "system", "content": PRD_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Create a PRD for: {idea}"}
+    ]
+
+
+class PRDAgent:
+    """Create PRD documents from user ideas."""
+    
+    @property
+    def client(self):
+        """Shared AsyncOpenAI client, constructed on first use."""
+        return get_async_openai_client()
+    
+    async def create_prd(
+        self,
+        idea: str,
+        output_path: str,
+        progress: Optional[ProgressReporter] = None,
+        latency_budget_s: Optional[float] = None,
+        use_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Create a PRD document from an idea.
+        
+        The completion is streamed into a ``.partial`` file next to
+        ``output_path`` (one per request, with file I/O on a worker thread),
+        which is renamed to ``output_path`` once the PRD is complete. Each finished
+        section is reported through ``progress``, so clients can read the
+        partial file before generation ends. If the call fails or is
+        cancelled, the partial file is removed and an existing PRD at
+        ``output_path`` is left untouched.
         
-        prd_content = response.choices[0].message.content
+        The model is chosen by the model router; if it fails, the PRD is
+        generated again from the start with the next tier's model.
         
-        # Write to file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(prd_content)
+        Every call generates a fresh PRD unless ``use_cache`` is set, in
+        which case a PRD cached for the same idea and model is replayed.
+        Generated PRDs are always stored in the shared LLM response cache.
+        """
+        progress = progress or ProgressReporter()
+        messages = build_prd_messages(idea)
+        router = get_model_router()
+        decision = router.route("prd", messages, latency_budget_s=latency_budget_s)
+        # Sections already reported; a fallback attempt only reports beyond it
+        reported = 0
         
+        async def generate(model: str) -> Dict[str, Any]:
+            nonlocal reported
+            headings = []
+            timer = CallTimer("prd_agent", model, streamed=True)
+            usage = None
+            
+            # Replays of the same idea are served from the shared LLM response cache on request
+            cache = get_llm_cache()
+            key = cache_key(model, messages)
+            cached = await asyncio.to_thread(cache.get, key) if use_cache else None
+            if cached is not None:
+                async with AtomicStreamWriter(output_path) as writer:
+                    await writer.awrite(cached)
+                timer.record(cache_hit=True)
+                await progress.report(PRD_SECTIONS, PRD_SECTIONS, f"PRD written to {output_path} (cached)")
+                return self._result(idea, output_path)
+            
+            options = decision.call_options(model)
+            client = self.client
+            if options["max_attempts"] == 1:
+                # Fail over to the next tier instead of retrying this one
+                client = client.with_options(max_retries=0)
+            kwargs = {"timeout": options["timeout"]} if options["timeout"] else {}
+            
+            # Use LLM to generate structured PRD
+            try:
+                # Only waits on the API count as LLM time, not file writes or progress
+                with metrics.accumulated("llm") as llm_wait:
+                    async with AtomicStreamWriter(output_path) as writer:
+                        timer.sent()
+                        with llm_wait.running():
+                            stream = await client.chat.completions.create(
+                                model=model,
+                                messages=messages,
+                                stream=True,
+                                stream_options={"include_usage": True},
+                                **kwargs
+                            )
+                        async for chunk in llm_wait.stream(stream):
+                            # The final chunk carries the token usage (and no choices)
+                            usage = getattr(chunk, "usage", None) or usage
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if not delta:
+                                continue
+                            timer.first_token()
+                            
+                            # A new (sub)heading means the previous section is complete
+                            for line in await writer.awrite(delta):
+                                if not line.startswith("#") or line.startswith("###"):
+                                    continue
+                                if len(headings) > reported:
+                                    reported = len(headings)
+                                    await progress.report(
+                                        len(headings),
+                                        max(len(headings) + 1, PRD_SECTIONS),
+                                        f"Finished section: {headings[-1]}"
+                                    )
+                                headings.append(line.lstrip("#").strip())
+            except BaseException as e:
+                timer.record(error=e)
+                raise
+            timer.record(usage=usage)
+            
+            # The response only lives on disk; read it back once for the cache
+            prd_content = await read_text(output_path)
+            await asyncio.to_thread(cache.put, key, model, prd_content)
+            done = max(len(headings), PRD_SECTIONS)
+            await progress.report(done, done, f"PRD written to {output_path}")
+            
+            return self._result(idea, output_path)
+        
+        return await router.acall_with_fallback(decision, generate)
+    
+    @staticmethod
+    def _result(idea: str, output_path: str) -> Dict[str, Any]:
         return {
             "prd_path": output_path,
             "status": "created",
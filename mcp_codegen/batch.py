@@ -0,0 +1,393 @@
+"""Offline batch generation of PRDs and parsed intents.
+
+Reads a JSONL file of jobs, one per line::
+
+    {"id": "todo-app", "type": "prd", "idea": "A todo app with auth"}
+    {"id": "shop", "type": "intent", "request": "An online shop for tea"}
+
+and writes one JSONL result per job as soon as it completes. The results
+file doubles as the progress log: a rerun skips every job that already has
+an ``"ok"`` result, so an interrupted run resumes where it stopped (failed
+jobs are retried and their new result is appended after the old one).
+
+The LLM work is delegated to a pluggable backend:
+
+- ``WorkerPoolBackend`` sends ordinary completions from a bounded thread
+  pool (through the shared LLM response cache, which retried and PRD jobs bypass)
+- ``OpenAIBatchBackend`` packs jobs into OpenAI Batch API submissions;
+  submitted batch ids are kept in ``<output>.state.json`` so a resumed run
+  polls the existing batches instead of paying for them twice
+- ``StubBackend`` returns deterministic local responses, for tests and dry runs
+"""
+import abc
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ("prd", "intent")
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Called once per finished request with either the content or an error
+ResultCallback = Callable[["BatchRequest", Optional[str], Optional[str]], None]
+
+
+@dataclass
+class BatchRequest:
+    """One chat completion to run for a job."""
+    id: str
+    type: str
+    model: str
+    messages: List[Dict[str, Any]]
+    response_format: Optional[Dict[str, Any]] = None
+    job: Optional[Dict[str, Any]] = None
+    # An earlier run recorded an error for this job
+    retry: bool = False
+
+
+def build_request(job: Dict[str, Any]) -> BatchRequest:
+    """Turn an input job into the same completion the interactive agent would send.
+
+    The model is chosen by the model router as for interactive calls (batch
+    jobs have no latency budget and no fallback, since a batch submission
+    names one model). These decisions are not counted in the router's
+    stats, which describe interactive traffic.
+    """
+    from agents.model_router import get_model_router
+    job_type = job.get("type")
+    if job_type == "prd":
+        from mcp_codegen.agents.prd_agent import build_prd_messages
+        if not job.get("idea"):
+            raise ValueError(f"PRD job {job['id']} has no 'idea'")
+        messages = build_prd_messages(job["idea"])
+        model = get_model_router().route("prd", messages, record=False).model
+        return BatchRequest(job["id"], job_type, model, messages, job=job)
+    if job_type == "intent":
+        from agents.subagents import intent_parser
+        if not job.get("request"):
+            raise ValueError(f"Intent job {job['id']} has no 'request'")
+        messages = intent_parser.build_messages(job["request"])
+        return BatchRequest(
+            job["id"],
+            job_type,
+            get_model_router().route("intent", messages, record=False).model,
+            messages,
+            response_format=intent_parser.INTENT_RESPONSE_FORMAT,
+            job=job,
+        )
+    raise ValueError(f"Job {job.get('id')} has unknown type {job_type!r} (expected one of {JOB_TYPES})")
+
+
+def load_jobs(path: Union[str, Path]) -> List[BatchRequest]:
+    """Read and validate the input JSONL; jobs without an id get ``line-<n>``."""
+    requests, seen = [], set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON: {e}") from e
+            job["id"] = str(job.get("id") or f"line-{line_no}")
+            if job["id"] in seen:
+                raise ValueError(f"{path}:{line_no}: duplicate job id {job['id']!r}")
+            seen.add(job["id"])
+            requests.append(build_request(job))
+    return requests
+
+
+def read_result_ids(output_path: Path) -> Tuple[Set[str], Set[str]]:
+    """Ids with an ``ok`` result and ids with only errors; a torn last line from a crash is cut off."""
+    completed, failed = set(), set()
+    if not output_path.exists():
+        return completed, failed
+    with open(output_path, "rb+") as f:
+        offset = 0
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                logger.warning(f"Truncating incomplete result line in {output_path}")
+                f.truncate(offset)
+                break
+            offset += len(raw)
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+            else:
+                failed.add(record["id"])
+    return completed, failed - completed
+
+
+class BatchState:
+    """Remote batch ids submitted by this run, persisted next to the output."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.data: Dict[str, Any] = {"batches": {}}
+        if self.path.exists():
+            self.data = json.loads(self.path.read_text(encoding="utf-8"))
+
+    @property
+    def batches(self) -> Dict[str, Dict[str, Any]]:
+        return self.data["batches"]
+
+    def save(self) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class BatchBackend(abc.ABC):
+    """Runs completions for a list of requests, reporting each as it finishes."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def run(self, requests: List[BatchRequest], on_result: ResultCallback, state: BatchState) -> None:
+        """Run ``requests`` and call ``on_result`` once for each."""
+
+
+class WorkerPoolBackend(BatchBackend):
+    """Bounded concurrent pool of ordinary chat completions."""
+
+    name = "pool"
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _complete(request: BatchRequest) -> str:
+        from agents.llm import chat_completion
+        return chat_completion(
+            request.messages,
+            model=request.model,
+            response_format=request.response_format,
+            agent=f"batch_{request.type}",
+            # A retried job must not be answered with the response that failed it,
+            # and a PRD job asks for a new PRD even if the idea was seen before
+            bypass_cache=True if request.retry or request.type == "prd" else None,
+            validate=json.loads if request.type == "intent" else None,
+        )
+
+    def run(self, requests: List[BatchRequest], on_result: ResultCallback, state: BatchState) -> None:
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch") as pool:
+            futures = {pool.submit(self._complete, request): request for request in requests}
+            try:
+                for future in as_completed(futures):
+                    request = futures[future]
+                    try:
+                        content, error = future.result(), None
+                    except Exception as e:
+                        content, error = None, f"{type(e).__name__}: {e}"
+                    on_result(request, content, error)
+            except BaseException:
+                # Interrupted: drop queued work, results so far are already on disk
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+class StubBackend(BatchBackend):
+    """Deterministic local responses; no network access."""
+
+    name = "stub"
+
+    def __init__(self, respond: Optional[Callable[[BatchRequest], str]] = None):
+        self.respond = respond or self.default_response
+
+    @staticmethod
+    def default_response(request: BatchRequest) -> str:
+        digest = hashlib.sha256(json.dumps(request.messages, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+        if request.type == "intent":
+            return json.dumps({"project_name": f"project-{digest}", "required_features": []})
+        return f"# PRD {digest}\n\n## Summary\nStub PRD for job {request.id}.\n"
+
+    def run(self, requests: List[BatchRequest], on_result: ResultCallback, state: BatchState) -> None:
+        for request in requests:
+            try:
+                content, error = self.respond(request), None
+            except Exception as e:
+                content, error = None, f"{type(e).__name__}: {e}"
+            on_result(request, content, error)
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: cheaper, asynchronous, separate rate limits."""
+
+    name = "openai"
+
+    def __init__(self, client=None, max_requests_per_batch: int = 1000, poll_interval: float = 30.0):
+        self._client = client
+        self.max_requests_per_batch = max_requests_per_batch
+        self.poll_interval = poll_interval
+
+    @property
+    def client(self):
+        if self._client is None:
+            from agents.llm import get_openai_client
+            self._client = get_openai_client()
+        return self._client
+
+    def _submit(self, requests: List[BatchRequest], state: BatchState) -> str:
+        lines = []
+        for request in requests:
+            body: Dict[str, Any] = {"model": request.model, "messages": request.messages}
+            if request.response_format is not None:
+                body["response_format"] = request.response_format
+            lines.append(json.dumps({"custom_id": request.id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}))
+        upload = self.client.files.create(
+            file=("batch_input.jsonl", ("\n".join(lines) + "\n").encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        state.batches[batch.id] = {"ids": [r.id for r in requests], "done": False}
+        state.save()
+        logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    def _wait(self, batch_id: str):
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_BATCH_STATUSES:
+                return batch
+            counts = getattr(batch, "request_counts", None)
+            if counts is not None:
+                logger.info(f"Batch {batch_id} {batch.status}: {counts.completed}/{counts.total} done")
+            time.sleep(self.poll_interval)
+
+    def _lines(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        text = self.client.files.content(file_id).text
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def _collect(self, batch_id: str, pending: Dict[str, BatchRequest], on_result: ResultCallback, state: BatchState) -> None:
+        batch = self._wait(batch_id)
+        for line in self._lines(batch.output_file_id) + self._lines(getattr(batch, "error_file_id", None)):
+            request = pending.pop(line.get("custom_id"), None)
+            if request is None:
+                continue
+            response = line.get("response") or {}
+            if response.get("status_code") == 200:
+                on_result(request, response["body"]["choices"][0]["message"]["content"], None)
+            else:
+                error = line.get("error") or response.get("body", {}).get("error") or response
+                on_result(request, None, f"Batch request failed: {error}")
+        for custom_id in state.batches[batch_id]["ids"]:
+            request = pending.pop(custom_id, None)
+            if request is not None:
+                on_result(request, None, f"No result in batch {batch_id} (status {batch.status})")
+        state.batches[batch_id]["done"] = True
+        state.save()
+
+    def run(self, requests: List[BatchRequest], on_result: ResultCallback, state: BatchState) -> None:
+        pending = {request.id: request for request in requests}
+
+        # Resume: batches submitted before an interruption are collected, not resubmitted
+        for batch_id, info in list(state.batches.items()):
+            if not info.get("done") and any(custom_id in pending for custom_id in info["ids"]):
+                self._collect(batch_id, pending, on_result, state)
+
+        remaining = list(pending.values())
+        batch_ids = [
+            self._submit(remaining[i:i + self.max_requests_per_batch], state)
+            for i in range(0, len(remaining), self.max_requests_per_batch)
+        ]
+        for batch_id in batch_ids:
+            self._collect(batch_id, pending, on_result, state)
+
+
+def prd_filename(job_id: str) -> str:
+    """File name for a job's PRD; ids that had to be sanitized get a hash suffix.
+
+    Without the suffix ``a/b`` and ``a_b`` would both be written to ``a_b.md``.
+    """
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', job_id)
+    if safe != job_id:
+        safe += "-" + hashlib.sha256(job_id.encode("utf-8")).hexdigest()[:8]
+    return f"{safe}.md"
+
+
+def format_result(request: BatchRequest, content: Optional[str], error: Optional[str]) -> Dict[str, Any]:
+    """Result record for one job; intent responses are parsed into JSON."""
+    record: Dict[str, Any] = {"id": request.id, "type": request.type}
+    if error is None and request.type == "intent":
+        try:
+            record["parsed_intent"] = json.loads(content)
+        except (TypeError, json.JSONDecodeError) as e:
+            error = f"Invalid intent JSON: {e}"
+    elif error is None:
+        record["prd"] = content
+    record["status"] = "ok" if error is None else "error"
+    if error is not None:
+        record["error"] = error
+    return record
+
+
+def run_batch(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    backend: BatchBackend,
+    prd_dir: Optional[Union[str, Path]] = None,
+) -> Dict[str, Any]:
+    """Run every job in ``input_path`` that has no ``ok`` result in ``output_path`` yet.
+
+    Args:
+        input_path: JSONL file of jobs
+        output_path: JSONL results file (appended to; also the resume log)
+        backend: Where completions are run
+        prd_dir: Also write each PRD to ``<prd_dir>/<id>.md`` (see ``prd_filename``)
+
+    Returns:
+        Counts of total, skipped, succeeded and failed jobs
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    requests = load_jobs(input_path)
+    completed, failed = read_result_ids(output_path)
+    pending = [request for request in requests if request.id not in completed]
+    for request in pending:
+        request.retry = request.id in failed
+    summary = {"total": len(requests), "skipped": len(requests) - len(pending), "succeeded": 0, "failed": 0}
+    if not pending:
+        logger.info(f"All {len(requests)} jobs already have results in {output_path}")
+        return summary
+
+    logger.info(f"Running {len(pending)} of {len(requests)} jobs with the {backend.name} backend")
+    state = BatchState(output_path.with_name(output_path.name + ".state.json"))
+    if prd_dir is not None:
+        prd_dir = Path(prd_dir)
+        prd_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def on_result(request: BatchRequest, content: Optional[str], error: Optional[str]) -> None:
+            record = format_result(request, content, error)
+            if record["status"] == "ok" and request.type == "prd" and prd_dir is not None:
+                prd_path = prd_dir / prd_filename(request.id)
+                prd_path.write_text(content, encoding="utf-8")
+                record["prd_path"] = str(prd_path)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            summary["succeeded" if record["status"] == "ok" else "failed"] += 1
+            done = summary["succeeded"] + summary["failed"]
+            if done % 10 == 0 or done == len(pending):
+                logger.info(f"Batch progress: {done}/{len(pending)} ({summary['failed']} failed)")
+
+        backend.run(pending, on_result, state)
+
+    return summary
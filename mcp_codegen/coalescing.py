@@ -0,0 +1,117 @@
+"""Single-flight deduplication and short-TTL caching for MCP tool calls.
+
+Editors often re-issue the same tool call while the first one is still
+running. Concurrent calls with the same tool name and canonical arguments
+share one execution; idempotent tools can additionally serve repeats from a
+short-lived response cache.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def call_key(name: str, arguments: Optional[Dict[str, Any]]) -> str:
+    """Canonical key for a tool call: argument order and whitespace don't matter."""
+    return name + ":" + json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolCallCoalescer:
+    """Share in-flight executions of identical tool calls and cache idempotent results."""
+
+    def __init__(
+        self,
+        cache_ttl: float = 0.0,
+        cacheable_tools: Iterable[str] = (),
+        max_cache_entries: int = 256,
+    ):
+        """Create a coalescer.
+
+        Args:
+            cache_ttl: Seconds a cacheable tool's result is reused (0 disables caching)
+            cacheable_tools: Names of idempotent tools whose results may be cached
+            max_cache_entries: Oldest entries are evicted beyond this size
+        """
+        self.cache_ttl = cache_ttl
+        self.cacheable_tools = frozenset(cacheable_tools)
+        self.max_cache_entries = max_cache_entries
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # in-flight task -> callers currently awaiting it
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"executed": 0, "coalesced": 0, "cache_hits": 0}
+
+    def _cached(self, key: str) -> Tuple[bool, Any]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return False, None
+        return True, result
+
+    def _store(self, key: str, result: Any) -> None:
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+
+    async def run(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]],
+        execute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Run ``execute`` unless an identical call is in flight or cached.
+
+        Exceptions propagate to every caller sharing the execution and are
+        never cached. The shared execution runs as its own task, so one
+        caller being cancelled does not cancel it for the others; once every
+        caller has been cancelled, the execution is cancelled too.
+        """
+        key = call_key(name, arguments)
+        cacheable = self.cache_ttl > 0 and name in self.cacheable_tools
+
+        if cacheable:
+            hit, result = self._cached(key)
+            if hit:
+                self.stats["cache_hits"] += 1
+                return result
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.stats["executed"] += 1
+            task = asyncio.ensure_future(execute())
+            self._in_flight[key] = task
+            self._waiters[task] = 0
+
+            def _done(finished: asyncio.Task) -> None:
+                self._in_flight.pop(key, None)
+                self._waiters.pop(finished, None)
+                if cacheable and not finished.cancelled() and finished.exception() is None:
+                    self._store(key, finished.result())
+
+            task.add_done_callback(_done)
+        else:
+            self.stats["coalesced"] += 1
+            logger.debug(f"Coalesced duplicate {name} call")
+
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(task) == 1:
+                logger.info(f"All callers of {name} cancelled; cancelling execution")
+                task.cancel()
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
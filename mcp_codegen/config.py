@@ -7,6 +7,8 @@ from pathlib import Path
 
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# OpenAI-compatible endpoint; point at the local stub (scripts/run_llm_stub.py) for offline runs
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 
 # ChromaDB settings
 CHROMA_DIR = Path("./chroma_db")
@@ -16,6 +18,12 @@ CHROMA_COLLECTION = "code_patterns"
 EMBEDDING_MODEL = "text-embedding-3-small"
 CODE_MODEL = "gpt-4-turbo"
 
+# LLM HTTP client (one pooled keep-alive connection pool shared by all agents)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = 60.0  # seconds an idle connection stays open
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # seconds per request
+
 # Code execution
 EXECUTION_TIMEOUT = 30  # seconds
 SANDBOX_ENABLED = False  # Enable Docker sandboxing
@@ -24,6 +32,41 @@ SANDBOX_ENABLED = False  # Enable Docker sandboxing
 RETRIEVAL_K = 5  # Number of similar results to retrieve
 SIMILARITY_THRESHOLD = 0.7
 
+# Transport: "stdio" (one process per editor) or "http" (streamable HTTP/SSE,
+# one long-running process shared by many clients)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_HTTP_HOST = os.getenv("MCP_HTTP_HOST", "127.0.0.1")
+MCP_HTTP_PORT = int(os.getenv("MCP_HTTP_PORT", "8765"))
+MAX_CONCURRENT_CALLS_PER_CLIENT = int(os.getenv("MCP_MAX_CONCURRENT_CALLS_PER_CLIENT", "4"))  # 0 = unlimited
+
+# Admission control: each tool has a cost class; classes have their own
+# concurrency cap and queue depth and share ADMISSION_TOTAL_SLOTS.
+# (name, priority (lower first), max concurrent, max queued)
+ADMISSION_CLASSES = [
+    ("interactive", 0, 8, 64),
+    ("standard", 1, 4, 16),
+    ("batch", 2, 2, 8),
+]
+ADMISSION_TOTAL_SLOTS = int(os.getenv("MCP_ADMISSION_TOTAL_SLOTS", "10"))
+TOOL_COST_CLASSES = {
+    "retrieve_context": "interactive",
+    "parse_prd": "interactive",
+    "search_learned_solutions": "interactive",
+    "get_learning_stats": "interactive",
+    "debug_error": "standard",
+    "create_prd": "batch",
+    "generate_project": "batch",
+}
+
+# Tool call coalescing: identical concurrent calls always share one execution;
+# results of idempotent tools are also reused for this many seconds (0 = off)
+TOOL_CACHE_TTL = float(os.getenv("MCP_TOOL_CACHE_TTL", "0"))
+CACHEABLE_TOOLS = ("retrieve_context", "parse_prd", "search_learned_solutions", "get_learning_stats")
+
+# Metrics: optionally dump Prometheus text format to this file every interval
+METRICS_FILE = os.getenv("MCP_METRICS_FILE") or None
+METRICS_DUMP_INTERVAL = float(os.getenv("MCP_METRICS_DUMP_INTERVAL", "15"))  # seconds
+
 # Debugging
 MAX_RETRIES = 3  # Max fix attempts per error
 DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
@@ -0,0 +1,23 @@
+"""Non-blocking file helpers for the async agents.
+
+Reads and writes run on a worker thread so a slow disk never stalls the
+event loop that is serving other tool calls.
+"""
+import asyncio
+from pathlib import Path
+from typing import Union
+
+
+def _write_text(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+async def read_text(path: Union[str, Path]) -> str:
+    """Read a UTF-8 text file off the event loop."""
+    return await asyncio.to_thread(Path(path).read_text, encoding="utf-8")
+
+
+async def write_text(path: Union[str, Path], content: str) -> None:
+    """Write a UTF-8 text file off the event loop, creating parent directories."""
+    await asyncio.to_thread(_write_text, Path(path), content)
@@ -0,0 +1,46 @@
+"""Per-client concurrency limits for the MCP server.
+
+When one process serves many editor sessions over HTTP, a single client
+firing dozens of tool calls must not starve the others. Each client gets its
+own semaphore; calls beyond the limit wait for one of that client's earlier
+calls to finish.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, Tuple
+
+
+class ClientConcurrencyLimiter:
+    """Cap the number of tool calls running at once for each client."""
+
+    def __init__(self, max_per_client: int = 4):
+        self.max_per_client = max_per_client
+        # client -> (semaphore, number of calls holding or waiting for it)
+        self._clients: Dict[Hashable, Tuple[asyncio.Semaphore, int]] = {}
+
+    def in_flight(self, client: Hashable) -> int:
+        """Calls currently running or queued for a client."""
+        entry = self._clients.get(client)
+        return entry[1] if entry else 0
+
+    @asynccontextmanager
+    async def slot(self, client: Hashable) -> AsyncIterator[None]:
+        """Hold one of the client's slots for the duration of the block."""
+        if self.max_per_client <= 0:
+            yield
+            return
+
+        semaphore, users = self._clients.get(client, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_client)
+        self._clients[client] = (semaphore, users + 1)
+        try:
+            async with semaphore:
+                yield
+        finally:
+            # Drop the entry once the client has nothing running or queued
+            semaphore, users = self._clients[client]
+            if users <= 1:
+                del self._clients[client]
+            else:
+                self._clients[client] = (semaphore, users - 1)
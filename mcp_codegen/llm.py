@@ -0,0 +1,48 @@
+"""Shared OpenAI client for the MCP CodeGen agents."""
+from mcp_codegen.config import (
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_TIMEOUT,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+)
+
+_async_client = None
+
+
+def get_async_openai_client():
+    """Get or create the shared AsyncOpenAI client.
+
+    The openai package is imported and the client constructed on first use,
+    so the server can answer ``list_tools`` without paying for either. All
+    agents share one HTTP connection pool with keep-alive, so concurrent
+    tool calls reuse warm TLS connections instead of each opening its own,
+    and awaiting a completion never blocks the server's event loop.
+    """
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0)
+        )
+        _async_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            http_client=http_client
+        )
+    return _async_client
+
+
+async def aclose_clients() -> None:
+    """Close the shared async client's connection pool (on server shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
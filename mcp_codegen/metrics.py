@@ -0,0 +1,250 @@
+"""Latency histograms, in-flight gauges and error counters for the MCP server.
+
+Each tool call's handler is timed, and the time the call spent waiting
+for a client slot, a coalesced execution or admission before its handler
+started is recorded separately as queue wait. Time spent inside the LLM,
+the embedding API and ChromaDB is recorded with ``timed(component)`` (or
+``accumulated`` for waits spread over a stream) and attributed both
+globally and to the tool call that caused it (the current tool travels in
+a context variable, which the RAG store's thread pools copy along with
+each job). ``snapshot()`` backs the
+``get_server_metrics`` tool; ``to_prometheus()`` renders the same data in
+the Prometheus text exposition format.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterator, List, Optional, Sequence, TypeVar, Union
+
+T = TypeVar("T")
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is +Inf
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+_current_tool: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_tool", default=None)
+# perf_counter() when the current tool call arrived, for its queue wait
+_tool_arrived: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("tool_arrived", default=None)
+
+
+class LatencyHistogram:
+    """Bucketed latency distribution with interpolated percentiles."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th quantile (0-1), interpolating within its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(estimate, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.sum / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(0.50), 2),
+            "p95_ms": round(1000 * self.percentile(0.95), 2),
+            "p99_ms": round(1000 * self.percentile(0.99), 2),
+            "max_ms": round(1000 * self.max, 2),
+        }
+
+
+class Stopwatch:
+    """Sums the time of several separate waits, e.g. on each chunk of a stream."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    @contextmanager
+    def running(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    async def stream(self, iterable: AsyncIterable[T]) -> AsyncIterator[T]:
+        """Yield from ``iterable``, counting only the time spent waiting on it."""
+        iterator = iterable.__aiter__()
+        while True:
+            with self.running():
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield item
+
+
+class ServerMetrics:
+    """Per-tool and per-component latency, in-flight and error metrics."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.tool_latency: Dict[str, LatencyHistogram] = {}
+        self.queue_wait: Dict[str, LatencyHistogram] = {}
+        self.component_latency: Dict[str, LatencyHistogram] = {}
+        # tool -> component -> seconds spent in that component
+        self.tool_component_seconds: Dict[str, Dict[str, float]] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def _histogram(self, table: Dict[str, LatencyHistogram], key: str) -> LatencyHistogram:
+        if key not in table:
+            table[key] = LatencyHistogram(self.buckets)
+        return table[key]
+
+    @asynccontextmanager
+    async def track_tool(self, name: str) -> AsyncIterator[None]:
+        """Count a tool call as in flight from arrival and count failures (not cancellations).
+
+        Latency is recorded by ``handler`` once the call starts executing.
+        """
+        with self._lock:
+            self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        token = _current_tool.set(name)
+        arrived_token = _tool_arrived.set(time.perf_counter())
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        finally:
+            _tool_arrived.reset(arrived_token)
+            _current_tool.reset(token)
+            with self._lock:
+                self.in_flight[name] -= 1
+
+    @asynccontextmanager
+    async def handler(self, name: str) -> AsyncIterator[None]:
+        """Time a tool's handler and record how long the call queued before it."""
+        start = time.perf_counter()
+        arrived = _tool_arrived.get()
+        if arrived is not None:
+            with self._lock:
+                self._histogram(self.queue_wait, name).observe(start - arrived)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._histogram(self.tool_latency, name).observe(elapsed)
+
+    @contextmanager
+    def timed(self, component: str) -> Iterator[None]:
+        """Time a block of LLM, embedding or ChromaDB work."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(component, time.perf_counter() - start)
+
+    @contextmanager
+    def accumulated(self, component: str) -> Iterator[Stopwatch]:
+        """Record the summed time of the stopwatch's waits as one observation."""
+        stopwatch = Stopwatch()
+        try:
+            yield stopwatch
+        finally:
+            self.observe(component, stopwatch.seconds)
+
+    def observe(self, component: str, seconds: float) -> None:
+        tool = _current_tool.get()
+        with self._lock:
+            self._histogram(self.component_latency, component).observe(seconds)
+            if tool is not None:
+                breakdown = self.tool_component_seconds.setdefault(tool, {})
+                breakdown[component] = breakdown.get(component, 0.0) + seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of every metric."""
+        with self._lock:
+            tools = {}
+            for name in sorted(set(self.tool_latency) | set(self.in_flight) | set(self.errors)):
+                histogram = self.tool_latency.get(name, LatencyHistogram(self.buckets))
+                queue_wait = self.queue_wait.get(name, LatencyHistogram(self.buckets))
+                tools[name] = {
+                    **histogram.summary(),
+                    "queue_wait": queue_wait.summary(),
+                    "in_flight": self.in_flight.get(name, 0),
+                    "errors": self.errors.get(name, 0),
+                    "breakdown_ms": {
+                        component: round(1000 * seconds, 2)
+                        for component, seconds in sorted(self.tool_component_seconds.get(name, {}).items())
+                    },
+                }
+            return {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "tools": tools,
+                "components": {
+                    name: histogram.summary() for name, histogram in sorted(self.component_latency.items())
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def histogram_lines(metric: str, label: str, table: Dict[str, LatencyHistogram]) -> None:
+            lines.append(f"# TYPE {metric} histogram")
+            for key, histogram in sorted(table.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(list(histogram.bounds) + ["+Inf"], histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{key}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{{label}="{key}"}} {histogram.count}')
+
+        with self._lock:
+            histogram_lines("mcp_tool_latency_seconds", "tool", self.tool_latency)
+            histogram_lines("mcp_tool_queue_wait_seconds", "tool", self.queue_wait)
+            lines.append("# TYPE mcp_tool_in_flight gauge")
+            lines.extend(f'mcp_tool_in_flight{{tool="{name}"}} {count}' for name, count in sorted(self.in_flight.items()))
+            lines.append("# TYPE mcp_tool_errors_total counter")
+            lines.extend(f'mcp_tool_errors_total{{tool="{name}"}} {count}' for name, count in sorted(self.errors.items()))
+            histogram_lines("mcp_component_latency_seconds", "component", self.component_latency)
+            lines.append("# TYPE mcp_tool_component_seconds_total counter")
+            for tool, breakdown in sorted(self.tool_component_seconds.items()):
+                lines.extend(
+                    f'mcp_tool_component_seconds_total{{tool="{tool}",component="{component}"}} {seconds}'
+                    for component, seconds in sorted(breakdown.items())
+                )
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path: Union[str, Path]) -> None:
+        """Atomically write the Prometheus text format to ``path`` (for node_exporter's textfile collector)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+metrics = ServerMetrics()
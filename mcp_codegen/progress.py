@@ -0,0 +1,57 @@
+"""MCP progress notifications for long-running tools.
+
+A client that wants progress sends a ``progressToken`` in the request's
+``_meta``; tools then report each step (a generated file, a finished PRD
+section) as it happens instead of going silent until the final result.
+Without a token, reporting is a no-op.
+"""
+import logging
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Send ``notifications/progress`` for the request that started a tool call."""
+
+    def __init__(
+        self,
+        session: Any = None,
+        token: Optional[Union[str, int]] = None,
+        request_id: Optional[Union[str, int]] = None,
+    ):
+        self.session = session
+        self.token = token
+        self.request_id = request_id
+        self.progress = 0.0
+
+    @classmethod
+    def from_request_context(cls, ctx: Any) -> "ProgressReporter":
+        """Reporter for an MCP request context (no-op if no progress was requested)."""
+        token = getattr(ctx.meta, "progressToken", None) if ctx.meta else None
+        return cls(ctx.session, token, ctx.request_id)
+
+    @property
+    def enabled(self) -> bool:
+        return self.session is not None and self.token is not None
+
+    async def report(
+        self,
+        progress: float,
+        total: Optional[float] = None,
+        message: Optional[str] = None,
+    ) -> None:
+        """Report progress; failures to notify never fail the tool call."""
+        self.progress = progress
+        if not self.enabled:
+            return
+        try:
+            await self.session.send_progress_notification(
+                self.token,
+                progress,
+                total=total,
+                message=message,
+                related_request_id=str(self.request_id) if self.request_id is not None else None
+            )
+        except Exception as e:
+            logger.debug(f"Could not send progress notification: {e}")
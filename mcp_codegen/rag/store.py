@@ -1,10 +1,15 @@
 """Vector store wrapper for RAG."""
 import os
-from typing import List, Dict, Any
-import chromadb
-from chromadb.utils import embedding_functions
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
-from mcp_codegen.config import CHROMA_DIR, CHROMA_COLLECTION, OPENAI_API_KEY, EMBEDDING_MODEL
+from agents.executors import RAG_READ_CONCURRENCY, RAG_WRITE_CONCURRENCY, ReadWriteExecutor
+from agents.mmr import DEFAULT_MMR_LAMBDA, default_fetch_k
+from mcp_codegen.config import (
+    CHROMA_DIR, CHROMA_COLLECTION, OPENAI_API_KEY, OPENAI_BASE_URL, EMBEDDING_MODEL
+)
+from mcp_codegen.metrics import metrics
 
 
 class RAGStore:
@@ -13,45 +18,146 @@ class RAGStore:
     def __init__(self):
         self.client = None
         self.collection = None
+        self.embedding_fn = None
         self.initialized = False
+        self._init_lock = threading.Lock()
+        self.executor = ReadWriteExecutor(
+            "rag-store",
+            read_workers=RAG_READ_CONCURRENCY,
+            write_workers=RAG_WRITE_CONCURRENCY
+        )
     
     async def initialize(self):
-        """Initialize ChromaDB client and collection."""
+        """Initialize ChromaDB client and collection.
+        
+        chromadb is imported here rather than at module load, and the blocking
+        client construction runs on the write pool.
+        """
         if self.initialized:
             return
+        await self.executor.run_write(self._initialize_sync)
+    
+    def _initialize_sync(self):
+        """Import chromadb and open the persistent collection."""
+        import chromadb
+        from chromadb.utils import embedding_functions
         
-        self.client = chromadb.PersistentClient(path=str(CHROMA_DIR))
-        
-        embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
-            api_key=OPENAI_API_KEY,
-            model_name=EMBEDDING_MODEL
-        )
-        
-        self.collection = self.client.get_or_create_collection(
-            name=CHROMA_COLLECTION,
-            embedding_function=embedding_fn
-        )
-        
-        self.initialized = True
+        with self._init_lock:
+            if self.initialized:
+                return
+            
+            self.client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+            
+            self.embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
+                api_key=OPENAI_API_KEY,
+                model_name=EMBEDDING_MODEL,
+                api_base=OPENAI_BASE_URL
+            )
+            
+            self.collection = self.client.get_or_create_collection(
+                name=CHROMA_COLLECTION,
+                embedding_function=self.embedding_fn
+            )
+            
+            self.initialized = True
+    
+    def close(self):
+        """Shut down the store's read and write thread pools."""
+        self.executor.shutdown()
+    
+    def _embed(self, texts: List[str]) -> List[Any]:
+        """Embed texts with the store's embedding function."""
+        with metrics.timed("embedding"):
+            return list(self.embedding_fn(texts))
     
     def add_code_example(self, code: str, metadata: Dict[str, Any]):
         """Add a code example to the store."""
         import uuid
-        self.collection.add(
-            documents=[code],
-            metadatas=[metadata],
-            ids=[str(uuid.uuid4())]
-        )
+        # ingested_at lets garbage collection keep the newest of duplicate entries
+        metadata = {"ingested_at": datetime.utcnow().isoformat(), **metadata}
+        # Embed explicitly so embedding and Chroma time are measured separately
+        embeddings = self._embed([code])
+        with metrics.timed("chroma"):
+            self.collection.add(
+                documents=[code],
+                metadatas=[metadata],
+                embeddings=embeddings,
+                ids=[str(uuid.uuid4())]
+            )
     
-    def retrieve_similar(self, query: str, n_results: int = 5) -> Dict[str, Any]:
-        """Retrieve similar code examples."""
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+    async def aadd_code_example(self, code: str, metadata: Dict[str, Any]):
+        """Add a code example without blocking the event loop."""
+        await self.initialize()
+        await self.executor.run_write(self.add_code_example, code, metadata)
+    
+    def retrieve_similar(
+        self,
+        query: str,
+        n_results: int = 5,
+        use_mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: float = DEFAULT_MMR_LAMBDA
+    ) -> Dict[str, Any]:
+        """Retrieve similar code examples.
+        
+        With ``use_mmr`` the store over-fetches ``fetch_k`` candidates
+        (default: 4 * n_results) and re-ranks them with maximal marginal
+        relevance to drop near-duplicates.
+        """
+        if use_mmr:
+            return self._retrieve_mmr(query, n_results, fetch_k or default_fetch_k(n_results), lambda_mult)
+        
+        query_embedding = self._embed([query])[0]
+        with metrics.timed("chroma"):
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results
+            )
         return {
             "examples": results['documents'][0],
             "metadata": results['metadatas'][0],
             "distances": results['distances'][0]
         }
-
+    
+    async def aretrieve_similar(
+        self,
+        query: str,
+        n_results: int = 5,
+        use_mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: float = DEFAULT_MMR_LAMBDA
+    ) -> Dict[str, Any]:
+        """Async variant of retrieve_similar; the Chroma query runs on the read pool."""
+        await self.initialize()
+        return await self.executor.run_read(
+            self.retrieve_similar, query, n_results, use_mmr, fetch_k, lambda_mult
+        )
+    
+    def _retrieve_mmr(
+        self,
+        query: str,
+        n_results: int,
+        fetch_k: int,
+        lambda_mult: float
+    ) -> Dict[str, Any]:
+        """Over-fetch candidates with embeddings and keep a diverse subset."""
+        from agents.mmr import maximal_marginal_relevance
+        
+        query_embedding = self._embed([query])[0]
+        with metrics.timed("chroma"):
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=max(fetch_k, n_results),
+                include=["documents", "metadatas", "distances", "embeddings"]
+            )
+        selected = maximal_marginal_relevance(
+            query_embedding,
+            results['embeddings'][0],
+            k=n_results,
+            lambda_mult=lambda_mult
+        )
+        return {
+            "examples": [results['documents'][0][i] for i in selected],
+            "metadata": [results['metadatas'][0][i] for i in selected],
+            "distances": [results['distances'][0][i] for i in selected]
+        }
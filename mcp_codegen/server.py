@@ -2,34 +2,85 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import argparse
 import asyncio
+import contextlib
 import json
+import logging
+from functools import lru_cache
+
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-from mcp_codegen.tools.parser_tool import ParserTool
-from mcp_codegen.tools.rag_tool import RAGTool
-from mcp_codegen.tools.generator_tool import GeneratorTool
-from mcp_codegen.tools.debugger_tool import DebuggerTool
-from mcp_codegen.tools.prd_tool import PRDTool
+from agents.learning_memory import LEARNING_AVAILABLE
+from mcp_codegen.admission import AdmissionController, AdmissionRejected, CostClass
+from mcp_codegen.coalescing import ToolCallCoalescer
+from mcp_codegen.config import (
+    ADMISSION_CLASSES,
+    ADMISSION_TOTAL_SLOTS,
+    CACHEABLE_TOOLS,
+    MAX_CONCURRENT_CALLS_PER_CLIENT,
+    MCP_HTTP_HOST,
+    MCP_HTTP_PORT,
+    MCP_TRANSPORT,
+    METRICS_DUMP_INTERVAL,
+    METRICS_FILE,
+    TOOL_CACHE_TTL,
+    TOOL_COST_CLASSES,
+)
+from mcp_codegen.limits import ClientConcurrencyLimiter
+from mcp_codegen.metrics import metrics
+from mcp_codegen.progress import ProgressReporter
+
+logger = logging.getLogger(__name__)
 
 app = Server("codegen")
+coalescer = ToolCallCoalescer(cache_ttl=TOOL_CACHE_TTL, cacheable_tools=CACHEABLE_TOOLS)
+client_limiter = ClientConcurrencyLimiter(MAX_CONCURRENT_CALLS_PER_CLIENT)
+admission = AdmissionController(
+    [CostClass(*params) for params in ADMISSION_CLASSES],
+    TOOL_COST_CLASSES,
+    ADMISSION_TOTAL_SLOTS
+)
+
+# Tools (and the chromadb/openai/langgraph imports behind them) are built on
+# first use so the server can answer list_tools immediately after startup.
+
+
+@lru_cache(maxsize=None)
+def get_parser():
+    from mcp_codegen.tools.parser_tool import ParserTool
+    return ParserTool()
+
+
+@lru_cache(maxsize=None)
+def get_rag_tool():
+    from mcp_codegen.tools.rag_tool import RAGTool
+    return RAGTool()
+
+
+@lru_cache(maxsize=None)
+def get_generator():
+    from mcp_codegen.tools.generator_tool import GeneratorTool
+    return GeneratorTool(get_rag_tool().rag_store)
+
+
+@lru_cache(maxsize=None)
+def get_debugger():
+    from mcp_codegen.tools.debugger_tool import DebuggerTool
+    return DebuggerTool(get_rag_tool().rag_store)
 
-# Initialize tools
-parser = ParserTool()
-rag_tool = RAGTool()
-generator = GeneratorTool(rag_tool.rag_store)
-debugger = DebuggerTool(rag_tool.rag_store)
-prd_tool = PRDTool()
 
-# Import learning memory if available
-try:
-    from agents.learning_memory import get_learning_memory
-    LEARNING_AVAILABLE = True
-    learning_memory = get_learning_memory()
-except ImportError:
-    LEARNING_AVAILABLE = False
-    learning_memory = None
+@lru_cache(maxsize=None)
+def get_prd_tool():
+    from mcp_codegen.tools.prd_tool import PRDTool
+    return PRDTool()
+
+
+@lru_cache(maxsize=None)
+def get_learning_memory():
+    from agents.learning_memory import get_learning_memory as _get_learning_memory
+    return _get_learning_memory()
 
 
 @app.list_tools()
@@ -43,7 +94,8 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "idea": {"type": "string"},
-                    "output_path": {"type": "string", "default": "docs/generated_prd.md"}
+                    "output_path": {"type": "string", "default": "docs/generated_prd.md"},
+                    "use_cache": {"type": "boolean", "default": False}
                 },
                 "required": ["idea"]
             }
@@ -66,7 +118,8 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "query": {"type": "string"},
-                    "k": {"type": "integer", "default": 5}
+                    "k": {"type": "integer", "default": 5},
+                    "mmr": {"type": "boolean", "default": False}
                 },
                 "required": ["query"]
             }
@@ -96,6 +149,16 @@ async def list_tools():
                 "required": ["code", "error"]
             }
         ),
+        Tool(
+            name="get_server_metrics",
+            description="Per-tool latency percentiles, in-flight calls, errors and LLM/embedding/Chroma time",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "format": {"type": "string", "enum": ["json", "prometheus"], "default": "json"}
+                }
+            }
+        ),
         # Learning tools (conditional)
         *([
             Tool(
@@ -125,80 +188,139 @@ async def list_tools():
     ]
 
 
+def _current_client():
+    """The session making the current request (one per connected editor)."""
+    try:
+        return app.request_context.session
+    except LookupError:
+        return None
+
+
+def _current_progress() -> ProgressReporter:
+    """Progress reporter for the current request (no-op outside a request)."""
+    try:
+        return ProgressReporter.from_request_context(app.request_context)
+    except LookupError:
+        return ProgressReporter()
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: dict):
     """Handle tool invocations."""
-    try:
-        if name == "create_prd":
-            result = await prd_tool.create(
-                arguments["idea"],
-                arguments.get("output_path", "docs/generated_prd.md")
-            )
-            return [TextContent(type="text", text=result)]
-        
-        elif name == "parse_prd":
-            result = await parser.parse(arguments["document_path"])
-            return [TextContent(type="text", text=result)]
-        
-        elif name == "retrieve_context":
-            k = arguments.get("k", 5)
-            results = await rag_tool.retrieve(arguments["query"], k)
-            return [TextContent(type="text", text=results)]
-        
-        elif name == "generate_project":
-            files = await generator.generate(
-                arguments["requirements"],
-                arguments["output_dir"]
-            )
-            return [TextContent(type="text", text=files)]
-        
-        elif name == "debug_error":
-            fix = await debugger.fix(
-                arguments["code"],
-                arguments["error"],
-                arguments.get("context", {})
-            )
-            return [TextContent(type="text", text=fix)]
-        
-        elif name == "search_learned_solutions" and LEARNING_AVAILABLE:
-            results = await learning_memory.search_solutions(
-                category=arguments.get("category", "error_fixes"),
-                query=arguments["query"],
-                limit=arguments.get("limit", 5)
-            )
-            return [TextContent(type="text", text=json.dumps(results, indent=2))]
-        
-        elif name == "get_learning_stats" and LEARNING_AVAILABLE:
-            top_solutions = await learning_memory.get_top_solutions(
-                category=arguments.get("category", "error_fixes"),
-                limit=10
-            )
-            stats = {
-                "total_solutions": len(top_solutions),
-                "top_solutions": top_solutions[:5],
-                "average_success_rate": (
-                    sum(s["success_rate"] for s in top_solutions) / len(top_solutions)
-                    if top_solutions else 0.0
-                )
-            }
-            return [TextContent(type="text", text=json.dumps(stats, indent=2))]
-        
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+    if name == "get_server_metrics":
+        # Served directly so reading metrics never waits behind other calls
+        if arguments.get("format") == "prometheus":
+            return [TextContent(type="text", text=metrics.to_prometheus())]
+        from agents.llm_cache import get_llm_cache
+        from agents.llm_usage import get_usage_tracker
+        from agents.model_router import get_model_router
+        snapshot = {
+            **metrics.snapshot(),
+            "admission": admission.snapshot(),
+            "llm_cache": get_llm_cache().stats(),
+            "llm_usage": get_usage_tracker().summary(),
+            "model_routing": get_model_router().stats()
+        }
+        return [TextContent(type="text", text=json.dumps(snapshot, indent=2))]
     
+    try:
+        async with metrics.track_tool(name):
+            async with client_limiter.slot(_current_client()):
+                # Identical concurrent calls share one execution (progress
+                # notifications go to the caller that started it)
+                return await coalescer.run(name, arguments, lambda: _admitted(name, arguments))
+    except AdmissionRejected as e:
+        return [TextContent(type="text", text=f"Tool {name} rejected: {e}")]
     except Exception as e:
         error_msg = f"Tool {name} failed: {str(e)}"
         return [TextContent(type="text", text=error_msg)]
 
 
-async def main():
-    """Run the MCP server."""
-    from mcp.server.stdio import stdio_server
+async def _admitted(name: str, arguments: dict):
+    """Wait for an execution slot in the tool's cost class, then run it."""
+    async with admission.admit(name):
+        async with metrics.handler(name):
+            return await _dispatch(name, arguments)
+
+
+async def _dispatch(name: str, arguments: dict):
+    """Execute a tool call; raises on failure."""
+    if name == "create_prd":
+        result = await get_prd_tool().create(
+            arguments["idea"],
+            arguments.get("output_path", "docs/generated_prd.md"),
+            progress=_current_progress(),
+            use_cache=arguments.get("use_cache", False)
+        )
+        return [TextContent(type="text", text=result)]
+    
+    elif name == "parse_prd":
+        result = await get_parser().parse(arguments["document_path"])
+        return [TextContent(type="text", text=result)]
+    
+    elif name == "retrieve_context":
+        k = arguments.get("k", 5)
+        results = await get_rag_tool().retrieve(
+            arguments["query"], k, use_mmr=arguments.get("mmr", False)
+        )
+        return [TextContent(type="text", text=results)]
+    
+    elif name == "generate_project":
+        files = await get_generator().generate(
+            arguments["requirements"],
+            arguments["output_dir"]
+        )
+        return [TextContent(type="text", text=files)]
     
-    # Initialize RAG store
-    await rag_tool.rag_store.initialize()
+    elif name == "debug_error":
+        fix = await get_debugger().fix(
+            arguments["code"],
+            arguments["error"],
+            arguments.get("context", {})
+        )
+        return [TextContent(type="text", text=fix)]
+    
+    elif name == "search_learned_solutions" and LEARNING_AVAILABLE:
+        results = await get_learning_memory().search_solutions(
+            category=arguments.get("category", "error_fixes"),
+            query=arguments["query"],
+            limit=arguments.get("limit", 5)
+        )
+        return [TextContent(type="text", text=json.dumps(results, indent=2))]
+    
+    elif name == "get_learning_stats" and LEARNING_AVAILABLE:
+        top_solutions = await get_learning_memory().get_top_solutions(
+            category=arguments.get("category", "error_fixes"),
+            limit=10
+        )
+        stats = {
+            "total_solutions": len(top_solutions),
+            "top_solutions": top_solutions[:5],
+            "average_success_rate": (
+                sum(s["success_rate"] for s in top_solutions) / len(top_solutions)
+                if top_solutions else 0.0
+            )
+        }
+        return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+    
+    else:
+        raise ValueError(f"Unknown tool: {name}")
+
+
+async def _dump_metrics_periodically(path: str, interval: float):
+    """Keep a Prometheus textfile up to date while the server runs."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(metrics.dump_prometheus, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file {path}: {e}")
+
+
+async def run_stdio():
+    """Serve a single client over stdio."""
+    from mcp.server.stdio import stdio_server
     
-    # Start server using stdio transport
     async with stdio_server() as (read_stream, write_stream):
         await app.run(
             read_stream,
@@ -207,6 +329,96 @@ async def main():
         )
 
 
-if __name__ == "__main__":
-    asyncio.run(main())
+async def _warm_up():
+    """Initialize the RAG store before the first client asks for it."""
+    try:
+        await get_rag_tool().rag_store.initialize()
+    except Exception as e:
+        logger.warning(f"RAG store warm-up failed: {e}")
+
 
+def build_http_app(host: str = MCP_HTTP_HOST, port: int = MCP_HTTP_PORT):
+    """Build the Starlette app that serves the MCP endpoint at /mcp.
+    
+    Each app owns its session manager, which can only be run once.
+    """
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    
+    session_manager = StreamableHTTPSessionManager(app=app)
+    
+    async def handle_mcp(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+    
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        async with session_manager.run():
+            warm_up = asyncio.create_task(_warm_up())
+            logger.info(f"MCP server listening on http://{host}:{port}/mcp")
+            try:
+                yield
+            finally:
+                warm_up.cancel()
+    
+    return Starlette(routes=[Mount("/mcp", app=handle_mcp)], lifespan=lifespan)
+
+
+async def run_http(host: str = MCP_HTTP_HOST, port: int = MCP_HTTP_PORT):
+    """Serve many clients over streamable HTTP (with SSE streaming) at /mcp.
+    
+    All sessions share this process's tool instances, RAG store, caches and
+    OpenAI connection pool, so only the first client pays for warm-up.
+    """
+    import uvicorn
+    
+    http_app = build_http_app(host, port)
+    server = uvicorn.Server(uvicorn.Config(http_app, host=host, port=port, log_level="info"))
+    await server.serve()
+
+
+async def main(transport: str = MCP_TRANSPORT, host: str = MCP_HTTP_HOST, port: int = MCP_HTTP_PORT):
+    """Run the MCP server.
+    
+    Args:
+        transport: "stdio" for one editor per process, "http" for a shared
+            long-running server
+        host: HTTP bind address
+        port: HTTP port
+    """
+    from mcp_codegen.llm import aclose_clients
+    
+    metrics_dumper = None
+    if METRICS_FILE:
+        metrics_dumper = asyncio.create_task(
+            _dump_metrics_periodically(METRICS_FILE, METRICS_DUMP_INTERVAL)
+        )
+    
+    # With stdio the RAG store initializes itself on first retrieval
+    try:
+        if transport == "http":
+            await run_http(host, port)
+        elif transport == "stdio":
+            await run_stdio()
+        else:
+            raise ValueError(f"Unknown transport: {transport}. Must be 'stdio' or 'http'")
+    finally:
+        if metrics_dumper:
+            metrics_dumper.cancel()
+            metrics.dump_prometheus(METRICS_FILE)
+        await aclose_clients()
+        if get_rag_tool.cache_info().currsize:
+            get_rag_tool().rag_store.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="MCP CodeGen server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=MCP_TRANSPORT)
+    parser.add_argument("--host", default=MCP_HTTP_HOST, help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=MCP_HTTP_PORT, help="HTTP port")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(main(args.transport, args.host, args.port))
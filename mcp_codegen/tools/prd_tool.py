@@ -1,6 +1,8 @@
 """PRD tool for creating product requirements documents."""
 import json
+from typing import Optional
 from mcp_codegen.agents.prd_agent import PRDAgent
+from mcp_codegen.progress import ProgressReporter
 
 
 class PRDTool:
@@ -9,8 +11,14 @@ class PRDTool:
     def __init__(self):
         self.prd_agent = PRDAgent()
     
-    async def create(self, idea: str, output_path: str = "docs/generated_prd.md") -> str:
-        """Create a PRD document from an idea."""
-        result = await self.prd_agent.create_prd(idea, output_path)
+    async def create(
+        self,
+        idea: str,
+        output_path: str = "docs/generated_prd.md",
+        progress: Optional[ProgressReporter] = None,
+        use_cache: bool = False
+    ) -> str:
+        """Create a PRD document from an idea, reporting each finished section."""
+        result = await self.prd_agent.create_prd(idea, output_path, progress, use_cache=use_cache)
         return json.dumps(result, indent=2)
 
@@ -9,8 +9,8 @@ class RAGTool:
     def __init__(self):
         self.rag_store = RAGStore()
     
-    async def retrieve(self, query: str, k: int = 5) -> str:
-        """Retrieve k similar code examples."""
-        results = self.rag_store.retrieve_similar(query, k)
+    async def retrieve(self, query: str, k: int = 5, use_mmr: bool = False) -> str:
+        """Retrieve k similar code examples, optionally diversified with MMR."""
+        results = await self.rag_store.aretrieve_similar(query, k, use_mmr=use_mmr)
         return json.dumps(results, indent=2)
 
@@ -0,0 +1,73 @@
+"""Generate PRDs and parsed intents in bulk from a JSONL file of jobs.
+
+Each input line is a job such as
+``{"id": "todo-app", "type": "prd", "idea": "A todo app with auth"}`` or
+``{"id": "shop", "type": "intent", "request": "An online shop for tea"}``.
+Results are appended to the output JSONL as they complete; rerunning the
+same command resumes an interrupted run.
+
+Usage:
+    # Bounded pool of regular API calls
+    python scripts/batch_generate.py jobs.jsonl results.jsonl --workers 8
+
+    # OpenAI Batch API (cheaper, finishes within 24h), PRDs also written as files
+    python scripts/batch_generate.py jobs.jsonl results.jsonl --backend openai --prd-dir docs/prds
+
+    # Dry run with deterministic local responses
+    python scripts/batch_generate.py jobs.jsonl results.jsonl --backend stub
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import agents module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp_codegen.batch import OpenAIBatchBackend, StubBackend, WorkerPoolBackend, run_batch
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Batch-generate PRDs and parsed intents")
+    parser.add_argument("input", help="JSONL file of jobs")
+    parser.add_argument("output", help="JSONL results file (appended to, used to resume)")
+    parser.add_argument("--backend", choices=["pool", "openai", "stub"], default="pool",
+                        help="Where completions run (default: pool)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Concurrent requests for the pool backend (default: 8)")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Requests per Batch API submission (default: 1000)")
+    parser.add_argument("--poll-interval", type=float, default=30.0,
+                        help="Seconds between Batch API status checks (default: 30)")
+    parser.add_argument("--prd-dir", help="Also write each PRD to <dir>/<id>.md")
+    args = parser.parse_args()
+
+    if args.backend == "openai":
+        backend = OpenAIBatchBackend(max_requests_per_batch=args.batch_size, poll_interval=args.poll_interval)
+    elif args.backend == "stub":
+        backend = StubBackend()
+    else:
+        backend = WorkerPoolBackend(max_workers=args.workers)
+
+    try:
+        summary = run_batch(args.input, args.output, backend, prd_dir=args.prd_dir)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; rerun the same command to resume")
+        return 130
+
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
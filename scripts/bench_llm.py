@@ -0,0 +1,131 @@
+"""Benchmark LLM call throughput and latency through the agents.llm stack.
+
+Requests go through ``chat_completion`` / ``embed_texts`` with the response
+cache bypassed, so the retry, hedging and usage layers are all measured.
+With ``--stub`` an in-process stub server (agents.llm_stub) is started and
+no API key or network is needed. The stub seeds latency and errors per
+request, so runs are comparable at any concurrency.
+
+Usage:
+    # Fully offline against a stub with 200ms median latency
+    python scripts/bench_llm.py --stub --requests 200 --concurrency 16
+
+    # Flaky provider: 10% rate limits, watch retries in the latency tail
+    python scripts/bench_llm.py --stub --error-rate 0.1 --concurrency 32
+
+    # Any OpenAI-compatible endpoint (e.g. a stub started with run_llm_stub.py)
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 python scripts/bench_llm.py --mode embed
+"""
+import argparse
+import contextvars
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path to import agents module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.llm_usage import get_usage_tracker, llm_context
+
+BENCH_RUN_ID = "bench"
+
+
+def one_request(mode: str, i: int) -> None:
+    from agents.llm import chat_completion, embed_texts, stream_chat_completion_to_file
+    messages = [{"role": "user", "content": f"Benchmark request {i}"}]
+    if mode == "chat":
+        chat_completion(messages, bypass_cache=True, agent="bench")
+    elif mode == "json":
+        chat_completion(messages, response_format={"type": "json_object"}, bypass_cache=True, agent="bench")
+    elif mode == "stream":
+        out = Path(os.getenv("TMPDIR", "/tmp")) / f"bench_llm_{os.getpid()}_{i}.md"
+        try:
+            stream_chat_completion_to_file(messages, out, bypass_cache=True, agent="bench")
+        finally:
+            out.unlink(missing_ok=True)
+    else:
+        embed_texts([f"Benchmark document {i}"])
+
+
+def run_benchmark(mode: str, requests: int, concurrency: int) -> dict:
+    """Send ``requests`` calls with ``concurrency`` workers; returns timings."""
+    latencies: List[float] = []
+    errors: List[Exception] = []
+
+    def timed(i: int) -> None:
+        start = time.perf_counter()
+        try:
+            one_request(mode, i)
+        except Exception as e:
+            errors.append(e)
+            return
+        latencies.append(time.perf_counter() - start)
+
+    # Warm up: the client import and first connection are not part of the numbers
+    one_request(mode, -1)
+    start = time.perf_counter()
+    with llm_context(run_id=BENCH_RUN_ID), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Copy the context here so the run id follows each call into its worker
+        futures = [pool.submit(contextvars.copy_context().run, timed, i) for i in range(requests)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 1) if ordered else 0.0
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms_p50": pct(50),
+        "latency_ms_p95": pct(95),
+        "latency_ms_p99": pct(99),
+        "latency_ms_mean": round(statistics.mean(ordered) * 1000, 1) if ordered else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM call throughput and latency")
+    parser.add_argument("--mode", choices=["chat", "json", "stream", "embed"], default="chat")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stub", action="store_true", help="Start an in-process stub server")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Stub median latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub failure rate")
+    parser.add_argument("--seed", type=int, default=0, help="Stub latency/error seed")
+    args = parser.parse_args()
+
+    server = None
+    if args.stub:
+        from agents.llm_stub import StubConfig, StubServer
+        config = StubConfig(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed)
+        server = StubServer(config).start()
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+    print(f"Target: {os.getenv('OPENAI_BASE_URL') or 'https://api.openai.com/v1'}")
+
+    try:
+        result = run_benchmark(args.mode, args.requests, args.concurrency)
+        result["usage"] = get_usage_tracker().summary(BENCH_RUN_ID)["totals"]
+        if server is not None:
+            result["stub"] = server.stub.stats()
+    finally:
+        if server is not None:
+            server.stop()
+    print(json.dumps(result, indent=2))
+    return 0 if result["errors"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Benchmark MCP server cold start: process spawn to first list_tools response.
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Modules that should only load when a tool actually needs them
+HEAVY_MODULES = ["chromadb", "openai", "langgraph", "langchain", "numpy"]
+
+
+async def time_to_list_tools() -> float:
+    """Spawn the server over stdio and time initialize + list_tools."""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+    
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "mcp_codegen.server"],
+        cwd=str(project_root),
+    )
+    start = time.perf_counter()
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            await session.list_tools()
+            return time.perf_counter() - start
+
+
+def heavy_modules_loaded_at_import() -> list:
+    """Return heavy modules that importing mcp_codegen.server pulls in."""
+    code = (
+        "import sys, mcp_codegen.server; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCP server cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to time")
+    args = parser.parse_args()
+    
+    eager = heavy_modules_loaded_at_import()
+    print(f"Heavy modules imported at startup: {', '.join(eager) if eager else 'none'}")
+    
+    timings = [asyncio.run(time_to_list_tools()) for _ in range(args.runs)]
+    print(f"Cold start to first list_tools over {args.runs} runs:")
+    print(f"  min    {min(timings) * 1000:8.1f} ms")
+    print(f"  median {statistics.median(timings) * 1000:8.1f} ms")
+    print(f"  max    {max(timings) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
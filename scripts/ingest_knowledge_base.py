@@ -15,6 +15,17 @@ import sys
 # Add parent directory to path to import agents module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from agents.ingestion import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_WORKERS,
+    IngestManifest,
+    default_manifest_path,
+    incremental_ingest,
+    iter_source_files,
+    run_ingestion_pipeline,
+    watch,
+)
 from agents.rag_retrieval import DomainScopedRAGStore, get_rag_store
 
 logging.basicConfig(
@@ -57,88 +68,73 @@ DOMAIN_DIRS = {
 }
 
 
-def ingest_local_files(rag_store: DomainScopedRAGStore, domain: Optional[str] = None, dry_run: bool = False) -> Dict[str, int]:
+def ingest_local_files(
+    rag_store: DomainScopedRAGStore,
+    domain: Optional[str] = None,
+    dry_run: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    manifest: Optional[IngestManifest] = None,
+    full: bool = False
+) -> Dict[str, int]:
     """Ingest local markdown files from docs/ directories.
     
+    Files stream through a staged pipeline (see agents.ingestion): a reader
+    pool, a chunker, batched embedding with at most ``max_in_flight``
+    concurrent requests, and a single writer. With a manifest, only files
+    and chunks that changed since the last run are processed, and chunks of
+    deleted files are removed.
+    
     Args:
         rag_store: Initialized RAG store
         domain: Specific domain to ingest (None for all)
         dry_run: If True, only report what would be ingested
+        workers: Number of file reader threads
+        batch_size: Chunks per embedding request
+        max_in_flight: Maximum concurrent embedding requests
+        manifest: Ingest manifest for incremental runs (None to process every file)
+        full: Re-ingest every file, still deleting chunks the manifest no longer covers
     
     Returns:
         Dictionary mapping domain to count of ingested files
     """
-    stats = {}
-    base_path = Path("docs")
+    if domain and domain not in DOMAIN_DIRS:
+        logger.warning(f"Skipping unknown domain: {domain}")
+        return {}
     
-    # Determine which domains to process
-    domains_to_process = [domain] if domain else DOMAIN_DIRS.keys()
+    domain_dirs = {domain: DOMAIN_DIRS[domain]} if domain else DOMAIN_DIRS
     
-    for domain_name in domains_to_process:
-        if domain_name not in DOMAIN_DIRS:
-            logger.warning(f"Skipping unknown domain: {domain_name}")
-            continue
-        
-        domain_path = base_path / DOMAIN_DIRS[domain_name].replace("docs/", "")
-        
-        if not domain_path.exists():
-            logger.warning(f"Domain directory does not exist: {domain_path}")
-            stats[domain_name] = 0
-            continue
-        
-        logger.info(f"Processing domain '{domain_name}' from {domain_path}")
-        
-        # Find all markdown files recursively
-        md_files = list(domain_path.rglob("*.md"))
-        
-        if not md_files:
-            logger.info(f"No markdown files found in {domain_path}")
-            stats[domain_name] = 0
-            continue
-        
-        count = 0
-        for md_file in md_files:
-            try:
-                # Read file content
-                content = md_file.read_text(encoding='utf-8')
-                
-                if not content.strip():
-                    logger.warning(f"Skipping empty file: {md_file}")
-                    continue
-                
-                # Convert to relative path for storage
-                rel_path = str(md_file.relative_to(base_path.parent))
-                
-                if dry_run:
-                    # Show file size and first few lines
-                    lines = content.split('\n')[:3]
-                    preview = ' '.join(lines).replace('\n', ' ')[:100]
-                    logger.info(f"[DRY RUN] Would ingest: {rel_path} (domain: {domain_name}, {len(content)} chars)")
-                    if preview:
-                        logger.info(f"  Preview: {preview}...")
-                    count += 1
-                else:
-                    if not rag_store.initialized:
-                        logger.error(f"Cannot ingest {rel_path}: RAG store not initialized")
-                        continue
-                    
-                    # Ingest document
-                    doc_id = rag_store.ingest_document(
-                        content=content,
-                        file_path=rel_path,
-                        domain=domain_name
-                    )
-                    
-                    if doc_id:
-                        logger.info(f"✓ Ingested: {rel_path}")
-                        count += 1
-                    else:
-                        logger.warning(f"✗ Failed to ingest: {rel_path}")
-            
-            except Exception as e:
-                logger.error(f"Error processing {md_file}: {e}")
-        
-        stats[domain_name] = count
+    if not dry_run and not rag_store.initialized:
+        logger.error("Cannot ingest local files: RAG store not initialized")
+        return {name: 0 for name in domain_dirs}
+    
+    logger.info(
+        f"Processing domains {', '.join(domain_dirs)} "
+        f"(workers={workers}, batch_size={batch_size}, max_in_flight={max_in_flight})"
+    )
+    
+    pipeline_kwargs = {
+        "workers": workers,
+        "batch_size": batch_size,
+        "max_in_flight": max_in_flight,
+        "dry_run": dry_run
+    }
+    if manifest is not None:
+        pipeline_stats = incremental_ingest(
+            rag_store, domain_dirs, manifest, full=full, **pipeline_kwargs
+        )
+    else:
+        pipeline_stats = run_ingestion_pipeline(
+            rag_store, iter_source_files(domain_dirs), **pipeline_kwargs
+        )
+    pipeline_stats.log_summary()
+    
+    for failed in pipeline_stats.failed_files:
+        logger.warning(f"✗ Failed to ingest: {failed}")
+    
+    stats = {name: pipeline_stats.files_by_domain.get(name, 0) for name in domain_dirs}
+    for domain_name, count in stats.items():
         logger.info(f"Domain '{domain_name}': {count} files ingested")
     
     return stats
@@ -277,6 +273,45 @@ def main():
         action="store_true",
         help="Preview what would be ingested without actually ingesting"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"File reader threads for local ingestion (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Chunks per embedding request (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f"Maximum concurrent embedding requests (default: {DEFAULT_MAX_IN_FLIGHT})"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-ingest every local file and rebuild the ingest manifest"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="Ingest manifest path (default: <chroma_dir>/<collection>.ingest_manifest.json)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After ingesting, keep watching docs/<domain>/ and re-ingest changed files"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Seconds between polls (or debounce delay with watchdog) in --watch mode"
+    )
     
     args = parser.parse_args()
     
@@ -299,12 +334,24 @@ def main():
     
     total_stats = {}
     
+    manifest_path = Path(args.manifest) if args.manifest else default_manifest_path(rag_store)
+    manifest = IngestManifest(manifest_path)
+    
     # Ingest local files
     if not args.context7_only:
         logger.info("\n" + "="*60)
         logger.info("INGESTING LOCAL FILES")
         logger.info("="*60)
-        local_stats = ingest_local_files(rag_store, args.domain, args.dry_run)
+        local_stats = ingest_local_files(
+            rag_store,
+            args.domain,
+            args.dry_run,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            max_in_flight=args.max_in_flight,
+            manifest=manifest,
+            full=args.full
+        )
         
         for domain, count in local_stats.items():
             total_stats[domain] = total_stats.get(domain, 0) + count
@@ -338,6 +385,20 @@ def main():
     
     if args.dry_run:
         logger.info("\nThis was a dry run. Run without --dry-run to actually ingest documents.")
+    elif args.watch:
+        domain_dirs = {args.domain: DOMAIN_DIRS[args.domain]} if args.domain else DOMAIN_DIRS
+        try:
+            watch(
+                rag_store,
+                domain_dirs,
+                manifest,
+                interval=args.interval,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                max_in_flight=args.max_in_flight
+            )
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
     
     return 0
 
@@ -0,0 +1,144 @@
+"""Export and import pre-embedded Context7 knowledge bundles.
+
+A node that already has the Context7 libraries ingested exports one bundle
+per library; new nodes import the bundles straight into ChromaDB without
+re-fetching from Context7 or calling the embedding API.
+
+Usage:
+    # Export every Context7 library in the knowledge base
+    python scripts/kb_bundle.py export --out kb_bundles
+    
+    # Export selected libraries with an explicit version
+    python scripts/kb_bundle.py export --out kb_bundles --library /fastapi/fastapi --version 2025.06
+    
+    # Import all bundles in a directory
+    python scripts/kb_bundle.py import kb_bundles
+    
+    # Inspect a bundle
+    python scripts/kb_bundle.py info kb_bundles/fastapi_fastapi-2025.06.kbbundle.zip
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import agents module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.kb_bundle import (
+    BUNDLE_SUFFIX,
+    export_bundle,
+    import_bundle,
+    list_context7_libraries,
+    read_manifest,
+)
+from agents.rag_retrieval import DEFAULT_COLLECTION, DomainScopedRAGStore
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _open_store(collection_name: str):
+    rag_store = DomainScopedRAGStore(collection_name=collection_name)
+    # Bundles are read from and written to ChromaDB, never a snapshot
+    rag_store.snapshot_path = None
+    rag_store.initialize()
+    if not rag_store.initialized or not rag_store.collection:
+        logger.error("Failed to initialize RAG store. Check OPENAI_API_KEY and ChromaDB setup.")
+        return None
+    return rag_store
+
+
+def cmd_export(args) -> int:
+    """Write one bundle per Context7 library."""
+    rag_store = _open_store(args.collection)
+    if rag_store is None:
+        return 1
+    
+    libraries = args.library or sorted(list_context7_libraries(rag_store.collection))
+    if not libraries:
+        logger.warning("No Context7 libraries found in the knowledge base")
+        return 0
+    
+    for library_id in libraries:
+        try:
+            export_bundle(
+                rag_store.collection,
+                library_id,
+                args.out,
+                embedding_model=rag_store.embedding_model,
+                version=args.version
+            )
+        except ValueError as e:
+            logger.error(str(e))
+            return 1
+    return 0
+
+
+def cmd_import(args) -> int:
+    """Import bundle files, or every bundle in the given directories."""
+    paths = []
+    for path in map(Path, args.paths):
+        paths.extend(sorted(path.glob(f"*{BUNDLE_SUFFIX}")) if path.is_dir() else [path])
+    if not paths:
+        logger.warning("No bundles to import")
+        return 0
+    
+    rag_store = _open_store(args.collection)
+    if rag_store is None:
+        return 1
+    
+    failed = 0
+    for path in paths:
+        try:
+            import_bundle(rag_store, path, batch_size=args.batch_size)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to import {path}: {e}")
+            failed += 1
+    
+    logger.info(f"Imported {len(paths) - failed}/{len(paths)} bundles")
+    return 1 if failed else 0
+
+
+def cmd_info(args) -> int:
+    """Print a bundle's manifest and file size."""
+    manifest = read_manifest(args.path)
+    print(json.dumps({**manifest, "size_bytes": Path(args.path).stat().st_size}, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and import pre-embedded KB bundles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="Export Context7 libraries to bundles")
+    export_parser.add_argument("--out", required=True, help="Output directory")
+    export_parser.add_argument(
+        "--library",
+        action="append",
+        help="Context7 library ID to export (repeatable, default: all in the KB)"
+    )
+    export_parser.add_argument("--version", help="Bundle version (default: newest ingestion date)")
+    export_parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    export_parser.set_defaults(func=cmd_export)
+    
+    import_parser = subparsers.add_parser("import", help="Import bundles into the KB")
+    import_parser.add_argument("paths", nargs="+", help="Bundle files or directories of bundles")
+    import_parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    import_parser.add_argument("--batch-size", type=int, default=500)
+    import_parser.set_defaults(func=cmd_import)
+    
+    info_parser = subparsers.add_parser("info", help="Show a bundle's manifest")
+    info_parser.add_argument("path", help="Bundle file")
+    info_parser.set_defaults(func=cmd_info)
+    
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Garbage-collect stale documents from the knowledge base collections.
+
+Removes duplicate documents, superseded Context7 dumps and pre-chunking
+whole-file documents, and documents whose local source file was deleted.
+
+Usage:
+    # Preview what would be deleted from the agent knowledge base
+    python scripts/kb_gc.py --dry-run
+    
+    # Collect garbage in both collections
+    python scripts/kb_gc.py --collection agent_knowledge_base --collection code_patterns
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import agents module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.kb_maintenance import DEFAULT_DELETE_BATCH_SIZE
+from agents.rag_retrieval import DEFAULT_COLLECTION, DomainScopedRAGStore
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete stale documents from KB collections")
+    parser.add_argument(
+        "--collection",
+        action="append",
+        help=f"Collection to clean (repeatable, default: {DEFAULT_COLLECTION})"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be deleted without deleting"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_DELETE_BATCH_SIZE,
+        help=f"IDs per delete call (default: {DEFAULT_DELETE_BATCH_SIZE})"
+    )
+    args = parser.parse_args()
+    
+    for collection_name in args.collection or [DEFAULT_COLLECTION]:
+        rag_store = DomainScopedRAGStore(collection_name=collection_name)
+        rag_store.snapshot_path = None
+        rag_store.initialize()
+        if not rag_store.initialized or not rag_store.collection:
+            logger.error("Failed to initialize RAG store. Check OPENAI_API_KEY and ChromaDB setup.")
+            return 1
+        
+        # Through the store, so the KB stats side-index is updated with the deletions
+        report = rag_store.collect_garbage(dry_run=args.dry_run, batch_size=args.batch_size)
+        
+        logger.info("=" * 60)
+        logger.info(f"COLLECTION: {collection_name}{' (DRY RUN)' if args.dry_run else ''}")
+        logger.info("=" * 60)
+        logger.info(f"{'duplicates':15} : {report['duplicates']:6}")
+        logger.info(f"{'superseded':15} : {report['superseded']:6}")
+        logger.info(f"{'orphaned':15} : {report['orphaned']:6}")
+        logger.info(f"{'size before':15} : {report['count_before']:6}")
+        logger.info(f"{'size after':15} : {report['count_after']:6}")
+        if args.dry_run:
+            logger.info(f"{'would delete':15} : {report['would_delete']:6}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Export the knowledge base to a memory-mapped vector snapshot.
+
+Worker processes can then serve retrieval from the snapshot (set
+RAG_SNAPSHOT_PATH) and share one page-cached copy instead of each opening
+ChromaDB.
+
+Usage:
+    # Export the agent knowledge base as float32
+    python scripts/kb_snapshot.py export --out chroma_db/kb_snapshot
+    
+    # 4x smaller int8 export
+    python scripts/kb_snapshot.py export --out chroma_db/kb_snapshot --dtype int8
+    
+    # Inspect a snapshot
+    python scripts/kb_snapshot.py info chroma_db/kb_snapshot
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import agents module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.rag_retrieval import DomainScopedRAGStore
+from agents.vector_snapshot import SUPPORTED_DTYPES, VectorSnapshot, export_snapshot
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def cmd_export(args) -> int:
+    """Export the configured collection to a snapshot directory."""
+    rag_store = DomainScopedRAGStore(collection_name=args.collection)
+    # Always export from ChromaDB, even if RAG_SNAPSHOT_PATH is set
+    rag_store.snapshot_path = None
+    rag_store.initialize()
+    if not rag_store.initialized or not rag_store.collection:
+        logger.error("Failed to initialize RAG store. Check OPENAI_API_KEY and ChromaDB setup.")
+        return 1
+    
+    manifest = export_snapshot(
+        rag_store.collection,
+        args.out,
+        dtype=args.dtype,
+        batch_size=args.batch_size,
+        embedding_model=rag_store.embedding_model
+    )
+    logger.info(
+        f"Exported {manifest['count']} documents ({manifest['dtype']}, dim {manifest['dim']}) to {args.out}"
+    )
+    return 0
+
+
+def cmd_info(args) -> int:
+    """Print a snapshot's manifest and on-disk size."""
+    snapshot = VectorSnapshot.open(args.path)
+    size = sum(f.stat().st_size for f in Path(args.path).iterdir() if f.is_file())
+    print(json.dumps({**snapshot.manifest, "size_bytes": size}, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and inspect KB vector snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = subparsers.add_parser("export", help="Export the KB collection to a snapshot")
+    export_parser.add_argument("--out", required=True, help="Snapshot output directory")
+    export_parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default="float32")
+    export_parser.add_argument("--collection", default="agent_knowledge_base")
+    export_parser.add_argument("--batch-size", type=int, default=500)
+    export_parser.set_defaults(func=cmd_export)
+    
+    info_parser = subparsers.add_parser("info", help="Show snapshot manifest")
+    info_parser.add_argument("path", help="Snapshot directory")
+    info_parser.set_defaults(func=cmd_info)
+    
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Run the local OpenAI-compatible stub server (agents.llm_stub).
+
+Chat completions (including streaming and JSON mode), embeddings and model
+listing are answered locally with deterministic content, after a simulated
+latency. Point any client at it with OPENAI_BASE_URL.
+
+Usage:
+    python scripts/run_llm_stub.py --port 8900
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=stub python quick_test.py
+
+    # Slow, flaky provider: 800ms median, 5% rate limits
+    python scripts/run_llm_stub.py --latency-ms 800 --error-rate 0.05 --error-status 429
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import agents module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.llm_stub import LATENCY_DISTRIBUTIONS, StubConfig, run
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def main() -> int:
+    defaults = StubConfig()
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms,
+                        help="Median request latency")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency_distribution)
+    parser.add_argument("--sigma", type=float, default=defaults.latency_sigma,
+                        help="Lognormal sigma, or relative half-width for uniform")
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms,
+                        help="Time to first token for streamed responses")
+    parser.add_argument("--token-ms", type=float, default=defaults.token_ms,
+                        help="Delay between streamed chunks")
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens,
+                        help="Approximate length of text completions")
+    parser.add_argument("--embedding-dim", type=int, default=defaults.embedding_dim)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status,
+                        help="HTTP status of injected failures (429 adds Retry-After)")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after_s)
+    parser.add_argument("--seed", type=int, default=defaults.seed,
+                        help="Seed for the latency and error sequence")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.distribution,
+        latency_sigma=args.sigma,
+        ttft_ms=args.ttft_ms,
+        token_ms=args.token_ms,
+        completion_tokens=args.completion_tokens,
+        embedding_dim=args.embedding_dim,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after_s=args.retry_after,
+        seed=args.seed,
+    )
+    try:
+        run(args.host, args.port, config)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
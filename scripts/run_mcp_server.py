@@ -3,6 +3,9 @@
 This script exists so process managers like pm2 can reference a concrete
 Python file instead of using the `-m` module flag, which some platforms
 may interpret as a file path.
+
+Pass ``--transport http`` (or set MCP_TRANSPORT=http) to run one shared
+server for many clients instead of one stdio process per editor.
 """
 
 import asyncio
@@ -13,9 +16,10 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from mcp_codegen.server import main
+from mcp_codegen.server import main, parse_args
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(main(args.transport, args.host, args.port))
 
@@ -17,6 +17,9 @@ def test_openai_connection():
         return False
     
     print(f"[OK] API Key found: {api_key[:10]}...")
+    base_url = os.getenv("OPENAI_BASE_URL")
+    if base_url:
+        print(f"[OK] Using OPENAI_BASE_URL: {base_url}")
     
     try:
         client = OpenAI()
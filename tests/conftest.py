@@ -0,0 +1,63 @@
+import pytest
+
+from agents import llm_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(tmp_path, monkeypatch):
+    """Give every test its own empty LLM response cache."""
+    cache = llm_cache.LLMResponseCache(tmp_path / "llm_cache.sqlite")
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+class InMemoryCollection:
+    """Dict-backed stand-in for a ChromaDB collection.
+
+    ``records`` maps id -> (document, metadata) or (document, metadata, embedding).
+    """
+    name = "fake"
+
+    def __init__(self, records=None):
+        self.records = dict(records or {})
+
+    def count(self):
+        return len(self.records)
+
+    def get(self, ids=None, where=None, limit=None, offset=0, include=None):
+        if ids is None:
+            ids = [
+                doc_id for doc_id, record in self.records.items()
+                if all(record[1].get(key) == value for key, value in (where or {}).items())
+            ]
+            ids = ids[offset:None if limit is None else offset + limit]
+        else:
+            ids = [doc_id for doc_id in ids if doc_id in self.records]
+        return {
+            "ids": ids,
+            "documents": [self.records[i][0] for i in ids],
+            "metadatas": [self.records[i][1] for i in ids],
+            "embeddings": [self.records[i][2] if len(self.records[i]) > 2 else None for i in ids],
+        }
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        for index, doc_id in enumerate(ids):
+            embedding = embeddings[index] if embeddings is not None else None
+            self.records[doc_id] = (documents[index], metadatas[index], embedding)
+
+    add = upsert
+
+    def update(self, ids, metadatas):
+        for doc_id, metadata in zip(ids, metadatas):
+            document, _, *embedding = self.records[doc_id]
+            self.records[doc_id] = (document, metadata, *embedding)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.records.pop(doc_id, None)
+
+
+@pytest.fixture
+def make_collection():
+    """Build in-memory collections: ``make_collection({id: (document, metadata[, embedding])})``."""
+    return InMemoryCollection
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from mcp_codegen.admission import AdmissionController, AdmissionRejected, CostClass
+
+
+def _controller():
+    return AdmissionController(
+        [CostClass("interactive", 0, 2, 10), CostClass("batch", 2, 2, 1)],
+        {"retrieve_context": "interactive", "generate_project": "batch"},
+        total_slots=2,
+        default_class="interactive",
+    )
+
+
+def test_interactive_calls_jump_ahead_of_queued_batch_work():
+    controller = _controller()
+    order = []
+
+    async def call(tool, label, hold=0.02):
+        async with controller.admit(tool):
+            order.append(label)
+            await asyncio.sleep(hold)
+
+    async def run():
+        batch = [asyncio.ensure_future(call("generate_project", f"batch{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        # Both slots are held by batch work and one batch call is queued
+        interactive = asyncio.ensure_future(call("retrieve_context", "interactive"))
+        await asyncio.gather(*batch, interactive)
+
+    asyncio.run(run())
+    assert order[:2] == ["batch0", "batch1"]
+    assert order[2] == "interactive"
+
+
+def test_full_queue_is_rejected_with_retry_hint():
+    controller = _controller()
+
+    async def hold():
+        async with controller.admit("generate_project"):
+            await asyncio.sleep(0.05)
+
+    async def run():
+        running = [asyncio.ensure_future(hold()) for _ in range(3)]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.admit("generate_project"):
+                pass
+        assert excinfo.value.retry_after >= 1
+        await asyncio.gather(*running)
+
+    asyncio.run(run())
+    snapshot = controller.snapshot()
+    assert snapshot["batch"]["rejected"] == 1
+    assert snapshot["batch"]["running"] == 0 and snapshot["batch"]["queued"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = _controller()
+
+    async def run():
+        async with controller.admit("generate_project"), controller.admit("generate_project"):
+            waiter = asyncio.ensure_future(controller.admit("generate_project").__aenter__())
+            await asyncio.sleep(0)
+            assert controller.queued["batch"] == 1
+            waiter.cancel()
+            await asyncio.sleep(0)
+            assert controller.queued["batch"] == 0
+
+    asyncio.run(run())
+    assert controller.running["batch"] == 0
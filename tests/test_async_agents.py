@@ -0,0 +1,134 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from mcp_codegen.agents import prd_agent
+from mcp_codegen.agents.prd_agent import PRDAgent
+from mcp_codegen.progress import ProgressReporter
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class SlowCompletions:
+    async def create(self, model, messages, stream=False, **kwargs):
+        await asyncio.sleep(0.2)
+        text = "# PRD\n" + messages[-1]["content"] + "\n## Summary\nShort.\n## Goals\nShip it.\n"
+
+        async def chunks():
+            for i in range(0, len(text), 5):
+                # Let concurrent streams interleave, as network reads would
+                await asyncio.sleep(0)
+                yield _chunk(text[i:i + 5])
+
+        return chunks()
+
+
+class RecordingSession:
+    def __init__(self):
+        self.notifications = []
+
+    async def send_progress_notification(self, token, progress, total=None, message=None, related_request_id=None):
+        self.notifications.append((progress, total, message))
+
+
+def _use_fake_client(monkeypatch):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions()))
+    client.with_options = lambda **options: client
+    monkeypatch.setattr(prd_agent, "get_async_openai_client", lambda: client)
+
+
+def test_prd_generation_does_not_block_the_loop(tmp_path, monkeypatch):
+    _use_fake_client(monkeypatch)
+    agent = PRDAgent()
+
+    async def run():
+        return await asyncio.gather(*(
+            agent.create_prd(f"idea {i}", str(tmp_path / "docs" / f"prd_{i}.md")) for i in range(3)
+        ))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    # Three 0.2 s completions overlap instead of running back to back
+    assert time.perf_counter() - start < 0.5
+    assert [r["status"] for r in results] == ["created"] * 3
+    assert (tmp_path / "docs" / "prd_2.md").read_text(encoding="utf-8").endswith("Ship it.\n")
+
+
+def test_prd_sections_are_reported_as_they_stream(tmp_path, monkeypatch):
+    _use_fake_client(monkeypatch)
+    session = RecordingSession()
+    progress = ProgressReporter(session, token="t1", request_id=1)
+
+    asyncio.run(PRDAgent().create_prd("idea", str(tmp_path / "prd.md"), progress))
+
+    messages = [message for _, _, message in session.notifications]
+    assert messages[:2] == ["Finished section: PRD", "Finished section: Summary"]
+    assert messages[-1].startswith("PRD written to")
+    values = [value for value, _, _ in session.notifications]
+    assert values == sorted(values)
+
+
+def test_prd_streams_to_partial_file_and_keeps_old_prd_on_cancel(tmp_path, monkeypatch):
+    _use_fake_client(monkeypatch)
+    output = tmp_path / "prd.md"
+    output.write_text("old PRD", encoding="utf-8")
+    seen = []
+
+    class CancellingSession(RecordingSession):
+        async def send_progress_notification(self, token, progress, total=None, message=None, related_request_id=None):
+            # Finished sections are already on disk, the final file is not replaced yet
+            partial = next(tmp_path.glob("prd.md.*.partial"))
+            seen.append((partial.read_text(encoding="utf-8"), output.read_text(encoding="utf-8")))
+            raise asyncio.CancelledError()
+
+    progress = ProgressReporter(CancellingSession(), token="t1", request_id=1)
+    try:
+        asyncio.run(PRDAgent().create_prd("idea", str(output), progress))
+    except asyncio.CancelledError:
+        pass
+
+    assert seen[0][0].startswith("# PRD\nCreate a PRD for: idea\n## Summary")
+    assert seen[0][1] == "old PRD"
+    assert output.read_text(encoding="utf-8") == "old PRD"
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_concurrent_prds_for_one_path_use_separate_partial_files(tmp_path, monkeypatch, caplog):
+    _use_fake_client(monkeypatch)
+    output = tmp_path / "prd.md"
+
+    async def run():
+        agent = PRDAgent()
+        return await asyncio.gather(*(agent.create_prd(idea, str(output)) for idea in ("tea", "coffee")))
+
+    results = asyncio.run(run())
+
+    assert [result["status"] for result in results] == ["created", "created"]
+    # Neither request lost its partial file and had to fall back to another model
+    assert "falling back" not in caplog.text
+    content = output.read_text(encoding="utf-8")
+    assert content.count("# PRD") == 1 and content.endswith("Ship it.\n")
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_repeated_prd_is_regenerated_unless_cache_is_requested(tmp_path, monkeypatch):
+    _use_fake_client(monkeypatch)
+    calls = []
+    create = SlowCompletions.create
+
+    async def counting_create(self, *args, **kwargs):
+        calls.append(kwargs.get("model"))
+        return await create(self, *args, **kwargs)
+
+    monkeypatch.setattr(SlowCompletions, "create", counting_create)
+    agent = PRDAgent()
+
+    asyncio.run(agent.create_prd("idea", str(tmp_path / "a.md")))
+    asyncio.run(agent.create_prd("idea", str(tmp_path / "b.md")))
+    assert len(calls) == 2
+
+    asyncio.run(agent.create_prd("idea", str(tmp_path / "c.md"), use_cache=True))
+    assert len(calls) == 2
+    assert (tmp_path / "c.md").read_text(encoding="utf-8") == (tmp_path / "b.md").read_text(encoding="utf-8")
@@ -0,0 +1,167 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_codegen.batch import (
+    BatchBackend,
+    BatchState,
+    OpenAIBatchBackend,
+    StubBackend,
+    WorkerPoolBackend,
+    prd_filename,
+    run_batch,
+)
+
+
+def _write_jobs(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            if i % 2:
+                f.write(json.dumps({"id": f"job-{i}", "type": "intent", "request": f"app number {i}"}) + "\n")
+            else:
+                f.write(json.dumps({"id": f"job-{i}", "type": "prd", "idea": f"idea {i}"}) + "\n")
+
+
+def _results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_interrupted_batch_resumes_without_redoing_jobs(tmp_path):
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    _write_jobs(jobs, 6)
+    calls = []
+
+    def flaky(request):
+        calls.append(request.id)
+        if len(calls) == 4:
+            raise KeyboardInterrupt()
+        return StubBackend.default_response(request)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(jobs, out, StubBackend(flaky))
+    assert [r["id"] for r in _results(out)] == ["job-0", "job-1", "job-2"]
+
+    # A crash mid-write leaves a torn line; it is discarded on resume
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"id": "job-3", "sta')
+
+    summary = run_batch(jobs, out, StubBackend(), prd_dir=tmp_path / "prds")
+    assert summary == {"total": 6, "skipped": 3, "succeeded": 3, "failed": 0}
+    results = _results(out)
+    assert [r["id"] for r in results] == [f"job-{i}" for i in range(6)]
+    assert results[1]["parsed_intent"]["project_name"].startswith("project-")
+    assert results[4]["prd_path"].endswith("job-4.md")
+    assert (tmp_path / "prds" / "job-4.md").read_text(encoding="utf-8").startswith("# PRD")
+
+
+def test_pool_backend_records_errors_and_retries_them(tmp_path, monkeypatch):
+    from agents import llm
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    _write_jobs(jobs, 4)
+    bypassed = []
+
+    def chat_completion(messages, model, response_format=None, agent=None, bypass_cache=None, validate=None):
+        if not response_format:
+            # PRD jobs always ask for a fresh PRD
+            assert bypass_cache
+            return "# PRD"
+        if bypass_cache:
+            bypassed.append(messages[-1]["content"])
+            return '{"project_name": "app"}'
+        # What a cached bad response would replay on every run
+        return "not json"
+
+    monkeypatch.setattr(llm, "chat_completion", chat_completion)
+
+    summary = run_batch(jobs, out, WorkerPoolBackend(max_workers=2))
+    assert summary["failed"] == 2
+    assert {r["status"] for r in _results(out) if r["type"] == "intent"} == {"error"}
+    assert bypassed == []
+
+    summary = run_batch(jobs, out, WorkerPoolBackend(max_workers=2))
+    assert summary == {"total": 4, "skipped": 2, "succeeded": 2, "failed": 0}
+    assert len(bypassed) == 2
+
+
+def test_prd_files_of_similar_ids_do_not_collide(tmp_path):
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    with open(jobs, "w", encoding="utf-8") as f:
+        for job_id in ("a/b", "a_b"):
+            f.write(json.dumps({"id": job_id, "type": "prd", "idea": f"idea {job_id}"}) + "\n")
+
+    run_batch(jobs, out, StubBackend(), prd_dir=tmp_path / "prds")
+
+    paths = {r["id"]: r["prd_path"] for r in _results(out)}
+    assert paths["a_b"].endswith("a_b.md")
+    assert len(set(paths.values())) == 2
+    assert prd_filename("a/b") == prd_filename("a/b") != prd_filename("a:b")
+    with pytest.raises(TypeError):
+        BatchBackend()
+
+
+class FakeBatchClient:
+    def __init__(self):
+        self.submitted = []
+        self.retrieves = 0
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(create=self._create, retrieve=self._retrieve)
+        self._outputs = {}
+
+    def _upload(self, file, purpose):
+        assert purpose == "batch"
+        lines = [json.loads(line) for line in file[1].decode("utf-8").splitlines()]
+        file_id = f"file-{len(self._outputs)}"
+        self._outputs[file_id] = lines
+        return SimpleNamespace(id=file_id)
+
+    def _create(self, input_file_id, endpoint, completion_window):
+        self.submitted.append(input_file_id)
+        return SimpleNamespace(id=f"batch-{input_file_id}")
+
+    def _retrieve(self, batch_id):
+        self.retrieves += 1
+        return SimpleNamespace(
+            id=batch_id,
+            status="completed",
+            output_file_id="out-" + batch_id[len("batch-"):],
+            error_file_id=None,
+        )
+
+    def _content(self, file_id):
+        lines = []
+        for line in self._outputs[file_id[len("out-"):]]:
+            if line["custom_id"] == "job-3":
+                continue  # dropped by the API
+            content = "{}" if line["body"].get("response_format") else "# PRD"
+            lines.append({
+                "custom_id": line["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+            })
+        return SimpleNamespace(text="\n".join(json.dumps(line) for line in lines))
+
+
+def test_openai_batch_backend_resumes_submitted_batches(tmp_path):
+    jobs, out = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    _write_jobs(jobs, 5)
+    client = FakeBatchClient()
+
+    # An earlier run submitted the first batch and was interrupted while polling
+    state = BatchState(tmp_path / "results.jsonl.state.json")
+    state.batches["batch-file-0"] = {"ids": ["job-0", "job-1"], "done": False}
+    client.submitted.append("file-0")
+    client._outputs["file-0"] = [
+        {"custom_id": "job-0", "body": {}},
+        {"custom_id": "job-1", "body": {"response_format": {"type": "json_object"}}},
+    ]
+    state.save()
+
+    summary = run_batch(jobs, out, OpenAIBatchBackend(client, max_requests_per_batch=2, poll_interval=0))
+
+    # job-0/job-1 came from the existing batch; the other three went out in two new ones
+    assert client.submitted == ["file-0", "file-1", "file-2"]
+    assert summary == {"total": 5, "skipped": 0, "succeeded": 4, "failed": 1}
+    by_id = {r["id"]: r for r in _results(out)}
+    assert by_id["job-1"]["parsed_intent"] == {}
+    assert "No result in batch" in by_id["job-3"]["error"]
+    assert all(info["done"] for info in BatchState(state.path).batches.values())
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from mcp_codegen.coalescing import ToolCallCoalescer, call_key
+
+
+def test_call_key_ignores_argument_order():
+    assert call_key("retrieve_context", {"query": "q", "k": 5}) == call_key("retrieve_context", {"k": 5, "query": "q"})
+    assert call_key("retrieve_context", {"k": 5}) != call_key("parse_prd", {"k": 5})
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    coalescer = ToolCallCoalescer()
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(
+            coalescer.run("retrieve_context", {"query": "q", "k": 5}, execute),
+            coalescer.run("retrieve_context", {"k": 5, "query": "q"}, execute),
+            coalescer.run("retrieve_context", {"query": "other"}, execute),
+        )
+
+    assert asyncio.run(run()) == ["result"] * 3
+    assert len(calls) == 2
+    assert coalescer.stats["coalesced"] == 1
+
+
+def test_ttl_cache_only_for_idempotent_tools_and_never_for_errors():
+    coalescer = ToolCallCoalescer(cache_ttl=60, cacheable_tools=["parse_prd"])
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        return len(calls)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def run():
+        first = await coalescer.run("parse_prd", {"document_path": "a.md"}, execute)
+        second = await coalescer.run("parse_prd", {"document_path": "a.md"}, execute)
+        third = await coalescer.run("create_prd", {"idea": "x"}, execute)
+        fourth = await coalescer.run("create_prd", {"idea": "x"}, execute)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await coalescer.run("parse_prd", {"document_path": "b.md"}, fail)
+        return first, second, third, fourth
+
+    assert asyncio.run(run()) == (1, 1, 2, 3)
+    assert coalescer.stats["cache_hits"] == 1
+
+
+def test_execution_cancelled_only_when_every_caller_cancels():
+    coalescer = ToolCallCoalescer()
+    cancelled = []
+
+    async def execute():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def run():
+        first = asyncio.ensure_future(coalescer.run("generate_project", {"output_dir": "out"}, execute))
+        second = asyncio.ensure_future(coalescer.run("generate_project", {"output_dir": "out"}, execute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled
+
+    asyncio.run(run())
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+pytest.importorskip("mcp")
+from starlette.testclient import TestClient
+
+from mcp_codegen import server
+
+
+def _rpc(client, headers, method, params=None, request_id=None):
+    message = {"jsonrpc": "2.0", "method": method}
+    if params is not None:
+        message["params"] = params
+    if request_id is not None:
+        message["id"] = request_id
+    response = client.post("/mcp/", json=message, headers=headers)
+    assert response.status_code in (200, 202)
+    data = [line[len("data:"):] for line in response.text.splitlines() if line.startswith("data:")]
+    return response, json.loads(data[-1]) if data else None
+
+
+def test_http_app_starts_and_lists_tools(monkeypatch):
+    async def no_warm_up():
+        pass
+
+    monkeypatch.setattr(server, "_warm_up", no_warm_up)
+    headers = {"Accept": "application/json, text/event-stream"}
+
+    with TestClient(server.build_http_app()) as client:
+        response, init = _rpc(client, headers, "initialize", {
+            "protocolVersion": "2025-03-26",
+            "capabilities": {},
+            "clientInfo": {"name": "smoke-test", "version": "0"},
+        }, request_id=1)
+        assert init["result"]["serverInfo"]["name"] == "codegen"
+        headers["mcp-session-id"] = response.headers["mcp-session-id"]
+
+        _rpc(client, headers, "notifications/initialized")
+        _, listed = _rpc(client, headers, "tools/list", request_id=2)
+
+    names = {tool["name"] for tool in listed["result"]["tools"]}
+    assert {"create_prd", "parse_prd", "retrieve_context", "generate_project"} <= names
@@ -0,0 +1,154 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from agents.ingestion import (
+    IngestManifest,
+    chunk_markdown,
+    content_hash,
+    default_manifest_path,
+    incremental_ingest,
+    iter_source_files,
+    run_ingestion_pipeline,
+)
+
+
+class FakeStore:
+    def __init__(self, collection):
+        self.collection = collection
+        self.writer_threads = set()
+        self.embed_calls = 0
+
+    def embed_documents(self, texts):
+        self.embed_calls += 1
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def add_embedded_documents(self, ids, documents, metadatas, embeddings):
+        self.writer_threads.add(threading.get_ident())
+        self.collection.upsert(ids, documents, metadatas, embeddings)
+        return len(ids)
+
+    def update_metadatas(self, ids, metadatas):
+        self.collection.update(ids, metadatas)
+        return len(ids)
+
+    def delete_documents(self, ids):
+        self.collection.delete(ids)
+        return len(ids)
+
+
+@pytest.fixture
+def store(make_collection):
+    return FakeStore(make_collection())
+
+
+def test_chunk_markdown_splits_on_headings_and_size():
+    text = "# A\nintro\n\n## B\n" + "x" * 30 + "\n\n" + "y" * 30
+    chunks = chunk_markdown(text, max_chars=40)
+    assert chunks[0] == "# A\nintro"
+    assert all(len(c) <= 40 for c in chunks)
+    assert "".join(chunks).count("x") == 30
+
+
+def test_pipeline_embeds_in_batches_with_single_writer(tmp_path, store):
+    for domain in ("backend", "qa"):
+        (tmp_path / "docs" / domain).mkdir(parents=True)
+        for i in range(3):
+            (tmp_path / "docs" / domain / f"{i}.md").write_text(f"# {domain} {i}\n\nbody", encoding="utf-8")
+    (tmp_path / "docs" / "qa" / "empty.md").write_text("  ", encoding="utf-8")
+
+    sources = iter_source_files({"backend": "docs/backend", "qa": "docs/qa"}, tmp_path)
+    stats = run_ingestion_pipeline(store, sources, workers=2, batch_size=4, max_in_flight=2)
+
+    assert stats.files_by_domain == {"backend": 3, "qa": 3}
+    assert store.collection.count() == 6
+    assert store.embed_calls == 2
+    assert len(store.writer_threads) == 1
+    assert store.collection.records["docs/qa/1.md#chunk0"][1]["domain"] == "qa"
+    assert stats.write.items == 6
+
+
+def test_incremental_ingest_only_touches_changed_chunks(tmp_path, store):
+    docs = tmp_path / "docs" / "backend"
+    docs.mkdir(parents=True)
+    (docs / "a.md").write_text("# One\n\nfirst\n\n# Two\n\nsecond", encoding="utf-8")
+    (docs / "b.md").write_text("# B\n\nbee", encoding="utf-8")
+    domain_dirs = {"backend": "docs/backend"}
+    manifest = IngestManifest(tmp_path / "manifest.json")
+
+    stats = incremental_ingest(store, domain_dirs, manifest, tmp_path)
+    assert stats.write.items == 3
+
+    # Nothing changed: no file is re-read
+    stats = incremental_ingest(store, domain_dirs, IngestManifest(tmp_path / "manifest.json"), tmp_path)
+    assert stats.read.items == 0
+
+    # Edit one section of a.md and delete b.md
+    (docs / "a.md").write_text("# One\n\nfirst\n\n# Two\n\nchanged", encoding="utf-8")
+    os.utime(docs / "a.md", (1, 1))
+    (docs / "b.md").unlink()
+    manifest = IngestManifest(tmp_path / "manifest.json")
+    stats = incremental_ingest(store, domain_dirs, manifest, tmp_path)
+
+    assert stats.write.items == 1
+    assert sorted(store.collection.records) == ["docs/backend/a.md#chunk0", "docs/backend/a.md#chunk1"]
+    assert store.collection.records["docs/backend/a.md#chunk1"][0].endswith("changed")
+    # The unchanged first chunk was not re-embedded but describes the new file
+    new_hash = content_hash((docs / "a.md").read_text(encoding="utf-8"))
+    assert {metadata["content_hash"] for _, metadata, _ in store.collection.records.values()} == {new_hash}
+    assert manifest.tombstones["docs/backend/b.md"]["chunk_ids"] == ["docs/backend/b.md#chunk0"]
+
+
+def test_full_ingest_reembeds_everything_and_drops_stale_chunks(tmp_path, store):
+    docs = tmp_path / "docs" / "backend"
+    docs.mkdir(parents=True)
+    (docs / "a.md").write_text("# One\n\nfirst\n\n# Two\n\nsecond", encoding="utf-8")
+    (docs / "b.md").write_text("# B\n\nbee", encoding="utf-8")
+    domain_dirs = {"backend": "docs/backend"}
+    incremental_ingest(store, domain_dirs, IngestManifest(tmp_path / "manifest.json"), tmp_path)
+
+    # a.md shrinks to one chunk and b.md is deleted
+    (docs / "a.md").write_text("# One\n\nfirst", encoding="utf-8")
+    (docs / "b.md").unlink()
+    manifest = IngestManifest(tmp_path / "manifest.json")
+    stats = incremental_ingest(store, domain_dirs, manifest, tmp_path, full=True)
+
+    assert stats.write.items == 1
+    assert sorted(store.collection.records) == ["docs/backend/a.md#chunk0"]
+    assert list(manifest.entries) == ["docs/backend/a.md"]
+
+
+def test_default_manifest_path_without_chromadb():
+    class StoreWithoutChroma:
+        pass
+
+    path = default_manifest_path(StoreWithoutChroma())
+    assert path.name.endswith(".ingest_manifest.json")
+
+
+def test_file_changed_while_reading_is_ingested_again(tmp_path, monkeypatch, store):
+    docs = tmp_path / "docs" / "backend"
+    docs.mkdir(parents=True)
+    path = docs / "a.md"
+    path.write_text("# A\n\nold", encoding="utf-8")
+    os.utime(path, (1, 1))
+    domain_dirs = {"backend": "docs/backend"}
+    read_text = Path.read_text
+
+    def edit_after_read(self, *args, **kwargs):
+        content = read_text(self, *args, **kwargs)
+        if self.name == "a.md" and content.endswith("old"):
+            self.write_text("# A\n\nnew", encoding="utf-8")
+            os.utime(self, (2, 2))
+        return content
+
+    monkeypatch.setattr(Path, "read_text", edit_after_read)
+    incremental_ingest(store, domain_dirs, IngestManifest(tmp_path / "manifest.json"), tmp_path)
+    assert store.collection.records["docs/backend/a.md#chunk0"][0].endswith("old")
+
+    # The manifest holds the mtime from before the edit, so the next run re-reads the file
+    stats = incremental_ingest(store, domain_dirs, IngestManifest(tmp_path / "manifest.json"), tmp_path)
+    assert stats.read.items == 1
+    assert store.collection.records["docs/backend/a.md#chunk0"][0].endswith("new")
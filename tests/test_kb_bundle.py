@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from agents.kb_bundle import export_bundle, import_bundle, list_context7_libraries, read_manifest
+
+
+class FakeStore:
+    embedding_model = "text-embedding-3-small"
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def add_embedded_documents(self, ids, documents, metadatas, embeddings):
+        self.collection.upsert(ids, documents, metadatas, embeddings)
+        return len(ids)
+
+    def delete_documents(self, ids):
+        self.collection.delete(ids)
+        return len(ids)
+
+
+def _fastapi(i):
+    return ("fastapi chunk %d" % i,
+            {"domain": "backend", "source_type": "context7", "library_id": "/fastapi/fastapi",
+             "library_name": "FastAPI", "ingested_at": "2025-06-01T10:00:00"},
+            [float(i), 1.0, 0.5])
+
+
+def test_bundle_roundtrip_skips_embedding(tmp_path, make_collection):
+    collection = make_collection({
+        **{f"fastapi-{i}": _fastapi(i) for i in range(5)},
+        "react-0": ("react", {"domain": "frontend", "source_type": "context7",
+                              "library_id": "/reactjs/react.dev"}, [0.0, 1.0, 0.0]),
+        "local": ("notes", {"domain": "qa", "source": "docs/qa/a.md"}, [1.0, 0.0, 0.0]),
+    })
+    assert list_context7_libraries(collection, page_size=2) == {"/fastapi/fastapi": 5, "/reactjs/react.dev": 1}
+
+    path = export_bundle(collection, "/fastapi/fastapi", tmp_path, "text-embedding-3-small", page_size=2)
+    assert path.name == "fastapi_fastapi-2025.06.01.kbbundle.zip"
+    assert read_manifest(path)["count"] == 5
+
+    store = FakeStore(make_collection())
+    manifest = import_bundle(store, path, batch_size=2)
+    assert manifest["library_name"] == "FastAPI"
+    assert set(store.collection.records) == {f"fastapi-{i}" for i in range(5)}
+    document, metadata, embedding = store.collection.records["fastapi-3"]
+    assert document == "fastapi chunk 3"
+    assert metadata["bundle_version"] == "2025.06.01"
+    assert np.allclose(embedding, [3.0, 1.0, 0.5])
+
+
+def test_import_rejects_other_embedding_model(tmp_path, make_collection):
+    collection = make_collection({"fastapi-0": _fastapi(0)})
+    path = export_bundle(collection, "/fastapi/fastapi", tmp_path, "text-embedding-3-large")
+    with pytest.raises(ValueError, match="embedded with"):
+        import_bundle(FakeStore(make_collection()), path)
+
+
+def test_newer_bundle_removes_chunks_of_older_version(tmp_path, make_collection):
+    old_path = export_bundle(
+        make_collection({f"fastapi-{i}": _fastapi(i) for i in range(3)}),
+        "/fastapi/fastapi", tmp_path, "text-embedding-3-small", version="1"
+    )
+    new_path = export_bundle(
+        make_collection({"fastapi-0": _fastapi(0)}),
+        "/fastapi/fastapi", tmp_path, "text-embedding-3-small", version="2"
+    )
+    store = FakeStore(make_collection({
+        "react-0": ("react", {"domain": "frontend", "source_type": "context7",
+                              "library_id": "/reactjs/react.dev"}, [0.0, 1.0, 0.0]),
+    }))
+
+    import_bundle(store, old_path)
+    import_bundle(store, new_path)
+
+    assert set(store.collection.records) == {"fastapi-0", "react-0"}
+    assert store.collection.records["fastapi-0"][1]["bundle_version"] == "2"
@@ -0,0 +1,59 @@
+from agents.kb_maintenance import collect_garbage
+
+
+def test_collect_garbage_removes_stale_entries(tmp_path, make_collection):
+    (tmp_path / "docs" / "qa").mkdir(parents=True)
+    (tmp_path / "docs" / "qa" / "kept.md").write_text("x", encoding="utf-8")
+    collection = make_collection({
+        # Same Context7 library fetched twice: the older dump is superseded
+        "old-fastapi": ("fastapi v1", {"domain": "backend", "source": "context7://_fastapi_fastapi",
+                                       "library_id": "/fastapi/fastapi", "ingested_at": "2025-01-01"}),
+        "new-fastapi": ("fastapi v2", {"domain": "backend", "source": "context7://_fastapi_fastapi",
+                                       "library_id": "/fastapi/fastapi", "ingested_at": "2025-06-01"}),
+        # Identical learned fixes: keep the newest
+        "fix-1": ("fixed code", {"domain": "shared", "type": "error_fix", "ingested_at": "2025-01-01"}),
+        "fix-2": ("fixed code", {"domain": "shared", "type": "error_fix", "ingested_at": "2025-02-01"}),
+        # Whole-file legacy document replaced by chunks of the same file
+        "legacy": ("whole file", {"domain": "qa", "source": "docs/qa/kept.md"}),
+        "docs/qa/kept.md#chunk0": ("chunk", {"domain": "qa", "source": "docs/qa/kept.md"}),
+        # Source file deleted from disk
+        "gone": ("deleted", {"domain": "qa", "source": "docs/qa/gone.md"}),
+    })
+
+    report = collect_garbage(collection, base_path=tmp_path, page_size=3, batch_size=2)
+
+    assert sorted(collection.records) == ["docs/qa/kept.md#chunk0", "fix-2", "new-fastapi"]
+    assert report["count_before"] == 7
+    assert report["count_after"] == 3
+    assert (report["duplicates"], report["superseded"], report["orphaned"]) == (1, 2, 1)
+
+
+def test_collect_garbage_dry_run_deletes_nothing(tmp_path, make_collection):
+    collection = make_collection({
+        "a": ("same", {"domain": "shared"}),
+        "b": ("same", {"domain": "shared"}),
+    })
+    report = collect_garbage(collection, base_path=tmp_path, dry_run=True)
+    assert report["would_delete"] == 1
+    assert collection.count() == 2
+
+
+def test_identical_chunks_tracked_by_the_manifest_are_kept(tmp_path, make_collection):
+    docs = tmp_path / "docs" / "qa"
+    docs.mkdir(parents=True)
+    for name in ("a.md", "b.md"):
+        (docs / name).write_text("# Setup", encoding="utf-8")
+    collection = make_collection({
+        "docs/qa/a.md#chunk0": ("# Setup", {"domain": "qa", "source": "docs/qa/a.md", "ingested_at": "1"}),
+        "docs/qa/a.md#chunk1": ("---", {"domain": "qa", "source": "docs/qa/a.md", "ingested_at": "1"}),
+        "docs/qa/a.md#chunk2": ("---", {"domain": "qa", "source": "docs/qa/a.md", "ingested_at": "1"}),
+        "docs/qa/b.md#chunk0": ("# Setup", {"domain": "qa", "source": "docs/qa/b.md", "ingested_at": "2"}),
+        # Learned fixes from different sources are not merged either
+        "fix-a": ("fixed code", {"domain": "shared", "source": "learned://run-a", "ingested_at": "1"}),
+        "fix-b": ("fixed code", {"domain": "shared", "source": "learned://run-b", "ingested_at": "2"}),
+    })
+
+    report = collect_garbage(collection, base_path=tmp_path)
+
+    assert report["duplicates"] == 0
+    assert collection.count() == 6
@@ -0,0 +1,62 @@
+from agents.kb_maintenance import delete_in_batches
+from agents.kb_stats import KBStatsIndex
+from agents.rag_retrieval import DomainScopedRAGStore
+
+
+def test_stats_index_tracks_writes_and_deletes(tmp_path, make_collection):
+    collection = make_collection({
+        "a": ("abc", {"domain": "backend", "library_name": "fastapi"}),
+        "b": ("de", {"domain": "backend"}),
+        "c": ("f", {"domain": "qa"}),
+    })
+    index = KBStatsIndex(tmp_path / "kb.stats.json")
+    index.record_added([m for _, m in collection.records.values()],
+                       [d for d, _ in collection.records.values()])
+    assert index.domains == {"backend": 2, "qa": 1}
+    assert index.has_library("fastapi")
+
+    delete_in_batches(collection, ["a", "c"], batch_size=1, stats_index=index)
+    assert index.to_dict()["total_bytes"] == 2
+    assert index.domains == {"backend": 1}
+    assert not index.has_library("fastapi")
+
+    # Persisted and reloaded without touching the collection
+    reloaded = KBStatsIndex(tmp_path / "kb.stats.json")
+    assert reloaded.loaded and reloaded.total_documents == 1
+
+
+def test_stats_index_rebuilds_when_out_of_sync(tmp_path, make_collection):
+    collection = make_collection({
+        "a": ("abc", {"domain": "frontend", "library_name": "react"}),
+        "b": ("de", {"domain": "frontend"}),
+    })
+    index = KBStatsIndex(tmp_path / "kb.stats.json").ensure_fresh(collection)
+    assert index.total_documents == 2
+    assert index.libraries == {"react": 1}
+
+    # Another process wrote to the collection behind the index's back
+    collection.records["c"] = ("g", {"domain": "qa"})
+    assert index.ensure_fresh(collection).domains == {"frontend": 2, "qa": 1}
+
+
+def test_store_gc_updates_stats_and_stats_errors_do_not_fail_ingest(tmp_path, caplog, make_collection):
+    store = DomainScopedRAGStore(chroma_dir=tmp_path)
+    store.collection = make_collection({
+        "fix-1": ("fixed code", {"domain": "shared", "ingested_at": "1"}),
+        "fix-2": ("fixed code", {"domain": "shared", "ingested_at": "2"}),
+    })
+    store.stats = KBStatsIndex(tmp_path / "kb.stats.json").ensure_fresh(store.collection)
+    store.initialized = True
+
+    report = store.collect_garbage(base_path=tmp_path, batch_size=1)
+    assert report["deleted"] == 1
+    assert store.stats.total_documents == 1
+
+    class BrokenStats:
+        def record_added(self, metadatas, documents):
+            raise OSError("disk full")
+
+    store.stats = BrokenStats()
+    doc_id = store.ingest_document("new doc", "docs/qa/new.md")
+    assert doc_id in store.collection.records
+    assert "Failed to update KB stats index" in caplog.text
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _loaded_after_import(module: str, candidates: list) -> list:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {candidates!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def test_server_import_defers_heavy_dependencies():
+    pytest.importorskip("mcp")
+    assert _loaded_after_import("mcp_codegen.server", ["chromadb", "openai", "langgraph"]) == []
+
+
+def test_agent_modules_defer_heavy_dependencies():
+    heavy = ["chromadb", "langgraph", "langchain"]
+    assert _loaded_after_import("agents.rag_retrieval", heavy) == []
+    assert _loaded_after_import("agents.learning_memory", heavy) == []
+    assert _loaded_after_import("agents.subagents.intent_parser", ["numpy"]) == []
+
+
+def test_learning_availability_checks_backend_packages(monkeypatch):
+    import importlib.util
+
+    from agents import learning_memory
+
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util,
+        "find_spec",
+        lambda name, *args: None if name == "langgraph" else real_find_spec(name, *args),
+    )
+    assert learning_memory.learning_dependencies_available() is False
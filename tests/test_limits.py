@@ -0,0 +1,24 @@
+import asyncio
+
+from mcp_codegen.limits import ClientConcurrencyLimiter
+
+
+def test_each_client_is_capped_independently():
+    limiter = ClientConcurrencyLimiter(max_per_client=2)
+    running = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    async def call(client):
+        async with limiter.slot(client):
+            running[client] += 1
+            peak[client] = max(peak[client], running[client])
+            await asyncio.sleep(0.01)
+            running[client] -= 1
+
+    async def run():
+        await asyncio.gather(*(call("a") for _ in range(6)), call("b"))
+
+    asyncio.run(run())
+    assert peak == {"a": 2, "b": 1}
+    # Idle clients leave nothing behind
+    assert limiter.in_flight("a") == 0 and not limiter._clients
@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agents import llm
+from agents.llm_cache import LLMResponseCache, cache_key
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = '{"call": %d}' % self.calls
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_repeated_completion_is_served_from_cache(isolated_llm_cache, monkeypatch):
+    completions = CountingCompletions()
+    monkeypatch.setattr(llm, "get_openai_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    messages = [{"role": "user", "content": "todo app"}]
+
+    first = llm.chat_completion(messages, response_format={"type": "json_object"})
+    second = llm.chat_completion(messages, response_format={"type": "json_object"})
+    # A different response_format is a different request
+    third = llm.chat_completion(messages)
+    # Bypass forces a fresh response and refreshes the entry
+    fourth = llm.chat_completion(messages, response_format={"type": "json_object"}, bypass_cache=True)
+
+    assert first == second == '{"call": 1}'
+    assert third == '{"call": 2}'
+    assert fourth == '{"call": 3}'
+    assert completions.calls == 3
+    stats = isolated_llm_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 2
+
+
+def test_response_failing_validation_is_not_cached(isolated_llm_cache, monkeypatch):
+    responses = iter(['{"truncated": ', '{"ok": true}'])
+    completions = SimpleNamespace(create=lambda **kwargs: SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=next(responses)))]
+    ))
+    monkeypatch.setattr(llm, "get_openai_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    messages = [{"role": "user", "content": "todo app"}]
+
+    with pytest.raises(json.JSONDecodeError):
+        llm.chat_completion(messages, validate=json.loads)
+    # The retry asks the API again instead of replaying the bad response
+    assert llm.chat_completion(messages, validate=json.loads) == '{"ok": true}'
+    assert llm.chat_completion(messages, validate=json.loads) == '{"ok": true}'
+    assert isolated_llm_cache.stats()["entries"] == 1
+
+
+def test_cached_response_failing_validation_is_refetched(isolated_llm_cache, monkeypatch):
+    completions = CountingCompletions()
+    monkeypatch.setattr(llm, "get_openai_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    messages = [{"role": "user", "content": "todo app"}]
+    isolated_llm_cache.put(cache_key(llm.DEFAULT_MODEL, messages), llm.DEFAULT_MODEL, "not json")
+
+    assert llm.chat_completion(messages, validate=json.loads) == '{"call": 1}'
+    assert llm.chat_completion(messages, validate=json.loads) == '{"call": 1}'
+    assert completions.calls == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite", max_bytes=25)
+    keys = [cache_key("m", [{"role": "user", "content": str(i)}]) for i in range(3)]
+    cache.put(keys[0], "m", "a" * 10)
+    cache.put(keys[1], "m", "b" * 10)
+    assert cache.get(keys[0]) == "a" * 10  # keys[1] is now least recently used
+    cache.put(keys[2], "m", "c" * 10)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "a" * 10 and cache.get(keys[2]) == "c" * 10
+    assert cache.stats()["evictions"] == 1
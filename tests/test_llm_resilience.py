@@ -0,0 +1,118 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.llm_resilience import HedgePolicy, ResilientCaller, RetryPolicy, retry_after_seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers=headers)
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+def test_retries_honor_retry_after_and_stop_on_permanent_errors():
+    sleeps = []
+    caller = ResilientCaller(RetryPolicy(max_attempts=4, base_delay=0.5, max_delay=10), sleep=sleeps.append)
+    failures = [RateLimitError({"retry-after": "3"}), RateLimitError({"retry-after-ms": "250"}), RateLimitError({})]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert caller.call(flaky) == "ok"
+    assert sleeps[:2] == [3.0, 0.25]
+    # Without a header: full jitter up to base * 2 ** (attempt - 1)
+    assert 0 <= sleeps[2] <= 2.0
+    assert caller.stats()["retries"] == 3
+
+    def bad_request():
+        raise BadRequestError("invalid")
+
+    with pytest.raises(BadRequestError):
+        caller.call(bad_request)
+    assert caller.stats()["retries"] == 3
+
+
+def test_retry_after_http_date():
+    exc = RateLimitError({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert retry_after_seconds(exc) == 0.0
+
+
+def test_slow_call_is_hedged_within_budget():
+    caller = ResilientCaller(hedge=HedgePolicy(enabled=True, min_delay=0.05, max_ratio=0.5, min_samples=3))
+    for _ in range(3):
+        caller.call(lambda: "warm-up")
+
+    calls = []
+    lock = threading.Lock()
+
+    def first_call_stalls():
+        with lock:
+            calls.append(None)
+            n = len(calls)
+        if n == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    assert caller.call(first_call_stalls) == "fast"
+    assert time.perf_counter() - start < 0.5
+    stats = caller.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+    # Streams and other non-duplicable calls are never hedged
+    assert caller.hedge_delay("default") is not None
+    calls.clear()
+    assert caller.call(first_call_stalls, hedge=False) == "slow"
+    assert caller.stats()["hedges"] == 1
+
+
+def test_discarded_attempts_and_hedge_losers_are_reported():
+    discarded = []
+    caller = ResilientCaller(
+        RetryPolicy(max_attempts=3),
+        hedge=HedgePolicy(enabled=True, min_delay=0.05, max_ratio=1.0, min_samples=1),
+        sleep=lambda _: None,
+    )
+    failures = [RateLimitError({})]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "warm-up"
+
+    assert caller.call(flaky, on_discarded=lambda result, error: discarded.append((result, type(error)))) == "warm-up"
+    assert discarded == [(None, RateLimitError)]
+
+    calls = []
+    lock = threading.Lock()
+    loser_done = threading.Event()
+
+    def first_call_stalls():
+        with lock:
+            calls.append(None)
+            n = len(calls)
+        if n == 1:
+            time.sleep(0.3)
+            return "slow"
+        return "fast"
+
+    def on_discarded(result, error):
+        discarded.append((result, error))
+        loser_done.set()
+
+    assert caller.call(first_call_stalls, on_discarded=on_discarded) == "fast"
+    # The losing primary is reported once it finishes in the background
+    assert loser_done.wait(2)
+    assert discarded[-1] == ("slow", None)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from agents import llm
+from agents.llm_stub import StubConfig, StubLLM, StubServer, create_app
+from mcp_codegen import llm as mcp_llm
+from mcp_codegen.agents.prd_agent import PRDAgent
+
+FAST = dict(latency_ms=0, ttft_ms=0, token_ms=0)
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    with StubServer(StubConfig(**FAST, embedding_dim=64)) as server:
+        yield server
+
+
+@pytest.fixture
+def stub_clients(stub_server, monkeypatch):
+    """Point the agents and MCP clients at the stub server."""
+    monkeypatch.setenv("OPENAI_BASE_URL", stub_server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(llm, "_client", None)
+    monkeypatch.setattr(mcp_llm, "OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(mcp_llm, "OPENAI_BASE_URL", stub_server.base_url)
+    monkeypatch.setattr(mcp_llm, "_async_client", None)
+    return stub_server
+
+
+def test_agents_llm_calls_are_served_deterministically(stub_clients, tmp_path):
+    messages = [{"role": "user", "content": "A todo app with auth"}]
+
+    text = llm.chat_completion(messages, bypass_cache=True)
+    assert text.startswith("# Stub response")
+    assert llm.chat_completion(messages, bypass_cache=True) == text
+    assert llm.chat_completion([{"role": "user", "content": "other"}], bypass_cache=True) != text
+
+    intent = json.loads(llm.chat_completion(messages, response_format={"type": "json_object"}))
+    assert intent["project_description"] == "A todo app with auth"
+
+    # Streaming delivers the same content chunk by chunk
+    path = llm.stream_chat_completion_to_file(messages, tmp_path / "doc.md", bypass_cache=True)
+    assert path.read_text(encoding="utf-8") == text
+
+    # The SDK requests base64 embeddings; vectors are unit length and stable
+    first, second = llm.embed_texts(["alpha", "beta"])
+    assert len(first) == 64
+    assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-5)
+    assert llm.embed_texts(["alpha"])[0] == pytest.approx(first)
+    assert first != pytest.approx(second)
+    assert stub_clients.stub.stats()["requests"]["chat"] >= 4
+
+
+def test_mcp_prd_agent_streams_from_the_stub(stub_clients, tmp_path):
+    output = tmp_path / "prd.md"
+
+    async def create():
+        try:
+            return await PRDAgent().create_prd("A tea shop", str(output))
+        finally:
+            await mcp_llm.aclose_clients()
+
+    result = asyncio.run(create())
+
+    assert result["status"] == "created"
+    assert output.read_text(encoding="utf-8").startswith("# Stub response")
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_latency_and_errors_replay_from_the_seed():
+    bodies = [{"messages": [{"role": "user", "content": f"request {i}"}]} for i in range(50)]
+
+    def outcomes(seed, order):
+        stub = StubLLM(StubConfig(latency_ms=100, error_rate=0.3, seed=seed))
+        results = {}
+        for i in order:
+            rng = stub.request_rng("chat", bodies[i])
+            results[i] = (stub.sample_latency_s(rng), stub.injected_error(rng) is not None)
+        return [results[i] for i in range(len(bodies))]
+
+    in_order = outcomes(7, range(50))
+    # Concurrent arrival order does not change what each request gets
+    assert outcomes(7, reversed(range(50))) == in_order
+    assert outcomes(8, range(50)) != in_order
+    latencies = [latency for latency, _ in in_order]
+    assert 0.05 < float(np.median(latencies)) < 0.2
+
+    # A repeated request (a retry) gets a fresh draw, the same one on every run
+    stub = StubLLM(StubConfig(latency_ms=100, seed=7))
+    repeats = [stub.sample_latency_s(stub.request_rng("chat", bodies[0])) for _ in range(3)]
+    assert repeats[0] == in_order[0][0] and len(set(repeats)) == 3
+
+    constant = StubLLM(StubConfig(latency_ms=30, latency_distribution="constant"))
+    assert constant.sample_latency_s(constant.request_rng("chat", {})) == pytest.approx(0.03)
+    with pytest.raises(ValueError):
+        StubLLM(StubConfig(latency_distribution="bimodal"))
+
+
+def test_streams_sample_time_to_first_token(monkeypatch):
+    from starlette.testclient import TestClient
+
+    stub = StubLLM(StubConfig(latency_ms=0, ttft_ms=2, token_ms=0))
+    sampled = []
+    sample = stub.sample_latency_s
+
+    def recording_sample(rng, median_ms=None):
+        sampled.append(median_ms)
+        return sample(rng, median_ms)
+
+    monkeypatch.setattr(stub, "sample_latency_s", recording_sample)
+    client = TestClient(create_app(stub))
+
+    response = client.post("/v1/chat/completions", json={"model": "gpt-4o", "messages": [], "stream": True})
+
+    assert response.status_code == 200 and "[DONE]" in response.text
+    assert sampled == [2]
+
+
+def test_injected_rate_limits_carry_retry_after():
+    from starlette.testclient import TestClient
+
+    stub = StubLLM(StubConfig(**FAST, error_rate=1.0, retry_after_s=2))
+    client = TestClient(create_app(stub))
+
+    response = client.post("/v1/chat/completions", json={"model": "gpt-4o", "messages": []})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+    assert response.json()["error"]["type"] == "stub_error"
+    assert stub.stats() == {"requests": {}, "errors": 1}
+    assert "gpt-4o" in [m["id"] for m in client.get("/v1/models").json()["data"]]
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agents import llm, llm_resilience, llm_usage
+from agents.llm_resilience import ResilientCaller, RetryPolicy
+from agents.llm_usage import UsageTracker, llm_context
+from agents.logging import RunLogger
+from mcp_codegen.agents import prd_agent
+from mcp_codegen.agents.prd_agent import PRDAgent
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = UsageTracker()
+    monkeypatch.setattr(llm_usage, "_tracker", tracker)
+    return tracker
+
+
+class FakeCompletions:
+    def create(self, model, messages, **kwargs):
+        usage = SimpleNamespace(prompt_tokens=50, completion_tokens=10, prompt_tokens_details=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))], usage=usage)
+
+
+def test_calls_are_recorded_per_agent_and_flow_into_the_run_log(tracker, tmp_path, monkeypatch):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(llm, "get_openai_client", lambda: client)
+    run_logger = RunLogger(log_dir=str(tmp_path / "logs"))
+
+    run_logger.start_run("run-1", {})
+    messages = [{"role": "user", "content": "hi"}]
+    llm.chat_completion(messages, agent="intent_parser")
+    llm.chat_completion(messages, agent="intent_parser")  # response cache hit
+    with llm_context(agent="rules_generator"):
+        llm.chat_completion([{"role": "user", "content": "rules"}], model="gpt-4o")
+    run_logger.end_run({"status": "ok"})
+    llm.chat_completion([{"role": "user", "content": "outside the run"}])
+
+    events = [json.loads(line) for line in (tmp_path / "logs" / "run-1.log").read_text().splitlines()]
+    calls = [e["data"] for e in events if e["event"] == "llm_call"]
+    assert [(c["agent"], c["cache_hit"]) for c in calls] == [
+        ("intent_parser", False), ("intent_parser", True), ("rules_generator", False)
+    ]
+    assert calls[0]["prompt_tokens"] == 50 and calls[0]["ttft_ms"] is not None
+
+    usage = events[-1]["data"]["summary"]["llm_usage"]
+    assert usage["totals"]["calls"] == 3
+    intent = next(g for g in usage["by_agent_model"] if g["agent"] == "intent_parser")
+    assert intent["cache_hits"] == 1 and intent["total_tokens"] == 60
+    assert tracker.summary()["totals"]["calls"] == 4
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+def test_retried_attempts_are_recorded_and_runs_log_each_call_once(tracker, tmp_path, monkeypatch):
+    failures = [APITimeoutError("timed out")]
+
+    class FlakyCompletions(FakeCompletions):
+        def create(self, model, messages, **kwargs):
+            if failures:
+                raise failures.pop(0)
+            return super().create(model, messages, **kwargs)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FlakyCompletions()))
+    monkeypatch.setattr(llm, "get_openai_client", lambda: client)
+    monkeypatch.setattr(llm_resilience, "_caller", ResilientCaller(RetryPolicy(max_attempts=2), sleep=lambda _: None))
+    run_logger = RunLogger(log_dir=str(tmp_path / "logs"))
+
+    # Starting the run twice does not register the listener twice
+    run_logger.start_run("run-2", {})
+    run_logger.start_run("run-2", {})
+    llm.chat_completion([{"role": "user", "content": "hi"}], agent="intent_parser")
+    run_logger.end_run({"status": "ok"})
+
+    events = [json.loads(line) for line in (tmp_path / "logs" / "run-2.log").read_text().splitlines()]
+    calls = [e["data"] for e in events if e["event"] == "llm_call"]
+    assert [(c["discarded"], c["error"] is not None) for c in calls] == [(True, True), (False, False)]
+    totals = events[-1]["data"]["summary"]["llm_usage"]["totals"]
+    assert totals["calls"] == 2 and totals["discarded"] == 1 and totals["total_tokens"] == 60
+
+
+class FakeStreamingCompletions:
+    async def create(self, model, messages, stream, stream_options, **kwargs):
+        async def chunks():
+            for text in ["# PRD\n", "## Summary\n", "Short.\n"]:
+                await asyncio.sleep(0.01)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+            usage = SimpleNamespace(
+                prompt_tokens=100, completion_tokens=20, prompt_tokens_details=SimpleNamespace(cached_tokens=64)
+            )
+            yield SimpleNamespace(choices=[], usage=usage)
+
+        return chunks()
+
+
+def test_streamed_prd_records_ttft_and_cached_tokens(tracker, tmp_path, monkeypatch):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeStreamingCompletions()))
+    client.with_options = lambda **options: client
+    monkeypatch.setattr(prd_agent, "get_async_openai_client", lambda: client)
+
+    asyncio.run(PRDAgent().create_prd("idea", str(tmp_path / "prd.md")))
+
+    [record] = tracker.records()
+    assert record.agent == "prd_agent" and record.streamed
+    assert (record.prompt_tokens, record.completion_tokens, record.cached_tokens) == (100, 20, 64)
+    assert record.queue_ms >= 0 and 0 < record.ttft_ms < record.latency_ms
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from agents.executors import ReadWriteExecutor
+from mcp_codegen.metrics import LatencyHistogram, ServerMetrics
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.observe(0.02)
+    for _ in range(10):
+        histogram.observe(3.0)
+    assert 0.01 <= histogram.percentile(0.5) <= 0.025
+    assert 2.5 <= histogram.percentile(0.99) <= 3.0
+    assert histogram.summary()["count"] == 100
+
+
+def test_tool_tracking_attributes_component_time_across_threads():
+    metrics = ServerMetrics()
+    executor = ReadWriteExecutor("metrics-test")
+
+    def query():
+        with metrics.timed("chroma"):
+            pass
+
+    async def tool():
+        async with metrics.track_tool("retrieve_context"):
+            async with metrics.handler("retrieve_context"):
+                await executor.run_read(query)
+
+    async def failing_tool():
+        async with metrics.track_tool("parse_prd"):
+            async with metrics.handler("parse_prd"):
+                raise FileNotFoundError("missing.md")
+
+    asyncio.run(tool())
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(failing_tool())
+    executor.shutdown()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["tools"]["retrieve_context"]["count"] == 1
+    assert "chroma" in snapshot["tools"]["retrieve_context"]["breakdown_ms"]
+    assert snapshot["tools"]["parse_prd"]["errors"] == 1
+    assert snapshot["tools"]["parse_prd"]["in_flight"] == 0
+    assert snapshot["components"]["chroma"]["count"] == 1
+
+    text = metrics.to_prometheus()
+    assert 'mcp_tool_latency_seconds_bucket{tool="retrieve_context",le="+Inf"} 1' in text
+    assert 'mcp_tool_errors_total{tool="parse_prd"} 1' in text
+
+
+def test_queue_wait_and_stream_waits_are_kept_out_of_handler_time():
+    metrics = ServerMetrics()
+
+    async def chunks():
+        for _ in range(3):
+            await asyncio.sleep(0.01)
+            yield "x"
+
+    async def tool():
+        async with metrics.track_tool("create_prd"):
+            await asyncio.sleep(0.3)  # waiting for a slot
+            async with metrics.handler("create_prd"):
+                with metrics.accumulated("llm") as llm_wait:
+                    async for _ in llm_wait.stream(chunks()):
+                        await asyncio.sleep(0.05)  # writing the chunk
+
+    asyncio.run(tool())
+
+    snapshot = metrics.snapshot()
+    tool_stats = snapshot["tools"]["create_prd"]
+    assert tool_stats["queue_wait"]["count"] == 1
+    assert tool_stats["queue_wait"]["max_ms"] >= 300
+    assert 180 <= tool_stats["max_ms"] < 300
+    assert snapshot["components"]["llm"]["count"] == 1
+    assert 30 <= snapshot["components"]["llm"]["max_ms"] < 150
+    assert 'mcp_tool_queue_wait_seconds_count{tool="create_prd"} 1' in metrics.to_prometheus()
@@ -0,0 +1,49 @@
+from agents.mmr import default_fetch_k, maximal_marginal_relevance
+
+
+def test_mmr_skips_near_duplicates():
+    query = [1.0, 0.3]
+    embeddings = [
+        [1.0, 0.3],    # best match
+        [1.0, 0.32],   # near-duplicate of the best match
+        [0.3, 1.0],    # less relevant but different
+    ]
+    assert maximal_marginal_relevance(query, embeddings, k=2, lambda_mult=0.3) == [0, 2]
+    assert maximal_marginal_relevance(query, embeddings, k=2, lambda_mult=1.0) == [0, 1]
+
+
+def test_mmr_pure_relevance_keeps_similarity_order():
+    query = [1.0, 0.0]
+    embeddings = [[0.0, 1.0], [1.0, 0.0], [0.9, 0.1]]
+    assert maximal_marginal_relevance(query, embeddings, k=3, lambda_mult=1.0) == [1, 2, 0]
+
+
+def test_mmr_handles_small_candidate_sets():
+    assert maximal_marginal_relevance([1.0, 0.0], [], k=3) == []
+    assert maximal_marginal_relevance([1.0, 0.0], [[1.0, 0.0]], k=3) == [0]
+
+
+def test_mcp_store_over_fetches_with_the_shared_policy():
+    from mcp_codegen.rag.store import RAGStore
+
+    class Collection:
+        def __init__(self):
+            self.n_results = []
+
+        def query(self, query_embeddings, n_results, include):
+            self.n_results.append(n_results)
+            return {
+                "documents": [[f"doc {i}" for i in range(n_results)]],
+                "metadatas": [[{} for _ in range(n_results)]],
+                "distances": [[0.0] * n_results],
+                "embeddings": [[[1.0, i / n_results] for i in range(n_results)]],
+            }
+
+    store = RAGStore()
+    store.embedding_fn = lambda texts: [[1.0, 0.0] for _ in texts]
+    store.collection = Collection()
+
+    result = store.retrieve_similar("query", n_results=3, use_mmr=True)
+
+    assert store.collection.n_results == [default_fetch_k(3)] == [12]
+    assert len(result["examples"]) == 3
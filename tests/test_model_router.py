@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from agents.model_router import ModelRouter, ModelTier, TaskProfile
+
+TIERS = [
+    ModelTier("fast", "small-model", 1000, 2.0, 10.0),
+    ModelTier("standard", "mid-model", 8000, 6.0, 30.0),
+    ModelTier("premium", "big-model", 100000, 20.0, 60.0),
+]
+PROFILES = {
+    "prd": TaskProfile(preferred="premium", minimum="standard", long_output=True),
+    "parse": TaskProfile(preferred="premium", minimum="fast"),
+    "intent": TaskProfile(preferred="fast", minimum="fast"),
+}
+
+
+def _router(**kwargs):
+    return ModelRouter(tiers=TIERS, profiles=PROFILES, observed_latency=lambda model: None, **kwargs)
+
+
+def test_routes_by_input_size_and_latency_budget():
+    router = _router()
+    big_input = "x" * 4 * 3000  # ~3000 tokens, too large for the fast tier
+
+    # Small inputs drop to the task's minimum tier, others keep the preferred one
+    small = router.route("parse", "short document")
+    assert (small.model, small.chain) == ("small-model", ["small-model", "mid-model", "big-model"])
+    assert router.route("parse", big_input).model == "big-model"
+    assert router.route("intent", big_input).model == "mid-model"
+    assert router.route("prd", big_input).model == "big-model"
+    # A short idea still asks for a long PRD, so it keeps the preferred tier
+    assert router.route("prd", "short idea").model == "big-model"
+    # The budget rules out the premium tier, but never goes below the task's minimum
+    assert router.route("prd", big_input, latency_budget_s=10).model == "mid-model"
+    assert router.route("prd", big_input, latency_budget_s=1).model == "mid-model"
+
+    stats = router.stats()
+    assert stats["decisions"]["prd"] == {"big-model": 2, "mid-model": 2}
+    # 18 s saved on the small parse, 14 s on each budgeted PRD; the
+    # oversized intent costs 4 s more than its preferred tier
+    assert stats["estimated_latency_saved_s"] == 42.0
+
+
+def test_disabled_router_uses_preferred_model_only():
+    decision = _router(enabled=False).route("parse", "short document")
+    assert (decision.model, decision.chain) == ("big-model", ["big-model"])
+    assert decision.call_options("big-model") == {"timeout": None, "max_attempts": None}
+
+
+def test_falls_back_to_next_tier_on_failure():
+    router = _router()
+    decision = router.route("parse", "short document")
+    calls = []
+
+    def call(model):
+        calls.append((model, decision.call_options(model)))
+        if model == "small-model":
+            raise TimeoutError("too slow")
+        return f"answer from {model}"
+
+    assert router.call_with_fallback(decision, call) == "answer from mid-model"
+    # One quick attempt with the tier's timeout before handing over
+    assert calls[0] == ("small-model", {"timeout": 10.0, "max_attempts": 1})
+    assert decision.fallbacks == ["small-model"]
+    assert router.stats()["fallbacks"] == 1
+
+    async def always_times_out(model):
+        raise TimeoutError(model)
+
+    with pytest.raises(TimeoutError, match="big-model"):
+        asyncio.run(router.acall_with_fallback(decision, always_times_out))
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+def test_non_retryable_errors_do_not_fall_back():
+    router = _router()
+    decision = router.route("parse", "short document")
+    calls = []
+
+    def call(model):
+        calls.append(model)
+        raise BadRequestError("invalid request")
+
+    with pytest.raises(BadRequestError):
+        router.call_with_fallback(decision, call)
+
+    async def acall(model):
+        call(model)
+
+    with pytest.raises(BadRequestError):
+        asyncio.run(router.acall_with_fallback(decision, acall))
+    assert calls == ["small-model", "small-model"]
+    assert router.stats()["fallbacks"] == 0
+
+
+def test_observed_latency_follows_usage_records_in_a_rolling_window(monkeypatch):
+    from agents import llm_usage
+    from agents.llm_usage import LLMCallRecord, UsageTracker
+    from agents.model_router import ObservedLatency
+
+    tracker = UsageTracker()
+    monkeypatch.setattr(llm_usage, "_tracker", tracker)
+    tracker.add(LLMCallRecord(agent="a", model="small-model", latency_ms=1000))
+    observed = ObservedLatency(window_size=5)
+    assert observed("small-model") is None
+
+    for _ in range(4):
+        tracker.add(LLMCallRecord(agent="a", model="small-model", latency_ms=1000))
+    tracker.add(LLMCallRecord(agent="a", model="small-model", latency_ms=1, cache_hit=True))
+    tracker.add(LLMCallRecord(agent="a", model="small-model", latency_ms=1, error="Timeout"))
+    assert observed("small-model") == 1.0
+
+    # Older samples roll out of the window
+    for _ in range(5):
+        tracker.add(LLMCallRecord(agent="a", model="small-model", latency_ms=3000))
+    assert observed("small-model") == 3.0
+    assert observed("mid-model") is None
+
+
+def test_unrecorded_routes_are_left_out_of_stats():
+    router = _router()
+    router.route("parse", "short document", record=False)
+    router.route("parse", "short document")
+
+    stats = router.stats()
+    assert stats["decisions"] == {"parse": {"small-model": 1}}
+    assert stats["estimated_latency_saved_s"] == 18.0
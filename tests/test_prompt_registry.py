@@ -0,0 +1,31 @@
+import os
+
+from agents.prompt_registry import PromptRegistry
+from agents.subagents import intent_parser
+
+
+def test_render_is_cached_and_reloads_on_change(tmp_path):
+    template = tmp_path / "agent.md"
+    template.write_text("Mission for $role.\r\nExample: {\"cost\": \"$5\"}\r\n", encoding="utf-8")
+    registry = PromptRegistry(tmp_path)
+
+    first = registry.render("agent", role="tester")
+    assert first == 'Mission for tester.\nExample: {"cost": "$5"}\n'
+    assert registry.render("agent", role="tester") is first
+    assert registry.names() == ["agent"]
+
+    template.write_text("New mission for $role.\n", encoding="utf-8")
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry.render("agent", role="tester") == "New mission for tester.\n"
+    assert registry.reloads == 1
+
+
+def test_intent_prompt_prefix_is_byte_stable():
+    first = intent_parser.build_messages("a todo app")
+    second = intent_parser.build_messages("a chat app")
+
+    assert first[0]["content"] is second[0]["content"]
+    assert first[0]["content"].startswith("# Intent Parser Agent Mission")
+    assert intent_parser.PROJECT_INTENT_SCHEMA_JSON in first[0]["content"]
+    assert "$schema" not in first[0]["content"]
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+from agents.executors import ReadWriteExecutor
+from agents.kb_stats import KBStatsIndex
+from agents.rag_retrieval import DomainScopedRAGStore
+from mcp_codegen.rag.store import RAGStore
+
+
+class BlockingCollection:
+    """Collection whose calls take a while and record how many overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._active = {"read": 0, "write": 0}
+        self.max_active = {"read": 0, "write": 0}
+
+    def _enter(self, kind):
+        with self._lock:
+            self._active[kind] += 1
+            self.max_active[kind] = max(self.max_active[kind], self._active[kind])
+        time.sleep(self.delay)
+        with self._lock:
+            self._active[kind] -= 1
+
+    def query(self, query_embeddings=None, query_texts=None, n_results=5, where=None, include=None):
+        self._enter("read")
+        return {"documents": [["doc"]], "metadatas": [[{"domain": "shared", "source": "a.md"}]], "distances": [[0.1]]}
+
+    def add(self, documents, metadatas, ids, embeddings=None):
+        self._enter("write")
+
+
+def test_mcp_store_runs_reads_concurrently_and_serializes_writes():
+    store = RAGStore()
+    store.executor = ReadWriteExecutor("test-rag", read_workers=4, write_workers=1)
+    store.collection = BlockingCollection()
+    store.embedding_fn = lambda texts: [[1.0, 0.0] for _ in texts]
+    store.initialized = True
+
+    async def run():
+        await asyncio.gather(*(store.aretrieve_similar(f"query {i}", 1) for i in range(4)))
+        await asyncio.gather(*(store.aadd_code_example(f"code {i}", {"language": "python"}) for i in range(4)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        store.close()
+
+    assert store.collection.max_active == {"read": 4, "write": 1}
+
+
+def test_domain_store_async_api_uses_its_pools(tmp_path):
+    store = DomainScopedRAGStore()
+    store.executor = ReadWriteExecutor("test-domain-rag", read_workers=3, write_workers=1)
+    store.collection = BlockingCollection()
+    store.stats = KBStatsIndex(tmp_path / "stats.json")
+    store.initialized = True
+
+    async def run():
+        reads = await asyncio.gather(*(store.aretrieve_knowledge(f"query {i}", "backend") for i in range(3)))
+        writes = await asyncio.gather(*(store.aingest_document(f"doc {i}", "docs/backend/a.md") for i in range(3)))
+        return reads, writes
+
+    try:
+        reads, writes = asyncio.run(run())
+    finally:
+        store.close()
+
+    assert all("doc" in result for result in reads)
+    assert all(writes)
+    assert store.collection.max_active == {"read": 3, "write": 1}
@@ -0,0 +1,59 @@
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from agents import llm, model_router
+from agents.subagents import rules_generator
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeCompletions:
+    def create(self, model, messages, stream, **kwargs):
+        assert stream is True
+        failing = "task list" in messages[-1]["content"]
+
+        def chunks():
+            time.sleep(0.2)
+            yield _chunk("# Ru")
+            if failing:
+                raise RuntimeError("connection dropped")
+            yield _chunk("les\n")
+            yield _chunk("- be nice")
+
+        return chunks()
+
+
+def test_documents_generated_concurrently_with_independent_errors(tmp_path, monkeypatch):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(llm, "get_openai_client", lambda: client)
+    # One model per task, so a failed document is not retried on other tiers
+    monkeypatch.setattr(model_router, "_router", model_router.ModelRouter(enabled=False))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "tasks.md").write_text("- [ ] existing task", encoding="utf-8")
+
+    start = time.perf_counter()
+    result = rules_generator.run_task({"parsed_intent": {"project_type": "web_app"}})
+
+    # Two 0.2 s requests overlap
+    assert time.perf_counter() - start < 0.35
+    assert (tmp_path / ".cursor" / "rules.md").read_text(encoding="utf-8") == "# Rules\n- be nice"
+    # The stream that broke off leaves the previous file alone and no partial file behind
+    assert (tmp_path / "docs" / "tasks.md").read_text(encoding="utf-8") == "- [ ] existing task"
+    assert sorted(p.name for p in (tmp_path / "docs").iterdir()) == ["tasks.md"]
+    assert result["rules_generated"] is False
+    assert "connection dropped" in result["errors"]["task_list"]
+
+    # The streamed response was cached, so a rerun is served without the API
+    monkeypatch.setattr(llm, "get_openai_client", lambda: None)
+    (tmp_path / ".cursor" / "rules.md").unlink()
+    rules_generator.stream_document(
+        Path(".cursor/rules.md"),
+        rules_generator.RULES_SYSTEM_PROMPT,
+        "Generate project rules for the following intent:\n\n" + json.dumps({"project_type": "web_app"}, indent=2),
+    )
+    assert (tmp_path / ".cursor" / "rules.md").read_text(encoding="utf-8") == "# Rules\n- be nice"
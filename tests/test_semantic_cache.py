@@ -0,0 +1,45 @@
+from agents.semantic_cache import SemanticCache
+from agents.subagents import intent_parser
+
+VOCAB = ["todo", "task", "app", "manager", "auth", "login", "blog", "shop"]
+SYNONYMS = {"task": "todo", "manager": "app", "login": "auth"}
+
+
+def fake_embed(texts):
+    vectors = []
+    for text in texts:
+        words = [SYNONYMS.get(w, w) for w in text.lower().split()]
+        vectors.append([float(words.count(v)) for v in VOCAB])
+    return vectors
+
+
+def test_paraphrase_hits_and_unrelated_request_misses(tmp_path):
+    cache = SemanticCache(tmp_path / "cache.jsonl", fake_embed, threshold=0.9)
+    cache.add("todo app with auth", {"project_name": "todo"})
+
+    hit = cache.lookup("task manager with login")
+    assert hit.hit and hit.value == {"project_name": "todo"}
+    assert hit.confidence > 0.99 and hit.matched_text == "todo app with auth"
+    assert not cache.lookup("blog shop").hit
+
+    # Entries persist across instances
+    assert SemanticCache(tmp_path / "cache.jsonl", fake_embed, threshold=0.9).lookup("todo auth app").hit
+
+
+def test_intent_parser_serves_paraphrases_from_semantic_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_chat_completion(**kwargs):
+        calls.append(kwargs)
+        return '{"project_name": "todo"}'
+
+    monkeypatch.setattr(intent_parser, "chat_completion", fake_chat_completion)
+    monkeypatch.setattr(intent_parser, "_semantic_cache", SemanticCache(tmp_path / "c.jsonl", fake_embed))
+
+    first = intent_parser.run_task({"raw_user_request": "todo app with auth", "semantic_cache": True})
+    second = intent_parser.run_task({"raw_user_request": "task manager with login", "semantic_cache": True})
+
+    assert len(calls) == 1
+    assert first["parsed_intent"] == second["parsed_intent"] == {"project_name": "todo"}
+    assert second["intent_cache"]["hit"] is True
+    assert second["intent_cache"]["matched_request"] == "todo app with auth"
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from agents.vector_snapshot import VectorSnapshot, export_snapshot
+
+
+@pytest.fixture
+def collection(make_collection):
+    return make_collection({
+        "a": ("alpha", {"domain": "backend"}, [1.0, 0.0, 0.0]),
+        "b": ("beta", {"domain": "shared"}, [0.0, 2.0, 0.0]),
+        "c": ("gamma ü", {"domain": "frontend", "source": "x.md"}, [0.6, 0.8, 0.0]),
+    })
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_snapshot_roundtrip_search(tmp_path, collection, dtype):
+    manifest = export_snapshot(collection, tmp_path / "snap", dtype=dtype, batch_size=2)
+    assert manifest["count"] == 3
+
+    snapshot = VectorSnapshot.open(tmp_path / "snap")
+    hits = snapshot.search([1.0, 0.1, 0.0], k=2)
+    assert [hit["id"] for hit in hits] == ["a", "c"]
+    assert hits[1]["document"] == "gamma ü"
+    assert hits[1]["metadata"]["source"] == "x.md"
+    assert hits[0]["score"] == pytest.approx(0.995, abs=0.01)
+
+
+def test_snapshot_domain_filter(tmp_path, collection):
+    export_snapshot(collection, tmp_path / "snap")
+    snapshot = VectorSnapshot.open(tmp_path / "snap")
+
+    hits = snapshot.search([1.0, 0.0, 0.0], k=3, domains=["backend", "shared"])
+    assert [hit["domain"] for hit in hits] == ["backend", "shared"]
+    assert isinstance(snapshot.vectors, np.memmap)
+
+
+def test_export_ignores_documents_added_during_the_export(tmp_path, collection):
+    get = collection.get
+
+    def growing_get(limit, offset, include):
+        # Another writer adds two documents once the export has started
+        if collection.count() == 3:
+            collection.add(ids=["d", "e"], documents=["delta", "epsilon"],
+                           metadatas=[{"domain": "qa"}] * 2, embeddings=[[0.0, 0.0, 1.0]] * 2)
+        # Chroma may hand back more rows than asked for; the export must cope
+        return get(limit=limit + 2, offset=offset, include=include)
+
+    collection.get = growing_get
+
+    manifest = export_snapshot(collection, tmp_path / "snap", batch_size=2)
+
+    assert manifest["count"] == 3
+    snapshot = VectorSnapshot.open(tmp_path / "snap")
+    assert sorted(hit["id"] for hit in snapshot.search([1.0, 1.0, 1.0], k=5)) == ["a", "b", "c"]